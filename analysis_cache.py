@@ -0,0 +1,83 @@
+import itertools
+import threading
+from collections import OrderedDict
+
+# Globálisan egyedi adatverzió tokenek: minden adat- vagy mapping változás újat kap,
+# így a másolatok (with_architecture_mapping, refresh) kulcsai sem ütközhetnek
+_data_versions = itertools.count(1)
+
+
+def next_data_version():
+    return next(_data_versions)
+
+
+def normalize_architectures(architecture):
+    """Architektúra szűrő normalizálása cache kulcshoz: None / [] -> üres halmaz (összes)"""
+    if not architecture:
+        return frozenset()
+    if isinstance(architecture, (list, tuple, set, frozenset)):
+        return frozenset(architecture)
+    return frozenset([architecture])
+
+
+class AnalysisCache:
+    """Méretkorlátos LRU cache az elemzési eredményekhez, találat / hiány számlálókkal.
+
+    A kulcs (end_month, architektúra halmaz, adatverzió); adat újratöltéskor új verzió
+    keletkezik, a régi bejegyzések pedig az LRU kiszorítással tűnnek el.
+    A tárolt eredmények megosztottak, csak olvasásra használhatók.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __getstate__(self):
+        # A lock nem pickle-ölhető (process pool worker-ek)
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Eredmény a kulcshoz (None, ha nincs) - találatnál a bejegyzés a legfrissebb lesz"""
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, key, result):
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Számlálók: hits, misses, evictions, entries, hit_rate"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hit_rate': self.hits / lookups if lookups else None,
+            }
@@ -4,24 +4,38 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import pandas as pd
 import os
-from data_processor import BookingAnalyzer # Feltételezve, hogy a data_processor.py a gyökérkönyvtárban van
+from data_processor import BookingAnalyzer, compact_from_env # Feltételezve, hogy a data_processor.py a gyökérkönyvtárban van
+from data_watcher import DataWatcher
+from csv_schema import schema_from_env
+from compute_backend import backend_from_env
+from index_grid import IndexGrid
+from deal_sizes import DealSizeGrid
+from drill_hierarchy import hierarchy_from_env
+from upload_spool import UploadSpool
+from log_config import configure_logging
+from perf_metrics import current_rss_mb, peak_rss_mb
+
+# Log szint: BOOKING_ANALYZER_LOG_LEVEL, csendes (production) mód: BOOKING_ANALYZER_QUIET=1
+# Opcionális CSV séma (JSON): BOOKING_ANALYZER_SCHEMA
+configure_logging()
+
+# Választható index skálák (az első az alapértelmezett, a megosztott analyzer ezt használja)
+INDEX_GRID_PRESETS = {
+    "0-10 (1%-os lépések, 10 = >9%)": IndexGrid.default,
+    "0-25% (0,5%-os lépések)": lambda: IndexGrid.linear(0.25, 0.005),
+}
+
+# T-shirt méret kategóriák (az architektúra összegekhez és a deal méret eloszláshoz is)
+DEAL_SIZE_GRID = DealSizeGrid.default()
+SIZE_COLORS = dict(zip(DEAL_SIZE_GRID.labels, DEAL_SIZE_GRID.icons))
 
 def get_tshirt_size(value):
     """T-Shirt méret meghatározása TCV érték alapján"""
     try:
         value = float(value) if value != '' else 0
-        if value <= 2_000_000:
-            return "XS"
-        elif value <= 10_000_000:
-            return "S"
-        elif value <= 25_000_000:
-            return "M"
-        elif value <= 100_000_000:
-            return "L"
-        else:
-            return "XL"
+        return DEAL_SIZE_GRID.label_for(value)
     except (ValueError, TypeError):
-        return "XS"
+        return DEAL_SIZE_GRID.labels[0]
 
 def check_csv_files():
     """Ellenőrzi, hogy léteznek-e a szükséges CSV fájlok"""
@@ -29,6 +43,41 @@ def check_csv_files():
     tcv_exists = os.path.exists('TCV.csv')
     return acv_exists, tcv_exists
 
+def get_upload_spool():
+    """A session feltöltési spool-ja: a feltöltések lemezre írva, a session végén törlődnek"""
+    if 'upload_spool' not in st.session_state:
+        st.session_state['upload_spool'] = UploadSpool()
+    return st.session_state['upload_spool']
+
+@st.cache_resource(show_spinner="📥 Adatok betöltése...")
+def get_data_watcher(acv_file_path, tcv_file_path):
+    """Lokális fájlok figyelője - folyamatonként egy, minden session között megosztva.
+
+    A változások betöltése háttérszálon fut; a renderelés mindig egy kész snapshotot kap,
+    ami csak olvasásra használható.
+    """
+    return DataWatcher(acv_file_path, tcv_file_path, schema=schema_from_env(), backend=backend_from_env(),
+                       compact=compact_from_env(), hierarchy=hierarchy_from_env()).start()
+
+@st.cache_resource(max_entries=4, show_spinner="📥 Feltöltött adatok betöltése...")
+def load_analyzer_from_uploads(acv_hash, tcv_hash, _acv_file, _tcv_file, _spool):
+    """BookingAnalyzer betöltése feltöltött fájlokból - tartalom hash-enként egyszer (megosztott, csak olvasható).
+
+    A feltöltések lemezre kerülnek, és a lokális fájlokkal azonos, útvonal alapú (memory-mapped)
+    olvasás dolgozza fel őket; a fájl dátuma a tartalom első lemezre írásának ideje.
+    """
+    acv_path = _spool.spool(_acv_file, acv_hash).path
+    tcv_path = _spool.spool(_tcv_file, tcv_hash).path
+    return BookingAnalyzer(acv_file_path=acv_path, tcv_file_path=tcv_path, use_cache=False, memory_map=True,
+                           schema=schema_from_env(), backend=backend_from_env(), compact=compact_from_env(),
+                           hierarchy=hierarchy_from_env())
+
+def load_uploaded_analyzer(acv_file, tcv_file):
+    """Feltöltött fájlokból cache-elt analyzer lekérése (ugyanaz a tartalom újrafeltöltve sem töltődik be újra)"""
+    spool = get_upload_spool()
+    return load_analyzer_from_uploads(spool.content_hash(acv_file), spool.content_hash(tcv_file),
+                                      acv_file, tcv_file, spool)
+
 def main():
     st.set_page_config(page_title="Booking Value Analyzer", layout="wide")
     
@@ -36,6 +85,7 @@ def main():
     acv_exists, tcv_exists = check_csv_files()
     
     analyzer = None
+    snapshot = None
     
     if not acv_exists or not tcv_exists:
         st.error("❌ Hiányzó CSV fájlok!")
@@ -62,13 +112,15 @@ def main():
         
         if acv_file and tcv_file:
             try:
-                analyzer = BookingAnalyzer(acv_file_obj=acv_file, tcv_file_obj=tcv_file)
+                analyzer = load_uploaded_analyzer(acv_file, tcv_file)
             except Exception as e:
                 st.error(f"Hiba a feltöltött fájlokkal: {str(e)}")
     else:
         # Automatikus betöltés - CSENDES MÓD
         try:
-            analyzer = BookingAnalyzer(acv_file_path='ACV.csv', tcv_file_path='TCV.csv')
+            # A snapshotot egyszer kérjük le, így a teljes renderelés konzisztens állapotot lát
+            snapshot = get_data_watcher(os.path.abspath('ACV.csv'), os.path.abspath('TCV.csv')).snapshot()
+            analyzer = snapshot.analyzer
         except Exception as e:
             st.error(f"Hiba történt az automatikus betöltéskor: {str(e)}")
             
@@ -83,16 +135,71 @@ def main():
             
             if acv_file and tcv_file:
                 try:
-                    analyzer = BookingAnalyzer(acv_file_obj=acv_file, tcv_file_obj=tcv_file)
+                    analyzer = load_uploaded_analyzer(acv_file, tcv_file)
                 except Exception as e:
                     st.error(f"Hiba a feltöltött fájlokkal: {str(e)}")
     
     if analyzer:
-        run_analysis(analyzer)
+        run_analysis(analyzer, snapshot)
 
 
-def run_analysis(analyzer):
-    """Elemzés futtatása a megadott analyzer-rel"""
+def edit_architecture_mapping(analyzer):
+    """Architektúra mapping szerkesztő az oldalsávban.
+
+    A mapping session szintű: a megosztott (cache-elt) analyzer változatlan marad, a módosított
+    mappinghez egy átcímkézett másolat készül, ami csak a havi aggregátumokat összegzi újra.
+    """
+    mapping = st.session_state.get('architecture_mapping', analyzer.architecture_mapping)
+
+    with st.sidebar.expander("🏗️ Architektúra mapping"):
+        raw_architectures = analyzer.get_raw_architectures()
+        mapping_df = pd.DataFrame({
+            'Eredeti': raw_architectures,
+            'Csoport': [mapping.get(arch, arch) for arch in raw_architectures],
+        })
+        with st.form("architecture_mapping_form"):
+            edited_df = st.data_editor(mapping_df, disabled=['Eredeti'], hide_index=True,
+                                       use_container_width=True, key="architecture_mapping_editor")
+            apply_mapping = st.form_submit_button("✅ Mapping alkalmazása")
+        reset_mapping = st.button("↩️ Alapértelmezett mapping", key="reset_architecture_mapping")
+
+    if apply_mapping:
+        mapping = {
+            row.Eredeti: row.Csoport.strip()
+            for row in edited_df.itertuples()
+            if isinstance(row.Csoport, str) and row.Csoport.strip() and row.Csoport.strip() != row.Eredeti
+        }
+        st.session_state['architecture_mapping'] = mapping
+    elif reset_mapping:
+        mapping = dict(BookingAnalyzer.DEFAULT_ARCHITECTURE_MAPPING)
+        st.session_state['architecture_mapping'] = mapping
+
+    if mapping == analyzer.architecture_mapping:
+        return analyzer
+
+    # Az átcímkézett példányt a session-ben tároljuk, amíg az alap analyzer (snapshot) és a mapping nem változik
+    mapping_key = frozenset(mapping.items())
+    cached = st.session_state.get('remapped_analyzer')
+    if cached is None or cached[0] is not analyzer or cached[1] != mapping_key:
+        cached = (analyzer, mapping_key, analyzer.with_architecture_mapping(mapping))
+        st.session_state['remapped_analyzer'] = cached
+    return cached[2]
+
+def select_index_grid(analyzer):
+    """Index skála választó az oldalsávban - session szintű, a megosztott analyzer változatlan marad"""
+    preset = st.sidebar.selectbox("📐 Index skála:", options=list(INDEX_GRID_PRESETS), key="index_grid_preset")
+    if preset == next(iter(INDEX_GRID_PRESETS)):
+        return analyzer
+
+    # A másolatot a session-ben tároljuk, így az elemzési cache kulcsa (adatverzió) is stabil marad
+    cached = st.session_state.get('index_grid_analyzer')
+    if cached is None or cached[0] is not analyzer or cached[1] != preset:
+        cached = (analyzer, preset, analyzer.with_index_grid(INDEX_GRID_PRESETS[preset]()))
+        st.session_state['index_grid_analyzer'] = cached
+    return cached[2]
+
+def run_analysis(analyzer, snapshot=None):
+    """Elemzés futtatása a megadott analyzer-rel (lokális fájloknál a watcher snapshotjával)"""
     
     # OLDALSÁV CÍME ÉS BEÁLLÍTÁSOK
     st.sidebar.title("📊 ACV/TCV Booking Value Elemző")
@@ -103,11 +210,19 @@ def run_analysis(analyzer):
     st.sidebar.subheader("📄 Adatok frissessége:")
     st.sidebar.markdown(f"**ACV:** `{analyzer.acv_file_creation_date}`")
     st.sidebar.markdown(f"**TCV:** `{analyzer.tcv_file_creation_date}`")
+    if snapshot is not None:
+        st.sidebar.markdown(f"**Snapshot:** `v{snapshot.version}` · betöltve: `{snapshot.loaded_at:%Y-%m-%d %H:%M:%S}`")
     st.sidebar.markdown("---")
     
     # Felhasználói vezérlők
     st.sidebar.header("⚙️ Beállítások")
     
+    # Architektúra mapping (session szintű, újratöltés nélkül)
+    analyzer = edit_architecture_mapping(analyzer)
+
+    # Index skála (predikciós nézetek)
+    analyzer = select_index_grid(analyzer)
+    
     # Hónap választása
     available_months = analyzer.get_available_months()
     
@@ -187,14 +302,67 @@ def run_analysis(analyzer):
         st.session_state['view_mode'] = view_mode
         st.rerun() # Frissíteni kell, ha nézetet váltunk
 
+    show_diagnostics = st.sidebar.checkbox("🩺 Diagnosztika", value=False,
+                                           help="Betöltési fázisok és elemzési hívások ideje, sorszáma és memóriája")
+
     # Elemzés futtatása
     results = analyzer.get_rolling_analysis(selected_month, arch_filter)
+
+    # Sor lebontás a betöltéskor épült rollup kockákból (csak beállított hierarchiánál)
+    drilldown = (lambda path: analyzer.get_drilldown(selected_month, path)) if analyzer.rollup_cubes else None
     
-    # Eredmények megjelenítése
-    display_results(st, results, view_mode, analysis_type)
+    # Eredmények megjelenítése (a renderelés ideje is mérve)
+    with analyzer.metrics.measure('display_results', 'render'):
+        display_results(st, results, view_mode, analysis_type, drilldown)
 
-def display_results(st, results, view_mode, analysis_type):
-    """Eredmények megjelenítése - normál, aktuális és predikciós módban"""
+    if show_diagnostics:
+        display_diagnostics(st, analyzer.metrics, analyzer.analysis_cache, analyzer.memory_report())
+
+def display_diagnostics(st, metrics, analysis_cache, memory_report=None):
+    """Diagnosztikai nézet: elemzési cache, fázisonkénti összesítés, legutóbbi mérések,
+    keretek oszloponkénti memóriája és JSON letöltés"""
+    try:
+        st.markdown("---")
+        st.subheader("🩺 Diagnosztika")
+        st.caption("Az rss_start_mb / rss_end_mb / rss_delta_mb a folyamat jelenlegi memóriája a fázis elején, "
+                   "végén és a kettő különbsége; a fázison belüli csúcs (peak_alloc_mb) csak "
+                   "BOOKING_ANALYZER_TRACE_MEMORY=1 mellett mérődik.")
+        process_rss, process_peak = current_rss_mb(), peak_rss_mb()
+        if process_rss is not None:
+            peak_text = f" · élettartam csúcs: {process_peak:,.1f} MB" if process_peak is not None else ""
+            st.markdown(f"**Folyamat memória:** {process_rss:,.1f} MB{peak_text}")
+
+        cache_stats = analysis_cache.stats()
+        hit_rate = f"{cache_stats['hit_rate']:.0%}" if cache_stats['hit_rate'] is not None else "–"
+        st.markdown(f"**Elemzési cache:** {cache_stats['hits']} találat · {cache_stats['misses']} hiány · "
+                    f"találati arány: {hit_rate} · {cache_stats['entries']}/{cache_stats['max_entries']} bejegyzés · "
+                    f"{cache_stats['evictions']} kiszorítás")
+
+        st.markdown("**Fázisonkénti összesítés**")
+        st.dataframe(metrics.summary().round(1), use_container_width=True, hide_index=True)
+
+        st.markdown("**Legutóbbi mérések**")
+        recent = metrics.to_frame().tail(50).iloc[::-1]
+        st.dataframe(recent.round(1), use_container_width=True, hide_index=True)
+
+        if memory_report is not None and not memory_report.empty:
+            st.markdown("**Keretek memóriája oszloponként**")
+            before = memory_report['bytes_before'].sum(min_count=1)
+            after = memory_report['bytes_after'].sum()
+            if pd.notna(before):
+                st.caption(f"Kompaktálás előtt {before / 1e6:,.1f} MB · utána {after / 1e6:,.1f} MB "
+                           f"(BOOKING_ANALYZER_COMPACT=1 vagy float32)")
+            else:
+                st.caption(f"Összesen {after / 1e6:,.1f} MB - kompakt mód: BOOKING_ANALYZER_COMPACT=1 vagy float32")
+            st.dataframe(memory_report, use_container_width=True, hide_index=True)
+
+        st.download_button("⬇️ Metrikák letöltése (JSON)", metrics.to_json(),
+                           file_name="booking_analyzer_metrics.json", mime="application/json")
+    except Exception as e:
+        st.error(f"Diagnosztika megjelenítési hiba: {e}")
+
+def display_results(st, results, view_mode, analysis_type, drilldown=None):
+    """Eredmények megjelenítése - normál, aktuális és predikciós módban (drilldown: sor lebontó függvény, ha van hierarchia)"""
     try:
         period_info = results.get('period_info', {})
         
@@ -205,19 +373,19 @@ def display_results(st, results, view_mode, analysis_type):
             display_detailed_analysis_page(st, results, period_info, analysis_type)
             return
         elif view_mode == "📜 Aktuális Hónap - Összehasonlító" and analysis_type == 'current_month_prediction':
-            display_current_month_detailed_results(st, results, period_info)
+            display_current_month_detailed_results(st, results, period_info, drilldown)
             return
         
         # Főképernyő megjelenítése (ez tartalmazza a predikciós főképernyőt is)
         if analysis_type == 'historical':
-            display_historical_results(st, results, period_info)
+            display_historical_results(st, results, period_info, drilldown)
         else: # current_month_prediction vagy future_prediction
-            display_prediction_main_screen(st, results, period_info, analysis_type)
+            display_prediction_main_screen(st, results, period_info, analysis_type, drilldown)
 
     except Exception as e:
         st.error(f"Eredmény megjelenítési hiba: {e}")
 
-def display_current_month_detailed_results(st, results, period_info):
+def display_current_month_detailed_results(st, results, period_info, drilldown=None):
     """
     Az aktuális hónap elemzésének részletes (hasonló a történelmihez) megjelenítése.
     Ez a nézet az aktuális hónapban már meglévő adatokat hasonlítja össze a baseline-nal.
@@ -238,22 +406,20 @@ def display_current_month_detailed_results(st, results, period_info):
     with col3:
         st.metric("Utolsó adatpont dátuma", period_info.get('last_data_point', ''))
 
-    # ACV elemzés
-    st.subheader("💰 ACV Analysis (Már meglévő vs. Baseline)")
-    # Fontos: itt a 'acv_current'-et használjuk, ami az _get_current_month_analysis()-ből jön,
-    # és tartalmazza a már meglévő adatokat az last_data_point_date-ig.
-    acv_current = results.get('acv_current', {})
-    acv_baseline = results.get('acv_baseline', {})
-
-    if acv_current and acv_baseline:
-        display_comparison_table(st, acv_current, acv_baseline, "ACV", "$")
-    
-    # TCV elemzés
-    st.subheader("📊 TCV Analysis (Már meglévő vs. Baseline)")
-    tcv_current = results.get('tcv_current', {})
-    tcv_baseline = results.get('tcv_baseline', {})
-    if tcv_current and tcv_baseline:
-        display_comparison_table(st, tcv_current, tcv_baseline, "TCV", "$")
+    # Metrikánkénti elemzés (ACV, TCV és a további regisztrált metrikák)
+    for metric in results.get('metrics', []):
+        key, label, currency = metric['key'], metric['label'], metric['currency']
+        st.subheader(f"{metric['icon']} {label} Analysis (Már meglévő vs. Baseline)")
+        # Fontos: itt a '<metrika>_current'-et használjuk, ami az _get_current_month_analysis()-ből jön,
+        # és tartalmazza a már meglévő adatokat az last_data_point_date-ig.
+        current = results.get(f'{key}_current', {})
+        baseline = results.get(f'{key}_baseline', {})
+        if current and baseline:
+            display_comparison_table(st, current, baseline, label, currency)
+            if drilldown is not None:
+                display_drilldown(st, drilldown, [*current, *baseline], metric, 'baseline')
+        if key == results.get('deal_size_grid', {}).get('metric'):
+            display_deal_size_distribution(st, results, [('current', 'Már meglévő'), ('baseline', 'Baseline')])
 
     # Visszagomb a predikciós nézetre
     st.markdown("---")
@@ -261,7 +427,7 @@ def display_current_month_detailed_results(st, results, period_info):
         st.session_state['view_mode'] = "📊 Főképernyő" # A predikciós nézet a főképernyő 'current_month_prediction' esetén
         st.rerun()
 
-def display_historical_results(st, results, period_info):
+def display_historical_results(st, results, period_info, drilldown=None):
     """Történeti elemzés eredményeinek megjelenítése"""
     st.title("📊 TÖRTÉNETI ELEMZÉS")
     st.markdown("---")
@@ -276,21 +442,20 @@ def display_historical_results(st, results, period_info):
         st.metric("Referencia 12 hónap",
                  f"{period_info.get('reference_start_fiscal', '')} - {period_info.get('reference_end_fiscal', '')}")
     
-    # ACV elemzés
-    st.subheader("💰 ACV Analysis")
-    acv_current = results.get('acv_current', {})
-    acv_reference = results.get('acv_reference', {})
-    if acv_current and acv_reference:
-        display_comparison_table(st, acv_current, acv_reference, "ACV", "$")
-    
-    # TCV elemzés
-    st.subheader("📊 TCV Analysis")
-    tcv_current = results.get('tcv_current', {})
-    tcv_reference = results.get('tcv_reference', {})
-    if tcv_current and tcv_reference:
-        display_comparison_table(st, tcv_current, tcv_reference, "TCV", "$")
-
-def display_prediction_main_screen(st, results, period_info, analysis_type):
+    # Metrikánkénti elemzés (ACV, TCV és a további regisztrált metrikák)
+    for metric in results.get('metrics', []):
+        key, label, currency = metric['key'], metric['label'], metric['currency']
+        st.subheader(f"{metric['icon']} {label} Analysis")
+        current = results.get(f'{key}_current', {})
+        reference = results.get(f'{key}_reference', {})
+        if current and reference:
+            display_comparison_table(st, current, reference, label, currency)
+            if drilldown is not None:
+                display_drilldown(st, drilldown, [*current, *reference], metric, 'reference')
+        if key == results.get('deal_size_grid', {}).get('metric'):
+            display_deal_size_distribution(st, results, [('current', 'Aktuális'), ('reference', 'Referencia')])
+
+def display_prediction_main_screen(st, results, period_info, analysis_type, drilldown=None):
     """Predikciós (vagy aktuális hónap) elemzés főképernyőjének megjelenítése"""
     if analysis_type == 'current_month_prediction':
         st.title("✨ AKTUÁLIS STÁTUSZ - predikcióval")
@@ -314,27 +479,21 @@ def display_prediction_main_screen(st, results, period_info, analysis_type):
         st.metric("Baseline 12 hónap",
                  f"{period_info.get('baseline_start_fiscal', '')} - {period_info.get('baseline_end_fiscal', '')}")
     
-    # ACV predikciós elemzés - EGYSZERŰSÍTETT
-    st.subheader("💰 ACV Index-alapú Elemzés")
-    acv_existing = results.get('acv_current', {})
-    acv_baseline = results.get('acv_baseline', {})
-    acv_index_targets = results.get('acv_index_targets', {})
-    acv_needed_by_index = results.get('acv_needed_by_index', {})
-    
-    if acv_existing and acv_baseline:
-        display_simplified_prediction_table(st, acv_existing, acv_baseline,
-                                           acv_index_targets, acv_needed_by_index, "ACV", "$")
-    
-    # TCV predikciós elemzés - EGYSZERŰSÍTETT
-    st.subheader("📊 TCV Index-alapú Elemzés")
-    tcv_existing = results.get('tcv_current', {})
-    tcv_baseline = results.get('tcv_baseline', {})
-    tcv_index_targets = results.get('tcv_index_targets', {})
-    tcv_needed_by_index = results.get('tcv_needed_by_index', {})
-    
-    if tcv_existing and tcv_baseline:
-        display_simplified_prediction_table(st, tcv_existing, tcv_baseline,
-                                           tcv_index_targets, tcv_needed_by_index, "TCV", "$")
+    # Metrikánkénti predikciós elemzés - EGYSZERŰSÍTETT
+    for metric in results.get('metrics', []):
+        key, label = metric['key'], metric['label']
+        st.subheader(f"{metric['icon']} {label} Index-alapú Elemzés")
+        existing = results.get(f'{key}_current', {})
+        baseline = results.get(f'{key}_baseline', {})
+        if existing and baseline:
+            display_simplified_prediction_table(st, existing, baseline,
+                                               results.get(f'{key}_index_targets', {}),
+                                               results.get(f'{key}_needed_by_index', {}), label, metric['currency'],
+                                               results.get(f'{key}_current_index', {}), results.get('index_grid'))
+            if drilldown is not None:
+                display_drilldown(st, drilldown, [*existing, *baseline], metric, 'baseline', prediction=True)
+        if key == results.get('deal_size_grid', {}).get('metric'):
+            display_deal_size_distribution(st, results, [('current', 'Meglévő'), ('baseline', 'Baseline')])
     
     # NAVIGÁCIÓS LINKEK
     st.markdown("---")
@@ -364,9 +523,100 @@ def display_prediction_main_screen(st, results, period_info, analysis_type):
                 st.session_state['view_mode'] = "📚 Útmutató" # Módváltás
                 st.rerun()
 
-def display_simplified_prediction_table(st, existing_data, baseline_data, index_targets, needed_by_index, metric_name, currency):
-    """Egyszerűsített predikciós táblázat a főképernyőhöz"""
+def display_deal_size_distribution(st, results, windows):
+    """Deal-ek T-shirt méret eloszlása architektúránként (halmozott oszlopdiagram, ablakonként egymás mellett).
+
+    windows: (eredmény kulcs utótag, megjelenített ablak név) párok, pl. ('current', 'Aktuális')
+    """
+    try:
+        grid = results.get('deal_size_grid')
+        if not grid:
+            return
+        rows = []
+        for suffix, window_name in windows:
+            for arch, sizes in results.get(f'deal_sizes_{suffix}', {}).items():
+                if arch == 'Összes':
+                    continue
+                for label, icon in zip(grid['labels'], grid['icons']):
+                    size = sizes.get(label, {})
+                    rows.append({'Architecture': arch, 'Ablak': window_name, 'Size': f"{icon} {label}",
+                                 'Deal-ek': size.get('count', 0), 'Érték': size.get('value', 0.0)})
+        if not rows:
+            return
+
+        st.markdown(f"**📏 Deal méret eloszlás ({grid['source']} soronként)**")
+        measure = st.radio("Mérték", ['Deal-ek', 'Érték'], horizontal=True,
+                           key=f"deal_size_measure_{'_'.join(suffix for suffix, _ in windows)}")
+        df_sizes = pd.DataFrame(rows)
+        fig = px.bar(df_sizes, x='Architecture', y=measure, color='Size', facet_col='Ablak',
+                     category_orders={'Size': [f"{icon} {label}" for label, icon in zip(grid['labels'], grid['icons'])],
+                                      'Ablak': [window_name for _, window_name in windows]},
+                     barmode='stack')
+        st.plotly_chart(fig, use_container_width=True)
+    except Exception as e:
+        st.error(f"Deal méret eloszlás megjelenítési hiba: {e}")
+
+def display_drilldown(st, drilldown, rows, metric, second_suffix, prediction=False):
+    """Tábla sorainak lebontása a hierarchia szintjein: egymásra épülő választók, szintenként egy gyerek táblázat.
+
+    drilldown: útvonal (architektúra, szint 1 címke, ...) -> a get_drilldown eredménye; a gyerek összegek
+    a betöltéskor épült rollup kockákból jönnek, így egy sor kibontása nem szkenneli újra a nyers adatot.
+    second_suffix: a második ablak eredmény kulcs utótagja ('reference' vagy 'baseline').
+    """
+    key, label, currency = metric['key'], metric['label'], metric['currency']
+    try:
+        with st.expander(f"🔽 {label} lebontás"):
+            path = []
+            options = sorted(set(rows) - {'Összes'}, key=str)
+            row_label = 'Architecture'
+            view = 'prediction' if prediction else 'comparison'
+            while options:
+                # Az útvonal a kulcs része: más szülő választásakor a mélyebb választók alaphelyzetből indulnak
+                choice = st.selectbox(f"{row_label} kibontása:", ['–', *options],
+                                      key=f"drill_{view}_{key}_{second_suffix}_{'/'.join(map(str, path))}")
+                if choice == '–':
+                    break
+                path.append(choice)
+                child = drilldown(path)
+                info = child.get('drilldown')
+                if not info:
+                    st.warning("⚠️ A sor nem bontható tovább.")
+                    break
+
+                row_label = info['level']
+                current = child.get(f'{key}_current', {})
+                second = child.get(f'{key}_{second_suffix}', {})
+                st.markdown(f"**{' › '.join(map(str, path))}** → {row_label}")
+                if not current and not second:
+                    st.info(f"Nincs {label} foglalás ezen a szinten a kiválasztott időszakokban.")
+                    break
+                if prediction:
+                    display_simplified_prediction_table(st, current, second, child.get(f'{key}_index_targets', {}),
+                                                        child.get(f'{key}_needed_by_index', {}), label, currency,
+                                                        child.get(f'{key}_current_index', {}), child.get('index_grid'),
+                                                        row_label=row_label)
+                else:
+                    display_comparison_table(st, current, second, label, currency, row_label=row_label)
+
+                if key not in info['expandable_metrics']:
+                    break
+                options = sorted((set(current) | set(second)) - {'Összes'}, key=str)
+    except Exception as e:
+        st.error(f"Lebontás megjelenítési hiba: {e}")
+
+def index_grid_display(index_grid):
+    """Az eredményben kapott index rács leírása (címkék, kiemelt szintek) - alapból a 0-10-es skála"""
+    if index_grid is None:
+        grid = IndexGrid.default()
+        index_grid = {'labels': dict(zip(grid.levels, grid.labels)), 'highlight_levels': grid.highlight_levels}
+    return index_grid['labels'], index_grid['highlight_levels']
+
+def display_simplified_prediction_table(st, existing_data, baseline_data, index_targets, needed_by_index, metric_name, currency,
+                                        current_index=None, index_grid=None, row_label='Architecture'):
+    """Egyszerűsített predikciós táblázat a főképernyőhöz (row_label: a sorok szintje, lebontásnál a gyerek szint)"""
     try:
+        labels, highlight_levels = index_grid_display(index_grid)
+        current_index = current_index or {}
         architectures = set(existing_data.keys()).union(set(baseline_data.keys()))
         
         # Csak architektúra szintű összefoglaló táblázat
@@ -378,38 +628,24 @@ def display_simplified_prediction_table(st, existing_data, baseline_data, index_
             existing_val = float(existing_data.get(arch, 0) if existing_data.get(arch) is not None else 0)
             baseline_val = float(baseline_data.get(arch, 0) if baseline_data.get(arch) is not None else 0)
             
-            # Jelenlegi index számítása
-            current_index_display_numeric = 0
-            if baseline_val != 0:
-                current_growth = ((existing_val - baseline_val) / abs(baseline_val)) * 100
-                # Az index 0-tól 9-ig a százalékos növekedést jelenti, 10 pedig >9%
-                if current_growth >= 10:
-                    current_index_display_numeric = 10
-                elif current_growth > 0: # 0.01% - 9.99% között
-                    current_index_display_numeric = int(current_growth) 
-                else:
-                    current_index_display_numeric = 0 # Negatív vagy 0 növekedés
-            
-            current_index_display = f"📊 {current_index_display_numeric}"
-            
-            # Kulcs értékek (5% és 10%+ növekedéshez szükséges értékek)
-            needed_for_5 = needed_by_index.get(arch, {}).get(5, 0)
-            needed_for_10 = needed_by_index.get(arch, {}).get(10, 0)
+            # Jelenlegi index (az elemzés számolja az index rács alapján)
+            current_index_display = f"📊 {current_index.get(arch, 0)}"
             
             row_data = {
-                'Architecture': arch,
+                row_label: arch,
                 f'Meglévő {metric_name}': f"{currency}{existing_val:,.0f}",
                 f'Baseline {metric_name}': f"{currency}{baseline_val:,.0f}",
                 'Jelenlegi Index': current_index_display,
-                f'Index 5-höz szükséges': f"{currency}{needed_for_5:,.0f}",
-                f'Index 10-hez szükséges': f"{currency}{needed_for_10:,.0f}"
             }
+            # Kulcs értékek (a kiemelt index szintekhez szükséges további booking)
+            for level in highlight_levels:
+                needed = needed_by_index.get(arch, {}).get(level, 0)
+                row_data[f'Szükséges: Index {level} ({labels[level]})'] = f"{currency}{needed:,.0f}"
             
             # T-SHIRT SIZING CSAK TCV-NÉL
             if metric_name == "TCV":
                 tshirt_size = get_tshirt_size(existing_val)
-                size_colors = {'XS': '🔴', 'S': '🟠', 'M': '🟡', 'L': '🟢', 'XL': '🔵'}
-                colored_size = f"{size_colors.get(tshirt_size, '')} {tshirt_size}"
+                colored_size = f"{SIZE_COLORS.get(tshirt_size, '')} {tshirt_size}"
                 row_data = {'Size': colored_size, **row_data}
             
             summary_data.append(row_data)
@@ -443,30 +679,23 @@ def display_detailed_analysis_page(st, results, period_info, analysis_type):
     
     st.markdown("---")
     
-    # ACV részletes elemzés
-    st.subheader("💰 ACV Részletes Index Elemzés")
-    acv_data = results.get('acv_current', {})
-    acv_baseline = results.get('acv_baseline', {})
-    acv_targets = results.get('acv_index_targets', {})
-    acv_needed = results.get('acv_needed_by_index', {})
-    
-    if acv_data:
-        display_detailed_metrics_page(st, acv_data, acv_baseline, acv_targets, acv_needed, "ACV", "$")
-    
-    st.markdown("---")
-    
-    # TCV részletes elemzés
-    st.subheader("📊 TCV Részletes Index Elemzés")
-    tcv_data = results.get('tcv_current', {})
-    tcv_baseline = results.get('tcv_baseline', {})
-    tcv_targets = results.get('tcv_index_targets', {})
-    tcv_needed = results.get('tcv_needed_by_index', {})
-    
-    if tcv_data:
-        display_detailed_metrics_page(st, tcv_data, tcv_baseline, tcv_targets, tcv_needed, "TCV", "$")
-
-def display_detailed_metrics_page(st, existing_data, baseline_data, index_targets, needed_by_index, metric_name, currency):
+    # Metrikánkénti részletes elemzés
+    for position, metric in enumerate(results.get('metrics', [])):
+        key, label = metric['key'], metric['label']
+        if position > 0:
+            st.markdown("---")
+        st.subheader(f"{metric['icon']} {label} Részletes Index Elemzés")
+        data = results.get(f'{key}_current', {})
+        if data:
+            display_detailed_metrics_page(st, data, results.get(f'{key}_baseline', {}),
+                                          results.get(f'{key}_index_targets', {}),
+                                          results.get(f'{key}_needed_by_index', {}), label, metric['currency'],
+                                          results.get('index_grid'))
+
+def display_detailed_metrics_page(st, existing_data, baseline_data, index_targets, needed_by_index, metric_name, currency,
+                                  index_grid=None):
     """Részletes metrika elemzés - teljesítmény oszlop nélkül"""
+    labels, _ = index_grid_display(index_grid)
     architectures = set(existing_data.keys()).union(set(baseline_data.keys()))
     
     # Architektúra választó
@@ -500,7 +729,7 @@ def display_detailed_metrics_page(st, existing_data, baseline_data, index_target
         arch_targets = index_targets.get(selected_arch, {})
         arch_needed = needed_by_index.get(selected_arch, {})
         
-        for index in range(11):  # 0-10
+        for index, growth_display in labels.items():
             target_val = arch_targets.get(index, 0)
             needed_val = arch_needed.get(index, 0)
             
@@ -512,9 +741,6 @@ def display_detailed_metrics_page(st, existing_data, baseline_data, index_target
             else:
                 status = "🔴 Távolibb"
 
-            # Növekedési ráta kijelzése
-            growth_display = f"{index}%" if index < 10 else ">9%"
-            
             index_data.append({
                 'Index': f"📊 {index}",
                 'Státusz': status,
@@ -547,6 +773,7 @@ def display_guidance_page(st):
 - **Index 5**: 5% növekedés a baseline-hoz képest
 - **Index 9**: 9% növekedés a baseline-hoz képest
 - **Index 10**: >9% növekedés a baseline-hoz képest (10%-ként számítva)
+- Az oldalsávban finomabb **index skála** is választható (pl. 0-25% fél százalékos lépésekben)
 
 ## 🎯 Metrika Számítás
 
@@ -579,8 +806,8 @@ A predikciós mód segít felmérni, mennyi bookingra van még szükség egy ado
 -   **Útmutató**: Ez az oldal - technikai részletek és magyarázatok a rendszer működéséről.
 """)
 
-def display_comparison_table(st, current_data, reference_data, metric_name, currency):
-    """Történeti összehasonlító táblázat megjelenítése - SZÍNES T-SHIRT SIZING-gel"""
+def display_comparison_table(st, current_data, reference_data, metric_name, currency, row_label='Architecture'):
+    """Történeti összehasonlító táblázat megjelenítése - SZÍNES T-SHIRT SIZING-gel (row_label: a sorok szintje)"""
     try:
         architectures = set(current_data.keys()).union(set(reference_data.keys()))
         table_data = []
@@ -611,7 +838,7 @@ def display_comparison_table(st, current_data, reference_data, metric_name, curr
             
             # Táblázat sor összeállítása
             row_data = {
-                'Architecture': arch,
+                row_label: arch,
                 f'Aktuális {metric_name}': f"{currency}{current_val:,.0f}",
                 f'Referencia {metric_name}': f"{currency}{reference_val:,.0f}",
                 'Változás %': change_str,
@@ -621,11 +848,7 @@ def display_comparison_table(st, current_data, reference_data, metric_name, curr
             # T-SHIRT SIZING CSAK TCV-NÉL
             if metric_name == "TCV":
                 tshirt_size = get_tshirt_size(current_val)
-                # Színkódok a méretekhez
-                size_colors = {
-                    'XS': '🔴', 'S': '🟠', 'M': '🟡', 'L': '🟢', 'XL': '🔵'
-                }
-                colored_size = f"{size_colors.get(tshirt_size, '')} {tshirt_size}"
+                colored_size = f"{SIZE_COLORS.get(tshirt_size, '')} {tshirt_size}"
                 # T-shirt size az elejére
                 row_data = {'Size': colored_size, **row_data}
             
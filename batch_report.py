@@ -0,0 +1,188 @@
+import argparse
+import copy
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from analysis_cache import AnalysisCache
+from csv_schema import CsvSchema, schema_from_env
+from compute_backend import BACKENDS, DEFAULT_BACKEND, backend_from_env
+from data_processor import COMPACT_VALUE_DTYPES, BookingAnalyzer, compact_from_env
+from drill_hierarchy import DrillHierarchy, hierarchy_from_env
+from log_config import LOGGER_NAME, configure_logging, get_logger
+
+logger = get_logger(__name__)
+
+# Az "összes architektúra" szűrő címkéje a kimenetben
+ALL_ARCHITECTURES = 'Összes'
+
+# Worker folyamatonként egyszer átadott (keret nélküli) analyzer
+_worker_analyzer = None
+
+
+def _init_worker(analyzer, log_level=None):
+    global _worker_analyzer
+    _worker_analyzer = analyzer
+    if log_level is not None:
+        configure_logging(log_level)
+
+
+def _analyze_months(end_months, architecture_filters):
+    """Worker feladat: egy hónap-csomag összes szűrőre (a worker analyzerével)"""
+    return _worker_analyzer.get_rolling_analysis_many(end_months, architecture_filters)
+
+
+def filter_label(architecture):
+    """Architektúra szűrő megjelenítendő neve"""
+    if not architecture:
+        return ALL_ARCHITECTURES
+    return '+'.join(architecture) if isinstance(architecture, (list, tuple)) else architecture
+
+
+def compute_report(analyzer, end_months=None, architecture_filters=None, workers=None, months_per_task=4):
+    """Teljes hónap × architektúra mátrix számítása process pool-lal.
+
+    Alapértelmezés: minden elérhető hónap, minden architektúra egyenként és az összesített (None) szűrő.
+    A worker-ek csak a havi kockákat kapják meg (a nyers keretek nélkül), egyszer, az initializer-ben.
+    Visszatérés: {(end_month, szűrő kulcs): eredmény}, mint a get_rolling_analysis_many-nél.
+    """
+    if end_months is None:
+        end_months = analyzer.get_available_months()
+    if architecture_filters is None:
+        architecture_filters = [None] + analyzer.get_architectures()
+
+    # Keret nélküli másolat: az elemzés csak a havi kockákat használja
+    light_analyzer = copy.copy(analyzer)
+    light_analyzer.acv_df = None
+    light_analyzer.tcv_df = None
+    # A memoizált eredményeket sem küldjük át a worker-eknek
+    light_analyzer.analysis_cache = AnalysisCache()
+
+    batches = [end_months[i:i + months_per_task] for i in range(0, len(end_months), months_per_task)]
+    workers = workers or os.cpu_count() or 1
+
+    results = {}
+    if workers == 1 or len(batches) <= 1:
+        _init_worker(light_analyzer)
+        for batch in batches:
+            results.update(_analyze_months(batch, architecture_filters))
+        return results
+
+    # A worker-ek ugyanazzal a log szinttel futnak, mint a fő folyamat
+    log_level = logging.getLogger(LOGGER_NAME).level or None
+    with ProcessPoolExecutor(max_workers=min(workers, len(batches)),
+                             initializer=_init_worker, initargs=(light_analyzer, log_level)) as executor:
+        for batch_results in executor.map(_analyze_months, batches, [architecture_filters] * len(batches)):
+            results.update(batch_results)
+    return results
+
+
+def results_to_frame(results):
+    """Eredmények hosszú (long) táblává alakítása CSV exporthoz.
+
+    Oszlopok: end_month, filter, analysis_type, metric, measure, architecture, index, value.
+    A metric a regisztrált metrika címkéje (ACV, TCV, Bookings, ...).
+    A measure: current / reference / baseline / index_target / needed_by_index / current_index
+    (a current_index sorban a value a jelenlegi index szint).
+    """
+    rows = []
+    for (end_month, architecture), result in results.items():
+        base = {
+            'end_month': end_month,
+            'filter': filter_label(architecture),
+            'analysis_type': result.get('analysis_type'),
+        }
+        for metric in result.get('metrics', []):
+            key, label = metric['key'], metric['label']
+            for measure in ('current', 'reference', 'baseline'):
+                for arch, value in result.get(f'{key}_{measure}', {}).items():
+                    rows.append({**base, 'metric': label, 'measure': measure,
+                                 'architecture': arch, 'index': None, 'value': float(value)})
+            for measure in ('index_targets', 'needed_by_index'):
+                for arch, by_index in result.get(f'{key}_{measure}', {}).items():
+                    for index, value in by_index.items():
+                        rows.append({**base, 'metric': label, 'measure': measure.replace('_targets', '_target'),
+                                     'architecture': arch, 'index': index, 'value': float(value)})
+            for arch, level in result.get(f'{key}_current_index', {}).items():
+                rows.append({**base, 'metric': label, 'measure': 'current_index',
+                             'architecture': arch, 'index': None, 'value': float(level)})
+
+    frame = pd.DataFrame(rows, columns=['end_month', 'filter', 'analysis_type', 'metric',
+                                        'measure', 'architecture', 'index', 'value'])
+    frame['index'] = frame['index'].astype('Int64')
+    return frame
+
+
+def results_to_json(results):
+    """Eredmények beágyazott JSON szerkezetben: {end_month: {szűrő: eredmény}}"""
+    nested = {}
+    for (end_month, architecture), result in results.items():
+        nested.setdefault(end_month, {})[filter_label(architecture)] = result
+    return json.dumps(nested, ensure_ascii=False, indent=2, default=float)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ACV/TCV gördülő elemzés batch riport (böngésző nélkül)")
+    parser.add_argument('--acv', default='ACV.csv', help="ACV CSV fájl útvonala")
+    parser.add_argument('--tcv', default='TCV.csv', help="TCV CSV fájl útvonala")
+    parser.add_argument('--output-dir', default='reports', help="Kimeneti könyvtár")
+    parser.add_argument('--format', nargs='+', choices=['csv', 'json'], default=['csv', 'json'],
+                        help="Kimeneti formátum(ok)")
+    parser.add_argument('--workers', type=int, default=None, help="Worker folyamatok száma (alapból CPU szám)")
+    parser.add_argument('--months', nargs='+', default=None, help="Csak ezek a végpont hónapok (pl. 'Jul FY2025')")
+    parser.add_argument('--chunksize', type=int, default=None, help="Streaming betöltés ennyi soros darabokban")
+    parser.add_argument('--schema', default=None,
+                        help="CSV séma JSON fájl (oszlop szűkítés, rögzített dtype-ok; alapból BOOKING_ANALYZER_SCHEMA)")
+    parser.add_argument('--backend', choices=[DEFAULT_BACKEND, *BACKENDS], default=None,
+                        help="Betöltési backend (alapból BOOKING_ANALYZER_BACKEND vagy pandas)")
+    parser.add_argument('--compact', nargs='?', const='float64', choices=list(COMPACT_VALUE_DTYPES), default=None,
+                        help="Kompakt nyers keretek (opcionálisan float32 értékekkel; alapból BOOKING_ANALYZER_COMPACT)")
+    parser.add_argument('--hierarchy', default=None,
+                        help="Lebontási szintek, pl. 'Sub-architecture > Region > Customer' (alapból BOOKING_ANALYZER_HIERARCHY)")
+    parser.add_argument('--no-cache', action='store_true', help="Lemezes cache kikapcsolása")
+    parser.add_argument('--quiet', action='store_true', help="Csendes mód: csak figyelmeztetések és hibák")
+    parser.add_argument('--verbose', action='store_true', help="Debug szintű diagnosztika")
+    args = parser.parse_args(argv)
+
+    configure_logging('DEBUG' if args.verbose else None, quiet=args.quiet or None)
+
+    start_time = time.time()
+    schema = CsvSchema.load(args.schema) if args.schema else schema_from_env()
+    # Az appal azonos hierarchia: a rollup kockák a cache / SQLite feldolgozási aláírás részei
+    hierarchy = DrillHierarchy.parse(args.hierarchy) if args.hierarchy else hierarchy_from_env()
+    analyzer = BookingAnalyzer(acv_file_path=args.acv, tcv_file_path=args.tcv,
+                               use_cache=not args.no_cache, chunksize=args.chunksize, schema=schema,
+                               backend=args.backend or backend_from_env(), compact=args.compact or compact_from_env(),
+                               hierarchy=hierarchy)
+    end_months = args.months or analyzer.get_available_months()
+
+    with analyzer.metrics.measure('compute_report', 'analysis') as phase:
+        results = compute_report(analyzer, end_months=end_months, workers=args.workers)
+        phase['rows'] = len(results)
+    logger.info("✅ %s elemzés kiszámítva (%s hónap) - %.1f mp",
+                len(results), len(end_months), time.time() - start_time)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    if 'csv' in args.format:
+        csv_path = os.path.join(args.output_dir, 'rolling_analysis.csv')
+        results_to_frame(results).to_csv(csv_path, index=False)
+        logger.info("💾 CSV mentve: %s", csv_path)
+    if 'json' in args.format:
+        json_path = os.path.join(args.output_dir, 'rolling_analysis.json')
+        with open(json_path, 'w', encoding='utf-8') as f:
+            f.write(results_to_json(results))
+        logger.info("💾 JSON mentve: %s", json_path)
+
+    # Betöltési fázisok és elemzési hívások metrikái (regressziók követéséhez)
+    metrics_path = os.path.join(args.output_dir, 'metrics.json')
+    with open(metrics_path, 'w', encoding='utf-8') as f:
+        f.write(analyzer.metrics.to_json())
+    logger.info("📈 Metrikák mentve: %s", metrics_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+import argparse
+import glob
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import compute_backend
+import data_cache
+import synthetic_data
+from data_processor import BookingAnalyzer
+from log_config import configure_logging, get_logger
+from perf_metrics import peak_rss_mb
+
+logger = get_logger(__name__)
+
+DEFAULT_SIZES = ['10k', '100k', '1M']
+DEFAULT_DATA_DIR = 'benchmark_data'
+DEFAULT_RESULTS_DIR = 'benchmark_results'
+
+
+def _git_revision():
+    """Az aktuális git commit rövid hash-e (ha elérhető)"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _time_calls(func, repeats):
+    """Függvény ismételt futtatása: (medián ms, minimum ms)"""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), min(timings)
+
+
+def prepare_dataset(data_dir, size, layout, seed=0):
+    """Benchmark adatkészlet (újra)használata: méret + layout + seed szerint egyszer generálódik"""
+    directory = os.path.join(data_dir, f"{layout}_{size}_seed{seed}")
+    acv_path, tcv_path = os.path.join(directory, 'ACV.csv'), os.path.join(directory, 'TCV.csv')
+    if not (os.path.exists(acv_path) and os.path.exists(tcv_path)):
+        synthetic_data.write_dataset(directory, size, layout=layout, seed=seed)
+    return acv_path, tcv_path
+
+
+def benchmark_dataset(acv_path, tcv_path, repeats=5, schema=None):
+    """Egy adatkészlet mérései: betöltés (hideg, sémával, Arrow / SQLite backenddel és cache-ből), hónaplista, elemzés mindhárom típusban"""
+    results = []
+
+    def record(benchmark, median_ms, min_ms, runs, **extra):
+        results.append({'benchmark': benchmark, 'median_ms': median_ms, 'min_ms': min_ms,
+                        'repeats': runs, 'peak_rss_mb': peak_rss_mb(), **extra})
+
+    # Hideg betöltés a CSV-kből (cache nélkül) - egyszer, a fázisonkénti bontással együtt
+    start = time.perf_counter()
+    analyzer = BookingAnalyzer(acv_file_path=acv_path, tcv_file_path=tcv_path, use_cache=False)
+    load_ms = (time.perf_counter() - start) * 1000
+    record('load_csv', load_ms, load_ms, 1)
+    for phase in analyzer.metrics.records('load'):
+        record(f"load_phase:{phase['phase']}", phase['wall_ms'], phase['wall_ms'], 1, rss_delta_mb=phase['rss_delta_mb'])
+
+    # Hideg betöltés deklarált sémával (oszlop szűkítés, rögzített dtype-ok, többszálú motor)
+    if schema is not None:
+        start = time.perf_counter()
+        BookingAnalyzer(acv_file_path=acv_path, tcv_file_path=tcv_path, use_cache=False, schema=schema)
+        load_ms = (time.perf_counter() - start) * 1000
+        record('load_csv_schema', load_ms, load_ms, 1)
+
+    # Hideg betöltés az Arrow backenddel (többszálú olvasás és aggregálás, nyers keretek nélkül)
+    if compute_backend.pa is not None:
+        start = time.perf_counter()
+        BookingAnalyzer(acv_file_path=acv_path, tcv_file_path=tcv_path, backend='arrow')
+        load_ms = (time.perf_counter() - start) * 1000
+        record('load_csv_arrow', load_ms, load_ms, 1)
+
+    # SQLite backend: adatbázis építése a CSV-kből, majd újraindítás (parse nélkül)
+    sqlite_backend = compute_backend.SqliteBackend()
+    for csv_path in (acv_path, tcv_path):
+        if os.path.exists(sqlite_backend.database_path(csv_path)):
+            os.remove(sqlite_backend.database_path(csv_path))
+    for benchmark in ('load_sqlite_build', 'load_sqlite_reuse'):
+        start = time.perf_counter()
+        BookingAnalyzer(acv_file_path=acv_path, tcv_file_path=tcv_path, backend=sqlite_backend)
+        load_ms = (time.perf_counter() - start) * 1000
+        record(benchmark, load_ms, load_ms, 1)
+
+    # Betöltés a lemezes cache-ből (az első példány menti, a második méri)
+    if data_cache.cache_available():
+        for cache_file in (data_cache.cache_path_for(acv_path), data_cache.cache_path_for(tcv_path)):
+            if os.path.exists(cache_file):
+                os.remove(cache_file)
+        BookingAnalyzer(acv_file_path=acv_path, tcv_file_path=tcv_path)
+        median_ms, min_ms = _time_calls(
+            lambda: BookingAnalyzer(acv_file_path=acv_path, tcv_file_path=tcv_path), min(repeats, 3))
+        record('load_cached', median_ms, min_ms, min(repeats, 3))
+
+    median_ms, min_ms = _time_calls(analyzer.get_available_months, repeats)
+    record('get_available_months', median_ms, min_ms, repeats)
+
+    # Mindhárom elemzési típus: történeti, aktuális hónap, jövőbeli predikció
+    current = analyzer.current_period
+    end_months = {
+        'historical': (current - 13).label,
+        'current_month_prediction': current.label,
+        'future_prediction': (current + 2).label,
+    }
+    architectures = analyzer.get_architectures()
+    filters = {'all': None, 'single': architectures[:1], 'multi': architectures[:3]}
+    def uncached_analysis(end_month, architecture):
+        analyzer.analysis_cache.clear()
+        return analyzer.get_rolling_analysis(end_month, architecture)
+
+    for analysis_type, end_month in end_months.items():
+        for filter_name, architecture in filters.items():
+            median_ms, min_ms = _time_calls(lambda: uncached_analysis(end_month, architecture), repeats)
+            record(f"get_rolling_analysis:{analysis_type}:{filter_name}", median_ms, min_ms, repeats)
+
+    # Memoizált elemzés (ismételt hívás ugyanarra a hónapra / szűrőre)
+    analyzer.get_rolling_analysis(end_months['historical'], None)
+    median_ms, min_ms = _time_calls(lambda: analyzer.get_rolling_analysis(end_months['historical'], None), repeats)
+    record('get_rolling_analysis:cached', median_ms, min_ms, repeats)
+
+    months = analyzer.get_available_months()
+    median_ms, min_ms = _time_calls(
+        lambda: analyzer.get_rolling_analysis_many(months, [None] + architectures), repeats)
+    record('get_rolling_analysis_many:all_months', median_ms, min_ms, repeats)
+    return results
+
+
+def run_suite(sizes, layouts, data_dir=DEFAULT_DATA_DIR, repeats=5, seed=0):
+    """Teljes benchmark: minden méret × layout kombináció"""
+    rows = []
+    for size in sizes:
+        for layout in layouts:
+            acv_path, tcv_path = prepare_dataset(data_dir, size, layout, seed)
+            logger.info("⏱️ Benchmark: %s sor, %s layout", size, layout)
+            schema = synthetic_data.dataset_schema(layout)
+            for result in benchmark_dataset(acv_path, tcv_path, repeats, schema):
+                rows.append({'rows': synthetic_data.parse_size(size), 'layout': layout, **result})
+    return rows
+
+
+def environment_info():
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_revision': _git_revision(),
+        'processing_version': BookingAnalyzer.PROCESSING_VERSION,
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def save_results(results_dir, environment, rows):
+    """Eredmények mentése: <results_dir>/<időbélyeg>_<commit>.json"""
+    os.makedirs(results_dir, exist_ok=True)
+    stamp = environment['timestamp'].replace(':', '').replace('-', '')
+    path = os.path.join(results_dir, f"{stamp}_{environment['git_revision'] or 'nogit'}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'environment': environment, 'results': rows}, f, ensure_ascii=False, indent=2)
+    return path
+
+
+def load_results(path):
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    return data['environment'], pd.DataFrame(data['results'])
+
+
+def compare_results(baseline, current):
+    """Két futás összevetése: medián idők és arányuk (current / baseline) mérésenként"""
+    keys = ['rows', 'layout', 'benchmark']
+    merged = baseline[keys + ['median_ms']].merge(current[keys + ['median_ms']], on=keys,
+                                                  suffixes=('_baseline', '_current'))
+    merged['ratio'] = merged['median_ms_current'] / merged['median_ms_baseline']
+    return merged
+
+
+def latest_results_file(results_dir, exclude=None):
+    files = sorted(path for path in glob.glob(os.path.join(results_dir, '*.json')) if path != exclude)
+    return files[-1] if files else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="BookingAnalyzer benchmark szintetikus adatokon")
+    parser.add_argument('--sizes', nargs='+', default=DEFAULT_SIZES, help="Sorszámok fájlonként (pl. 10k 1M 50M)")
+    parser.add_argument('--layouts', nargs='+', choices=synthetic_data.LAYOUTS, default=list(synthetic_data.LAYOUTS))
+    parser.add_argument('--repeats', type=int, default=5, help="Ismétlések száma a gyors méréseknél")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR, help="Generált adatkészletek helye (újrahasznosítva)")
+    parser.add_argument('--results-dir', default=DEFAULT_RESULTS_DIR, help="Eredmény JSON-ok helye")
+    parser.add_argument('--compare', default=None,
+                        help="Összevetés ezzel az eredmény fájllal (alapból a legutóbbi korábbi futás)")
+    args = parser.parse_args(argv)
+
+    # A benchmark saját kimenete INFO, az analyzer diagnosztikája csak figyelmeztetés szinten
+    configure_logging(quiet=True)
+    logger.setLevel('INFO')
+
+    environment = environment_info()
+    rows = run_suite(args.sizes, args.layouts, args.data_dir, args.repeats, args.seed)
+    path = save_results(args.results_dir, environment, rows)
+
+    current = pd.DataFrame(rows)
+    with pd.option_context('display.width', 200, 'display.max_rows', None):
+        print(current[['rows', 'layout', 'benchmark', 'median_ms', 'min_ms', 'peak_rss_mb']].round(2).to_string(index=False))
+        print(f"\n💾 Eredmények mentve: {path}")
+
+        baseline_path = args.compare or latest_results_file(args.results_dir, exclude=path)
+        if baseline_path:
+            baseline_environment, baseline = load_results(baseline_path)
+            print(f"\n📊 Összevetés: {baseline_path} (commit: {baseline_environment.get('git_revision')})")
+            print(compare_results(baseline, current).round(3).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
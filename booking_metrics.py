@@ -0,0 +1,76 @@
+MEASURES = ('value', 'count', 'column')
+
+
+class BookingMetric:
+    """Egy elemzett booking metrika: melyik forrás fájlból, milyen mértékkel, hogyan jelenjen meg.
+
+    measure:
+      'value'  - a forrás (automatikusan felismert vagy sémában megadott) érték oszlopának összege
+      'count'  - a booking sorok darabszáma
+      'column' - egy megnevezett oszlop összege (pl. Margin); csak akkor aktív, ha az oszlop létezik
+    """
+
+    def __init__(self, key, label, source, measure='value', column=None, currency='$', icon='📈'):
+        if measure not in MEASURES:
+            raise ValueError(f"❌ Ismeretlen metrika mérték: {measure} (választható: {', '.join(MEASURES)})")
+        if measure == 'column' and not column:
+            raise ValueError(f"❌ {key}: a 'column' mértékhez oszlopnév kell")
+        self.key = key
+        self.label = label
+        self.source = source
+        self.measure = measure
+        self.column = column
+        self.currency = currency
+        self.icon = icon
+
+    def describe(self):
+        """Megjelenítési leírás az eredmény dict-be (az app ez alapján rendereli a metrikákat)"""
+        return {'key': self.key, 'label': self.label, 'currency': self.currency, 'icon': self.icon}
+
+    def to_dict(self):
+        return {'key': self.key, 'source': self.source, 'measure': self.measure, 'column': self.column}
+
+
+class MetricRegistry:
+    """Regisztrált metrikák, regisztrációs sorrendben (ez a megjelenítési sorrend is)"""
+
+    def __init__(self, metrics=()):
+        self._metrics = {}
+        for metric in metrics:
+            self.register(metric)
+
+    def register(self, metric):
+        if metric.key in self._metrics:
+            raise ValueError(f"❌ A metrika már regisztrálva van: {metric.key}")
+        self._metrics[metric.key] = metric
+        return self
+
+    def __iter__(self):
+        return iter(self._metrics.values())
+
+    def __len__(self):
+        return len(self._metrics)
+
+    def __contains__(self, key):
+        return key in self._metrics
+
+    def get(self, key):
+        return self._metrics.get(key)
+
+    def for_source(self, source):
+        """Egy forrás fájl metrikái"""
+        return [metric for metric in self if metric.source == source]
+
+    def to_dict(self):
+        """A feldolgozást befolyásoló leírás (a lemezes cache kulcs része)"""
+        return [metric.to_dict() for metric in self]
+
+
+def default_registry():
+    """Alapértelmezett metrikák: ACV, TCV, booking darabszám és (ha az ACV-ben van Margin oszlop) margin"""
+    return MetricRegistry([
+        BookingMetric('acv', 'ACV', 'ACV', icon='💰'),
+        BookingMetric('tcv', 'TCV', 'TCV', icon='📊'),
+        BookingMetric('bookings', 'Bookings', 'ACV', measure='count', currency='', icon='🧾'),
+        BookingMetric('margin', 'Margin', 'ACV', measure='column', column='Margin', icon='📈'),
+    ])
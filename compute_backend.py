@@ -0,0 +1,416 @@
+import io
+import json
+import os
+import sqlite3
+import tempfile
+from contextlib import closing
+
+import numpy as np
+import pandas as pd
+
+import data_cache
+from drill_hierarchy import MISSING_LABEL
+from fiscal_period import FiscalPeriod, INVALID_PERIOD, current_period
+from log_config import get_logger
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+except ImportError:
+    # Az Arrow backend opcionális: pyarrow nélkül csak a beépített pandas feldolgozás érhető el
+    pa = None
+
+logger = get_logger(__name__)
+
+# A betöltési backend neve az apphoz és a parancssori eszközökhöz
+BACKEND_ENV = 'BOOKING_ANALYZER_BACKEND'
+
+# A beépített (pandas) feldolgozás neve - ehhez nem tartozik backend objektum
+DEFAULT_BACKEND = 'pandas'
+
+# A value oszlop tisztítás után ennek megfelelő stringeket fogad el számként (a többi 0)
+_NUMBER_PATTERN = r'^[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?$'
+
+# A pandas read_csv alapértelmezett hiányzó érték jelölései
+PANDAS_NULL_VALUES = ['', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+                      '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null']
+
+
+class ComputeBackend:
+    """Aggregáló betöltési backend interfész.
+
+    A backend egy forrás CSV-t (útvonal vagy fájl objektum) közvetlenül havi aggregátumokká
+    dolgoz fel; a nyers sorok nem kerülnek pandas keretbe. A havi kockák, a mapping és az
+    ablakösszegek ezután ugyanazok, mint a beépített feldolgozásnál.
+    """
+
+    name = None
+
+    def load_source(self, analyzer, name, source):
+        """Egy forrás feldolgozása: (aggregátumok, érték oszlop, utolsó dátum, sorszám).
+
+        Az aggregátumok oszlopai: ArchitectureRaw, FiscalPeriod, Value, Count, a további
+        metrika oszlopok összegei és a forrás deal méret oszlopai (mint a MonthlyCube.aggregate_frame
+        kimenete); lebontási hierarchiánál a forrás szint oszlopai is (levél szintű aggregátum).
+        Érték oszlop nélkül az aggregátumok None.
+        """
+        raise NotImplementedError
+
+
+class ArrowBackend(ComputeBackend):
+    """PyArrow alapú backend: többszálú CSV olvasás és Arrow compute kernelek.
+
+    A fiscal hónap címkék és a szöveges dátumok különböző értékenként egyszer kerülnek
+    parse-olásra (dictionary encoding), a tisztítás és a groupby Arrow kernelekkel fut.
+    Az eredmény megegyezik a pandas feldolgozáséval (lebegőpontos összegzési sorrend erejéig).
+    """
+
+    name = 'arrow'
+
+    def __init__(self):
+        if pa is None:
+            raise ImportError("❌ Az Arrow backendhez pyarrow szükséges")
+
+    def load_source(self, analyzer, name, source):
+        table = self._read(analyzer, source)
+        n_rows = table.num_rows
+        if analyzer.schema is not None:
+            table = table.rename_columns(self._schema_names(analyzer.schema, table.column_names))
+
+        periods, dates = self._periods(table, name)
+        architectures = self._architectures(table, name)
+
+        # Az érték oszlop felismerése ugyanazon az egyenletes mintán, mint a pandas feldolgozásnál
+        sample_size = min(n_rows, analyzer.VALUE_DETECTION_SAMPLE_ROWS)
+        sample_rows = np.linspace(0, n_rows - 1, sample_size).astype(np.int64) if n_rows else []
+        value_column = analyzer._find_value_column(table.take(sample_rows).to_pandas(), name)
+        if value_column is None:
+            return None, None, None, n_rows
+
+        extra_columns = analyzer._metric_columns(name, table.column_names, value_column)
+        levels = analyzer._hierarchy_levels(table.column_names)
+        valid = pc.not_equal(periods, INVALID_PERIOD)
+        frame = pa.table({
+            'ArchitectureRaw': architectures,
+            **{level: self._level_labels(table[level]) for level in levels},
+            'FiscalPeriod': periods,
+            **{column: self._clean_values(table[column]) for column in [value_column] + extra_columns},
+        }).filter(valid)
+        size_columns = []
+        size_grid = analyzer._size_grid_for(name)
+        if size_grid is not None:
+            sizes = size_grid.indicator_columns(frame[value_column].to_numpy(zero_copy_only=False))
+            for column, values in sizes.items():
+                frame = frame.append_column(column, pa.array(values))
+            size_columns = list(sizes)
+        grouped = frame.group_by(['ArchitectureRaw', *levels, 'FiscalPeriod']).aggregate(
+            [(value_column, 'sum'), (value_column, 'count', pc.CountOptions(mode='all'))]
+            + [(column, 'sum') for column in [*extra_columns, *size_columns]])
+        aggregates = grouped.to_pandas().rename(columns={
+            f'{value_column}_sum': 'Value', f'{value_column}_count': 'Count',
+            **{f'{column}_sum': column for column in [*extra_columns, *size_columns]},
+        })
+
+        last_date = pc.max(dates).as_py() if dates is not None else None
+        last_date = pd.Timestamp(last_date) if last_date is not None else None
+        return aggregates, value_column, last_date, n_rows
+
+    @staticmethod
+    def _read(analyzer, source):
+        """CSV beolvasása többszálú Arrow olvasóval (séma esetén csak a szükséges oszlopok)"""
+        # Az üres és NA jelölésű mezők hiányzó értékek, mint a pandas read_csv-nél
+        options = {'strings_can_be_null': True, 'null_values': PANDAS_NULL_VALUES}
+        if analyzer.schema is not None:
+            options['include_columns'] = analyzer._schema_read_options(source)['usecols']
+        convert_options = pa_csv.ConvertOptions(**options)
+        if isinstance(source, str):
+            if analyzer.memory_map:
+                return pa_csv.read_csv(pa.memory_map(source), convert_options=convert_options)
+            return pa_csv.read_csv(source, convert_options=convert_options)
+        # Feltöltött fájl: a pozíciót a végén visszaállítjuk (újraolvasáshoz)
+        position = source.tell()
+        table = pa_csv.read_csv(source, convert_options=convert_options)
+        source.seek(position)
+        return table
+
+    @staticmethod
+    def _schema_names(schema, names):
+        """A séma szerinti átnevezés az Arrow tábla oszlopaira (mint CsvSchema.rename_columns)"""
+        renamed = schema.rename_columns(pd.DataFrame(columns=names))
+        return list(renamed.columns)
+
+    def _periods(self, table, name):
+        """FiscalPeriod (int32) és a dátum tömb - a pandas _process_date_column logikájával"""
+        names = table.column_names
+        if 'FISCAL_MONTH_NAME' in names:
+            periods = self._periods_from_labels(table['FISCAL_MONTH_NAME'])
+            # A dátum a period hónapjának első napja, így a legutolsó dátum a legnagyobb period-ból adódik
+            latest = pc.max(periods).as_py()
+            dates = pa.array([FiscalPeriod(latest).to_date()] if latest is not None else [], pa.timestamp('ns'))
+            return periods, dates
+
+        if 'Date' in names:
+            column = 'Date'
+        else:
+            candidates = [col for col in names if 'date' in col.lower() or 'datum' in col.lower() or 'time' in col.lower()]
+            if not candidates:
+                logger.warning("⚠️ %s dátum oszlop nem található!", name)
+                return pa.array(np.full(table.num_rows, INVALID_PERIOD, dtype=np.int32)), None
+            column = candidates[0]
+            logger.info("🗓️ %s dátum oszlop: %s", name, column)
+
+        dates = self._to_timestamps(table[column].combine_chunks())
+        periods = pc.add(pc.multiply(pc.year(dates), 12), pc.subtract(pc.month(dates), 1))
+        periods = pc.cast(pc.fill_null(periods, INVALID_PERIOD), pa.int32())
+        return periods, dates
+
+    @staticmethod
+    def _to_timestamps(values):
+        """Dátum oszlop timestamp tömbbé; szöveges dátumok különböző értékenként pandas-szal parse-olva"""
+        if pa.types.is_timestamp(values.type) or pa.types.is_date(values.type):
+            return pc.cast(values, pa.timestamp('ns'))
+        encoded = pc.dictionary_encode(pc.cast(values, pa.string()))
+        parsed = pd.to_datetime(encoded.dictionary.to_pandas())
+        return pc.take(pa.array(parsed, pa.timestamp('ns')), encoded.indices)
+
+    @staticmethod
+    def _periods_from_labels(labels):
+        """Fiscal month címkék period-dá: különböző címkénként egyszer (hibás / hiányzó -> aktuális hónap)"""
+        fallback = current_period()
+        encoded = pc.dictionary_encode(pc.cast(labels.combine_chunks(), pa.string()))
+        lookup = np.empty(len(encoded.dictionary), dtype=np.int32)
+        for i, label in enumerate(encoded.dictionary.to_pylist()):
+            try:
+                lookup[i] = FiscalPeriod.from_label(label)
+            except ValueError as e:
+                logger.error("Dátum konverziós hiba: %s -> %s", label, e)
+                lookup[i] = fallback
+        periods = pc.take(pa.array(lookup), encoded.indices)
+        return pc.fill_null(periods, int(fallback))
+
+    @staticmethod
+    def _architectures(table, name):
+        """Architecture oszlop (vagy az első 'arch' nevű oszlop, végső esetben 'Unknown') string tömbként"""
+        names = table.column_names
+        if 'Architecture' in names:
+            column = 'Architecture'
+        else:
+            candidates = [col for col in names if 'arch' in col.lower()]
+            if not candidates:
+                logger.warning("⚠️ %s architektúra oszlop nem található, 'Unknown' használata", name)
+                return pa.array(['Unknown'] * table.num_rows, pa.string())
+            column = candidates[0]
+            logger.info("🏗️ %s architektúra oszlop: %s -> Architecture", name, column)
+        return pc.cast(table[column].combine_chunks(), pa.string())
+
+    @staticmethod
+    def _level_labels(values):
+        """Hierarchia szint oszlop string címkékre, a hiányzó érték MISSING_LABEL (mint a pandas feldolgozásnál)"""
+        return pc.fill_null(pc.cast(values.combine_chunks(), pa.string()), MISSING_LABEL)
+
+    @staticmethod
+    def _clean_values(values):
+        """Érték oszlop float64-re: mint a pandas _clean_value_column ($, vessző, szóköz eltávolítása)"""
+        values = values.combine_chunks()
+        if pa.types.is_integer(values.type) or pa.types.is_floating(values.type):
+            # Numerikus oszlopnál a hiányzó érték az összegben 0-nak számít
+            return pc.fill_null(pc.cast(values, pa.float64()), 0.0)
+        text = pc.fill_null(pc.cast(values, pa.string()), 'nan')
+        for character in ('$', ',', ' '):
+            text = pc.replace_substring(text, character, '')
+        numeric = pc.match_substring_regex(text, _NUMBER_PATTERN)
+        return pc.cast(pc.if_else(numeric, text, '0'), pa.float64())
+
+
+class SqliteBackend(ComputeBackend):
+    """Beágyazott SQLite backend: a CSV havi részösszegei egy adatbázis fájlba kerülnek (ACV.csv -> ACV.csv.sqlite).
+
+    A betöltés darabonként történik, így a nyers adat sosem kerül teljes egészében memóriába.
+    Darabonként csak havi részaggregátumok (hierarchiánál a lebontási szintek szerint is) tárolódnak -
+    az elemzések a kockákból dolgoznak, nyers sor táblára nincs szükség -, a havi aggregátumokat ezekből
+    egy kis SQL GROUP BY adja. Újraindításkor, ha a CSV már feldolgozott része nem változott, nincs
+    újra-parse-olás: csak a közben hozzáfűzött sorok kerülnek be. Feltöltött fájlnál ideiglenes adatbázis készül.
+    A memory_map beállítás a teljes építés darabonkénti olvasására érvényes (a BookingAnalyzer._read_csv-n
+    keresztül); a hozzáfűzött rész egyetlen olvasással, memóriából parse-olódik.
+    """
+
+    name = 'sqlite'
+
+    SQLITE_SUFFIX = '.sqlite'
+
+    def __init__(self, directory=None, chunksize=200_000):
+        self.directory = directory
+        self.chunksize = chunksize
+
+    def database_path(self, csv_path):
+        """A CSV-hez tartozó adatbázis fájl (alapból a CSV mellett)"""
+        path = f"{csv_path}{self.SQLITE_SUFFIX}"
+        if self.directory is not None:
+            path = os.path.join(self.directory, os.path.basename(path))
+        return path
+
+    def load_source(self, analyzer, name, source):
+        if isinstance(source, str):
+            database, temporary = self.database_path(source), False
+        else:
+            handle, database = tempfile.mkstemp(suffix=self.SQLITE_SUFFIX)
+            os.close(handle)
+            temporary = True
+        try:
+            with closing(sqlite3.connect(database)) as conn:
+                state = self._sync(analyzer, name, source, conn)
+                aggregates = self._aggregates(analyzer, name, conn, state) if state['value_column'] is not None else None
+        finally:
+            if temporary:
+                os.remove(database)
+
+        last_date = pd.Timestamp(state['last_date']) if state['last_date'] else None
+        return aggregates, state['value_column'], last_date, state['rows']
+
+    def _sync(self, analyzer, name, source, conn):
+        """Az adatbázis összhangba hozása a CSV-vel: újrahasznosítás, hozzáfűzés vagy teljes építés"""
+        # Az adatbázis a CSV-ből bármikor újraépíthető: journal és fsync nélkül írunk
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        # Korábbi verziók (nem használt) nyers sor táblája az indexeivel együtt
+        conn.execute("DROP TABLE IF EXISTS bookings")
+        state = self._read_state(conn)
+        if isinstance(source, str) and state is not None and state['signature'] == analyzer.processing_signature():
+            status, digest = analyzer._check_source({'path': source, **state})
+            if status == 'appended':
+                with open(source, 'rb') as f:
+                    f.seek(state['offset'])
+                    segment = f.read()
+                # A félig kiírt utolsó sort a következő betöltésre hagyjuk (mint a BookingAnalyzer._append_new_rows)
+                end = segment.rfind(b'\n') + 1
+                if end > 0:
+                    digest.update(segment[:end])
+                    chunks = analyzer._read_csv(io.BytesIO(segment[:end]), header=None, names=state['columns'],
+                                                chunksize=self.chunksize)
+                    before = state['rows']
+                    self._ingest(analyzer, name, conn, chunks, state, source, state['offset'] + end, digest.hexdigest())
+                    logger.info("🗄️ %s adatbázis: %s hozzáfűzött sor", name, state['rows'] - before)
+                return state
+            if status == 'unchanged':
+                logger.info("🗄️ %s adatbázis újrahasznosítva (%s sor, CSV parse nélkül)", name, state['rows'])
+                return state
+            # 'changed': a feldolgozott rész megváltozott, vagy nem sorvéggel zárult (félig kiírt sor) - újraépítés
+
+        logger.info("🗄️ %s adatbázis építése CSV-ből", name)
+        for table in ('monthly', 'ingest_state'):
+            conn.execute(f"DROP TABLE IF EXISTS {table}")
+        state = {
+            'signature': analyzer.processing_signature(), 'offset': 0, 'checksum': None,
+            'columns': analyzer._csv_header(source) if isinstance(source, str) else None,
+            'value_column': None, 'extra_columns': [], 'levels': [], 'last_date': None, 'rows': 0,
+        }
+        size = os.path.getsize(source) if isinstance(source, str) else None
+        self._ingest(analyzer, name, conn, analyzer._read_csv(source, chunksize=self.chunksize), state, source, size)
+        return state
+
+    def _ingest(self, analyzer, name, conn, chunks, state, source, offset, checksum=None):
+        """Darabok feldolgozása és beszúrása egyetlen tranzakcióban, majd az állapot rögzítése
+        (offset: a feldolgozott bájtok száma, checksum: ennek a prefixnek a már ismert hash-e)"""
+        with conn:
+            for chunk in chunks:
+                analyzer._process_date_column(chunk, name)
+                analyzer._process_architecture_column(chunk, name)
+                if state['value_column'] is None:
+                    # Az érték oszlopot (és a metrika oszlopokat) az első darab alapján azonosítjuk
+                    state['value_column'] = analyzer._find_value_column(chunk, name)
+                    if state['value_column'] is None:
+                        break
+                    state['extra_columns'] = analyzer._metric_columns(name, chunk.columns, state['value_column'])
+                    state['levels'] = analyzer._hierarchy_levels(chunk.columns)
+                    self._create_tables(conn, len(state['extra_columns']), self._size_columns(analyzer, name),
+                                        len(state['levels']))
+                analyzer._prepare_rows(chunk, state['value_column'], state['extra_columns'])
+                partial = analyzer.aggregate_rows(chunk, state['value_column'], state['extra_columns'],
+                                                  analyzer._size_grid_for(name), state['levels'])
+                self._insert_partial(conn, partial, [*state['extra_columns'], *self._size_columns(analyzer, name)],
+                                     state['levels'])
+                state['rows'] += len(chunk)
+
+                chunk_last_date = chunk['Date'].max()
+                if pd.notna(chunk_last_date) and (state['last_date'] is None
+                                                  or chunk_last_date > pd.Timestamp(state['last_date'])):
+                    state['last_date'] = chunk_last_date.isoformat()
+
+            if offset is not None:
+                state['offset'] = offset
+                state['checksum'] = checksum or data_cache.prefix_checksum(source, offset)
+            conn.execute("CREATE TABLE IF NOT EXISTS ingest_state (state TEXT)")
+            conn.execute("DELETE FROM ingest_state")
+            conn.execute("INSERT INTO ingest_state VALUES (?)", (json.dumps(state),))
+
+    @staticmethod
+    def _size_columns(analyzer, name):
+        """A forrás deal méret oszlopai (összeg, darabszám párok), ha a forrást méret szerint is összesítjük"""
+        size_grid = analyzer._size_grid_for(name)
+        return [column for pair in size_grid.columns for column in pair] if size_grid is not None else []
+
+    @staticmethod
+    def _create_tables(conn, n_extra, size_columns=(), n_levels=0):
+        """A havi részaggregátumok táblája (architektúra, hierarchia szintek, period, érték, darabszám,
+        metrika és deal méret oszlopok)"""
+        extra_definitions = ''.join(f", extra_{i} REAL" for i in range(n_extra))
+        size_definitions = ''.join(f", size_{i} REAL" for i in range(len(size_columns)))
+        level_definitions = ''.join(f"level_{i} TEXT, " for i in range(n_levels))
+        conn.execute("DROP TABLE IF EXISTS monthly")
+        conn.execute(f"CREATE TABLE monthly (architecture TEXT, {level_definitions}period INTEGER, value REAL, "
+                     f"count INTEGER{extra_definitions}{size_definitions})")
+
+    @staticmethod
+    def _insert_partial(conn, partial, extra_columns, levels=()):
+        architectures = partial['ArchitectureRaw'].astype(object)
+        architectures = architectures.where(architectures.notna(), None).tolist()
+        columns = [architectures, *(partial[level].astype(str).tolist() for level in levels),
+                   partial['FiscalPeriod'].astype(np.int64).tolist(), partial['Value'].tolist(),
+                   partial['Count'].astype(np.int64).tolist()]
+        columns += [partial[column].tolist() for column in extra_columns]
+        placeholders = ', '.join('?' * len(columns))
+        conn.executemany(f"INSERT INTO monthly VALUES ({placeholders})", zip(*columns))
+
+    @staticmethod
+    def _read_state(conn):
+        try:
+            row = conn.execute("SELECT state FROM ingest_state").fetchone()
+        except sqlite3.OperationalError:
+            return None
+        return json.loads(row[0]) if row else None
+
+    def _aggregates(self, analyzer, name, conn, state):
+        """Havi aggregátumok SQL-lel: a részaggregátumok (architektúra, period) szerinti összegei"""
+        extra_columns = state['extra_columns']
+        size_columns = self._size_columns(analyzer, name)
+        levels = state.get('levels', [])
+        # TOTAL: csak NULL értékek esetén is 0 (mint a pandas sum)
+        extra_sums = ''.join(f", TOTAL(extra_{i})" for i in range(len(extra_columns)))
+        size_sums = ''.join(f", TOTAL(size_{i})" for i in range(len(size_columns)))
+        # Hierarchiánál a levél szintű (architektúra, szintek, period) aggregátumok
+        level_keys = ''.join(f"level_{i}, " for i in range(len(levels)))
+        query = (f"SELECT architecture, {level_keys}period, TOTAL(value), SUM(count){extra_sums}{size_sums} FROM monthly "
+                 f"GROUP BY architecture, {level_keys}period")
+        return pd.DataFrame(conn.execute(query).fetchall(),
+                            columns=['ArchitectureRaw', *levels, 'FiscalPeriod', 'Value', 'Count', *extra_columns,
+                                     *size_columns])
+
+
+BACKENDS = {ArrowBackend.name: ArrowBackend, SqliteBackend.name: SqliteBackend}
+
+
+def get_backend(backend):
+    """Backend objektum név vagy példány alapján (None / 'pandas' -> beépített feldolgozás, None)"""
+    if backend is None or isinstance(backend, ComputeBackend):
+        return backend
+    if backend == DEFAULT_BACKEND:
+        return None
+    if backend not in BACKENDS:
+        raise ValueError(f"❌ Ismeretlen backend: {backend} (választható: {', '.join([DEFAULT_BACKEND, *BACKENDS])})")
+    return BACKENDS[backend]()
+
+
+def backend_from_env():
+    """A BOOKING_ANALYZER_BACKEND-ben megadott backend neve (None, ha nincs beállítva)"""
+    return os.environ.get(BACKEND_ENV) or None
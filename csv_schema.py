@@ -0,0 +1,119 @@
+import json
+import os
+
+try:
+    import pyarrow
+except ImportError:
+    # A többszálú CSV motor opcionális: pyarrow nélkül a pandas C motorja olvas
+    pyarrow = None
+
+# JSON séma fájl útvonala az apphoz és a parancssori eszközökhöz
+SCHEMA_ENV = 'BOOKING_ANALYZER_SCHEMA'
+
+# A feldolgozás ezeket az oszlopneveket várja
+FISCAL_MONTH_COLUMN = 'FISCAL_MONTH_NAME'
+DATE_COLUMN = 'Date'
+ARCHITECTURE_COLUMN = 'Architecture'
+
+
+def multithreaded_engine():
+    """Többszálú read_csv motor, ha elérhető ('pyarrow'), egyébként a C motor"""
+    return 'pyarrow' if pyarrow is not None else 'c'
+
+
+class CsvSchema:
+    """Az ACV/TCV CSV-k deklarált szerkezete: hónap / dátum, architektúra és érték oszlop, dtype-ok.
+
+    Séma megadásakor csak ezek az oszlopok kerülnek beolvasásra, rögzített dtype-okkal,
+    és elmarad az érték oszlop keresése. Pontosan az egyik kell: fiscal_month_column
+    ('Jul FY2025' címkék) vagy date_column (dátumok). A metric_columns a további
+    (pl. Margin) metrikák oszlopai, amelyeket szintén be kell olvasni.
+    """
+
+    def __init__(self, value_column, architecture_column=ARCHITECTURE_COLUMN, fiscal_month_column=None,
+                 date_column=None, dtypes=None, metric_columns=()):
+        if (fiscal_month_column is None) == (date_column is None):
+            raise ValueError("❌ A sémában pontosan egy kell: fiscal_month_column vagy date_column")
+        self.value_column = value_column
+        self.architecture_column = architecture_column
+        self.fiscal_month_column = fiscal_month_column
+        self.date_column = date_column
+        self.metric_columns = list(metric_columns)
+        # Alapértelmezés: az érték string ($, vessző formázás miatt), az architektúra categorical;
+        # a dátum oszlop már beolvasáskor datetime lesz (lásd read_options)
+        defaults = {value_column: str, architecture_column: 'category'}
+        defaults.update({column: str for column in self.metric_columns})
+        if fiscal_month_column is not None:
+            defaults[fiscal_month_column] = str
+        self.dtypes = {**defaults, **(dtypes or {})}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+    @classmethod
+    def load(cls, path):
+        """Séma betöltése JSON fájlból (kulcsok: mint a konstruktor paraméterei)"""
+        with open(path, encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+    def to_dict(self):
+        """JSON-kompatibilis leírás (a lemezes cache kulcs része is)"""
+        return {
+            'value_column': self.value_column,
+            'architecture_column': self.architecture_column,
+            'fiscal_month_column': self.fiscal_month_column,
+            'date_column': self.date_column,
+            'metric_columns': self.metric_columns,
+            'dtypes': {column: dtype if isinstance(dtype, str) else dtype.__name__
+                       for column, dtype in self.dtypes.items()},
+        }
+
+    @property
+    def columns(self):
+        """A beolvasandó CSV oszlopok"""
+        return list(dict.fromkeys([self.fiscal_month_column or self.date_column,
+                                   self.architecture_column, self.value_column, *self.metric_columns]))
+
+    def read_options(self, engine=None, header=None, extra_columns=()):
+        """read_csv paraméterek: oszlop szűkítés, rögzített dtype-ok és (opcionálisan) motor.
+
+        A metrika oszlopok opcionálisak: a fejléc (header) ismeretében a hiányzókat kihagyjuk
+        (pl. a Margin csak az ACV fájlban van). Az extra_columns további opcionális oszlopok
+        (pl. a lebontási hierarchia szintjei) kikövetkeztetett típussal; ezekhez a fejléc is kell.
+        """
+        optional = [*self.metric_columns, *extra_columns]
+        columns = list(dict.fromkeys([*self.columns, *extra_columns]))
+        if header is not None:
+            columns = [column for column in columns if column not in optional or column in header]
+        dtypes = {column: dtype for column, dtype in self.dtypes.items() if column in columns}
+        options = {'usecols': columns, 'dtype': dtypes}
+        if self.date_column is not None and self.date_column not in dtypes:
+            # A pyarrow motor a dtype-pal natívan parse-ol (a parse_dates-nél jóval gyorsabb),
+            # a C motor csak parse_dates-szel fogad datetime oszlopot
+            if engine == 'pyarrow':
+                dtypes[self.date_column] = 'datetime64[ns]'
+            else:
+                options['parse_dates'] = [self.date_column]
+        if engine is not None:
+            options['engine'] = engine
+        return options
+
+    def rename_columns(self, df):
+        """A sémában megadott oszlopok átnevezése a feldolgozás által várt nevekre (helyben)"""
+        period_column = FISCAL_MONTH_COLUMN if self.fiscal_month_column else DATE_COLUMN
+        renames = {
+            self.fiscal_month_column or self.date_column: period_column,
+            self.architecture_column: ARCHITECTURE_COLUMN,
+        }
+        renames = {source: target for source, target in renames.items()
+                   if source != target and source != self.value_column}
+        if renames:
+            df.rename(columns=renames, inplace=True)
+        return df
+
+
+def schema_from_env():
+    """A BOOKING_ANALYZER_SCHEMA-ban megadott JSON séma (None, ha nincs beállítva)"""
+    path = os.environ.get(SCHEMA_ENV)
+    return CsvSchema.load(path) if path else None
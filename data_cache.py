@@ -0,0 +1,97 @@
+import hashlib
+import json
+import os
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:
+    # A cache opcionális: pyarrow nélkül minden indításkor a CSV-kből dolgozunk
+    pa = None
+    feather = None
+
+# A feldolgozott keret a CSV mellé kerül: ACV.csv -> ACV.csv.cache.arrow
+CACHE_SUFFIX = '.cache.arrow'
+METADATA_KEY = b'booking_analyzer_cache'
+
+
+def cache_available():
+    """Elérhető-e a columnar cache (pyarrow telepítve van-e)"""
+    return pa is not None
+
+
+def cache_path_for(csv_path):
+    """A CSV-hez tartozó cache fájl útvonala"""
+    return f"{csv_path}{CACHE_SUFFIX}"
+
+
+def file_content_fingerprint(path, chunk_size=8 * 1024 * 1024):
+    """Fájl tartalom ujjlenyomata: méret + SHA-1 hash (darabonként olvasva)"""
+    digest = hashlib.sha1()
+    size = 0
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+            size += len(chunk)
+    return f"{size}:{digest.hexdigest()}"
+
+
+def save_processed_frame(cache_path, df, metadata):
+    """Feldolgozott DataFrame mentése Arrow IPC (Feather) fájlba, a metadata a sémában utazik.
+
+    Atomikus csere: ideiglenes fájlba írunk, majd os.replace.
+    """
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    schema_metadata = dict(table.schema.metadata or {})
+    schema_metadata[METADATA_KEY] = json.dumps(metadata).encode('utf-8')
+    table = table.replace_schema_metadata(schema_metadata)
+
+    tmp_path = f"{cache_path}.tmp"
+    feather.write_feather(table, tmp_path)
+    os.replace(tmp_path, cache_path)
+
+
+def load_processed_frame(cache_path, cache_key):
+    """Cache-elt DataFrame és metadata betöltése - None, ha nincs cache vagy a kulcs nem egyezik"""
+    if not os.path.exists(cache_path):
+        return None
+
+    table = feather.read_table(cache_path, memory_map=True)
+    raw_metadata = (table.schema.metadata or {}).get(METADATA_KEY)
+    if raw_metadata is None:
+        return None
+
+    metadata = json.loads(raw_metadata)
+    if metadata.get('cache_key') != cache_key:
+        return None
+    return table.to_pandas(), metadata
+
+
+def prefix_hash(path, offset, chunk_size=8 * 1024 * 1024):
+    """A fájl [0, offset) prefixének SHA-1 hash objektuma (darabonként olvasva).
+
+    A visszaadott objektum a hozzáfűzött bájtokkal tovább bővíthető (update), így hozzáfűzés után
+    az új prefix ellenőrzőösszege a már ellenőrzött rész újraolvasása nélkül számolható.
+    """
+    digest = hashlib.sha1()
+    remaining = offset
+    with open(path, 'rb') as f:
+        while remaining > 0:
+            chunk = f.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            digest.update(chunk)
+            remaining -= len(chunk)
+    return digest
+
+
+def prefix_checksum(path, offset, chunk_size=8 * 1024 * 1024):
+    """A fájl [0, offset) prefixének ellenőrzőösszege: a teljes prefix SHA-1-e.
+
+    Append-only fájloknál ez jelzi, ha a már feldolgozott rész bárhol megváltozott (átírás,
+    csonkolás). Teljes fájlra (offset = méret) megegyezik a file_content_fingerprint hash részével.
+    """
+    return prefix_hash(path, offset, chunk_size).hexdigest()
@@ -2,787 +2,1744 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import calendar
+import copy
 import io
+import logging
 import os # Hozzáadva a fájl dátumának lekéréséhez
+import data_cache
+from pandas.api.types import union_categoricals
+from fiscal_period import (FiscalPeriod, INVALID_PERIOD, periods_from_labels, periods_from_dates,
+                           period_labels, period_dates)
+from log_config import get_logger
+from perf_metrics import PerfMetrics, measured
+from analysis_cache import AnalysisCache, next_data_version, normalize_architectures
+from csv_schema import multithreaded_engine
+from index_grid import IndexGrid
+from booking_metrics import default_registry
+from deal_sizes import DealSizeGrid
+from drill_hierarchy import RollupCube, normalize_level_column
+from compute_backend import get_backend
+
+logger = get_logger(__name__)
+
+# Kompakt keret mód az apphoz és a parancssori eszközökhöz ('1' / 'true' / 'float32')
+COMPACT_ENV = 'BOOKING_ANALYZER_COMPACT'
+
+# Kompakt módban az érték oszlopok választható dtype-jai
+COMPACT_VALUE_DTYPES = {'float64': np.float64, 'float32': np.float32}
+
+class MonthlyCube:
+    """Architektúra × fiscal period kocka egy metrikához, prefix összegekkel.
+
+    Betöltéskor egyszer épül fel a nyers (mapping előtti) architektúrák szerint.
+    A mapping csak a nyers sorok újraösszegzése (apply_mapping), így egy csoportosítás
+    módosítása nem igényli a CSV-k újrafeldolgozását. Bármely [start, end] ablak
+    összege architektúránként két oszlop kiolvasása a kumulált tömbökből.
+    """
+
+    def __init__(self, df, value_column, architecture_mapping=None):
+        self.raw_architectures = []
+        self.start_ordinal = 0
+        self.n_months = 0
+        self.last_date = None
+        # Nyers havi tömbök: (nyers architektúrák + 1 NaN sor) × hónapok
+        self.raw_values = np.zeros((1, 0))
+        self.raw_counts = np.zeros((1, 0), dtype=np.int64)
+
+        if not df.empty and value_column is not None and value_column in df.columns:
+            self._build(df, value_column)
+
+        self.apply_mapping(architecture_mapping or {})
+
+    def _build(self, df, value_column):
+        raw = df['ArchitectureRaw']
+        self.raw_architectures = list(raw.cat.categories)
+        self.last_date = df['Date'].max() if df['Date'].notna().any() else None
+
+        valid = (df['FiscalPeriod'] != INVALID_PERIOD).to_numpy()
+        self._accumulate(
+            raw.cat.codes.to_numpy(dtype=np.int64)[valid],
+            df['FiscalPeriod'].to_numpy(dtype=np.int64)[valid],
+            df[value_column].to_numpy(dtype=np.float64)[valid],
+        )
+
+    def _accumulate(self, arch_codes, ordinals, values, counts=None):
+        """Nyers havi tömbök feltöltése (architektúra kód, period, érték[, darabszám]) hármasokból"""
+        nan_row = len(self.raw_architectures)
+        if len(ordinals) == 0:
+            self.raw_values = np.zeros((nan_row + 1, 0))
+            self.raw_counts = np.zeros((nan_row + 1, 0), dtype=np.int64)
+            return
+
+        values = np.nan_to_num(values, nan=0.0)
+        # A hiányzó (NaN) architektúra külön utolsó sorba kerül, ami csak az 'Összes' értékbe számít
+        arch_codes = np.where(arch_codes < 0, nan_row, arch_codes)
+
+        self.start_ordinal = int(ordinals.min())
+        self.n_months = int(ordinals.max()) - self.start_ordinal + 1
+
+        flat_index = arch_codes * self.n_months + (ordinals - self.start_ordinal)
+        size = (nan_row + 1) * self.n_months
+        self.raw_values = np.bincount(flat_index, weights=values, minlength=size).reshape(nan_row + 1, self.n_months)
+        if counts is None:
+            self.raw_counts = np.bincount(flat_index, minlength=size)
+        else:
+            self.raw_counts = np.bincount(flat_index, weights=counts, minlength=size).astype(np.int64)
+        self.raw_counts = self.raw_counts.reshape(nan_row + 1, self.n_months)
+
+    @staticmethod
+    def aggregate_frame(df, value_column, extra_columns=(), size_grid=None, group_columns=()):
+        """Egy (rész)keret összesítése (nyers architektúra, period) szerint egyetlen groupby-jal:
+        Value összeg, Count darabszám, a további metrika oszlopok összegei és (size_grid
+        megadásakor) a deal méret kategóriánkénti összegek / darabszámok.
+
+        group_columns: további csoportosító oszlopok az architektúra és a period között
+        (a lebontási hierarchia szintjei) - ilyenkor az eredmény a levél szintű aggregátum.
+        """
+        # Csak a szükséges oszlopokat szűrjük (a teljes keret másolása nélkül)
+        frame = df[list(dict.fromkeys(['ArchitectureRaw', *group_columns, 'FiscalPeriod', value_column,
+                                       *extra_columns]))]
+        frame = frame[frame['FiscalPeriod'] != INVALID_PERIOD]
+        size_columns = []
+        if size_grid is not None:
+            sizes = size_grid.indicator_columns(frame[value_column].to_numpy(dtype=np.float64))
+            frame = frame.assign(**sizes)
+            size_columns = list(sizes)
+        return (frame
+                .groupby(['ArchitectureRaw', *group_columns, 'FiscalPeriod'], dropna=False, observed=True)
+                .agg(Value=(value_column, 'sum'), Count=(value_column, 'size'),
+                     **{column: (column, 'sum') for column in [*extra_columns, *size_columns]})
+                .reset_index())
+
+    @staticmethod
+    def combine_aggregates(partials, group_columns=()):
+        """Részaggregátumok összevonása egyetlen (nyers architektúra[, group_columns], period) táblába
+        (minden mérték összegezve); group_columns nélkül a hierarchia szintek is összegződnek (rollup)"""
+        combined = pd.concat(partials, ignore_index=True)
+        keys = ['ArchitectureRaw', *group_columns, 'FiscalPeriod']
+        measures = [column for column in combined.columns
+                    if column not in keys and pd.api.types.is_numeric_dtype(combined[column])]
+        return (combined
+                .groupby(keys, dropna=False, observed=True)[measures]
+                .sum()
+                .reset_index())
+
+    @classmethod
+    def from_aggregates(cls, aggregates, architecture_mapping=None, last_date=None):
+        """Kocka építése az aggregate_frame / combine_aggregates kimenetéből (streaming betöltéshez)"""
+        cube = cls.__new__(cls)
+        raw = pd.Categorical(aggregates['ArchitectureRaw'].astype(object))
+        cube.raw_architectures = list(raw.categories)
+        cube.start_ordinal = 0
+        cube.n_months = 0
+        cube.last_date = last_date
+        cube._accumulate(
+            raw.codes.astype(np.int64),
+            aggregates['FiscalPeriod'].to_numpy(dtype=np.int64),
+            aggregates['Value'].to_numpy(dtype=np.float64),
+            aggregates['Count'].to_numpy(dtype=np.float64),
+        )
+        cube.apply_mapping(architecture_mapping or {})
+        return cube
+
+    def to_aggregates(self):
+        """A nyers havi tömbök visszaalakítása (nyers architektúra, period) -> Value/Count táblává"""
+        rows, months = np.nonzero(self.raw_counts)
+        labels = np.array(self.raw_architectures + [np.nan], dtype=object)[rows]
+        return pd.DataFrame({
+            'ArchitectureRaw': labels,
+            'FiscalPeriod': months + self.start_ordinal,
+            'Value': self.raw_values[rows, months],
+            'Count': self.raw_counts[rows, months],
+        })
+
+    def active_periods(self):
+        """Azok a period-ok, amelyekben van legalább egy sor"""
+        has_rows = self.raw_counts.sum(axis=0) > 0
+        return np.flatnonzero(has_rows) + self.start_ordinal
+
+    def to_state(self):
+        """A nyers havi aggregátumok JSON-kompatibilis állapota (lemezes cache-hez)"""
+        return {
+            'raw_architectures': self.raw_architectures,
+            'start_ordinal': self.start_ordinal,
+            'n_months': self.n_months,
+            'last_date': self.last_date.isoformat() if self.last_date is not None else None,
+            'raw_values': self.raw_values.tolist(),
+            'raw_counts': self.raw_counts.tolist(),
+        }
+
+    @classmethod
+    def from_state(cls, state, architecture_mapping=None):
+        """Kocka visszaállítása a to_state() kimenetéből"""
+        cube = cls.__new__(cls)
+        cube.raw_architectures = list(state['raw_architectures'])
+        cube.start_ordinal = state['start_ordinal']
+        cube.n_months = state['n_months']
+        cube.last_date = pd.Timestamp(state['last_date']) if state['last_date'] else None
+        n_rows = len(cube.raw_architectures) + 1
+        cube.raw_values = np.array(state['raw_values'], dtype=np.float64).reshape(n_rows, cube.n_months)
+        cube.raw_counts = np.array(state['raw_counts'], dtype=np.int64).reshape(n_rows, cube.n_months)
+        cube.apply_mapping(architecture_mapping or {})
+        return cube
+
+    def apply_mapping(self, architecture_mapping):
+        """Nyers architektúra sorok újraösszegzése a mapping szerinti csoportokba és a prefix összegek frissítése"""
+        mapped_labels = [architecture_mapping.get(arch, arch) for arch in self.raw_architectures]
+        self.architectures = sorted(set(mapped_labels), key=str)
+        self._arch_index = {arch: i for i, arch in enumerate(self.architectures)}
+
+        # Nyers sor -> mapped sor; a NaN sor a mapped NaN sorba kerül
+        n_rows = len(self.architectures) + 1
+        groups = np.array([self._arch_index[label] for label in mapped_labels] + [n_rows - 1], dtype=np.int64)
+        monthly_values = np.zeros((n_rows, self.n_months))
+        monthly_counts = np.zeros((n_rows, self.n_months), dtype=np.int64)
+        np.add.at(monthly_values, groups, self.raw_values)
+        np.add.at(monthly_counts, groups, self.raw_counts)
+
+        # Prefix összegek egy vezető nulla oszloppal: ablak = cum[:, hi] - cum[:, lo]
+        self.cum_values = np.zeros((n_rows, self.n_months + 1))
+        self.cum_values[:, 1:] = np.cumsum(monthly_values, axis=1)
+        self.cum_counts = np.zeros((n_rows, self.n_months + 1), dtype=np.int64)
+        self.cum_counts[:, 1:] = np.cumsum(monthly_counts, axis=1)
+
+    def _rows_for(self, architecture):
+        """Kocka sorindexek az architektúra szűrőhöz (None = összes, a NaN sorral együtt)"""
+        if not architecture:
+            return np.arange(self.cum_values.shape[0])
+        selected = architecture if isinstance(architecture, list) else [architecture]
+        return np.array([self._arch_index[arch] for arch in selected if arch in self._arch_index], dtype=np.int64)
+
+    def windows(self, start_ordinals, end_ordinals):
+        """Sok [start, end] ablak egyszerre: (mapped sorok + NaN sor) × ablakok érték és darabszám mátrix"""
+        lo = np.clip(np.asarray(start_ordinals, dtype=np.int64) - self.start_ordinal, 0, self.n_months)
+        hi = np.clip(np.asarray(end_ordinals, dtype=np.int64) - self.start_ordinal + 1, 0, self.n_months)
+        hi = np.maximum(hi, lo)
+        return self.cum_values[:, hi] - self.cum_values[:, lo], self.cum_counts[:, hi] - self.cum_counts[:, lo]
+
+    def window(self, start_ordinal, end_ordinal, architecture=None):
+        """Összesítés architektúra szerint a [start_ordinal, end_ordinal] period-okra (zárt intervallum)"""
+        rows = self._rows_for(architecture)
+        if len(rows) == 0:
+            return {}
+        values, counts = self.windows([start_ordinal], [end_ordinal])
+        return self.window_dict(rows, values[rows, 0], counts[rows, 0])
+
+    def window_dict(self, rows, values, counts):
+        """Egy ablak sorainak (rows) értékei dict-ként: architektúra -> érték, plusz 'Összes'"""
+        if counts.sum() == 0:
+            return {}
+
+        aggregated = {
+            self.architectures[row]: value
+            for row, value, count in zip(rows, values, counts)
+            if row < len(self.architectures) and count > 0
+        }
+        aggregated['Összes'] = values.sum()
+        return aggregated
+
 
 class BookingAnalyzer:
     """ACV/TCV Booking Value Analyzer with Prediction Capability"""
+
+    # Növelni kell, ha a feldolgozás logikája változik (érvényteleníti a lemezes cache-t)
+    PROCESSING_VERSION = 6
+
+    # A betöltött forrás fájlok (a metrikák ezekből származnak)
+    SOURCES = ('ACV', 'TCV')
+
+    # Séma nélkül az érték oszlop felismerése ennyi (egyenletesen kiválasztott) soron fut
+    VALUE_DETECTION_SAMPLE_ROWS = 1000
+
+    # ALAPÉRTELMEZETT ARCHITEKTÚRA MAPPING (nyers név -> csoport)
+    DEFAULT_ARCHITECTURE_MAPPING = {
+        'ENTERPRISE NETWORKING': 'NETWORKING*',
+        'IOT': 'NETWORKING*',
+        'DATA CENTER GROUP': 'CLOUD & AI',
+        'SERVICES': 'SERVICES*',
+        'OTHER': 'SERVICES*',
+    }
     
-    def __init__(self, acv_file_path=None, tcv_file_path=None, acv_file_obj=None, tcv_file_obj=None):
-        """BookingAnalyzer inicializálása"""
-        print("BookingAnalyzer inicializálása...")
+    def __init__(self, acv_file_path=None, tcv_file_path=None, acv_file_obj=None, tcv_file_obj=None,
+                 architecture_mapping=None, use_cache=True, chunksize=None, metrics=None,
+                 analysis_cache=None, schema=None, index_grid=None, metric_registry=None, backend=None,
+                 compact=None, memory_map=False, deal_sizes=None, hierarchy=None):
+        """BookingAnalyzer inicializálása.
+
+        use_cache: lokális fájloknál a feldolgozott kereteket a CSV mellé menti
+        (Arrow IPC) és a következő indításkor onnan tölti be, ha a tartalom nem változott.
+        chunksize: ha meg van adva, streaming betöltés - a CSV-k ennyi soros darabokban
+        kerülnek feldolgozásra és csak a havi aggregátumok maradnak a memóriában
+        (acv_df / tcv_df ilyenkor None).
+        metrics: PerfMetrics példány a fázisonkénti idő / sorszám / memória méréshez
+        (alapból új; újraépítéskor a régi példány adja tovább).
+        analysis_cache: AnalysisCache az elemzési eredmények memoizálásához (alapból új;
+        a másolatok és az újraépített példány megosztják).
+        schema: opcionális CsvSchema - csak a megadott oszlopok beolvasása rögzített
+        dtype-okkal, teljes betöltésnél többszálú CSV motorral, érték oszlop keresés nélkül.
+        index_grid: IndexGrid a predikciós index szintekhez (alapból 0-10, ahol 10 = >9%).
+        metric_registry: MetricRegistry az elemzett metrikákkal (alapból ACV, TCV, booking
+        darabszám és margin); metrikánként egy havi kocka épül (metric_cubes).
+        backend: aggregáló betöltési backend neve vagy példánya (pl. 'arrow', lásd compute_backend);
+        alapból (None / 'pandas') a beépített pandas feldolgozás. Backenddel - a streaminghez
+        hasonlóan - csak a havi aggregátumok maradnak meg (acv_df / tcv_df None).
+        compact: kompakt nyers keretek (True / 'float64' vagy 'float32'): a kockák felépítése után
+        csak az elemzésekhez használt oszlopok maradnak, a címkék categoricalként, a dátum helyett
+        csak a kis egész period kód, az értékek float64-ként (vagy 'float32'-vel float32-ként).
+        Az oszloponkénti memória előtte / utána: memory_report().
+        memory_map: útvonalból olvasáskor a CSV memóriába képezve (mmap) kerül a parserhez,
+        külön olvasási puffer nélkül (pl. a lemezre írt feltöltéseknél).
+        deal_sizes: DealSizeGrid a deal-ek (sorok) T-shirt méret eloszlásához (alapból a TCV
+        XS-XL kategóriái); kategóriánként egy havi kocka épül (size_cubes).
+        hierarchy: DrillHierarchy az Architecture alatti lebontási szintekkel (pl. Sub-architecture,
+        Region, Customer); forrásonként egy rollup kocka épül (rollup_cubes), amiből a tábla
+        sorai betöltés utáni szkennelés nélkül bonthatók ki (get_drilldown). Alapból nincs lebontás.
+        """
+        logger.info("BookingAnalyzer inicializálása...")
+        # Az újratöltéshez (refresh) szükséges betöltési beállítások
+        self._load_options = {
+            'acv_file_path': acv_file_path, 'tcv_file_path': tcv_file_path,
+            'use_cache': use_cache, 'chunksize': chunksize, 'schema': schema, 'backend': backend,
+            'compact': compact, 'memory_map': memory_map,
+        }
+        self.schema = schema
+        self.memory_map = memory_map
+        self.compact_value_dtype = self._compact_value_dtype(compact)
+        # Kompaktáláskor: forrás -> oszloponkénti memória előtte / utána (lásd memory_report)
+        self._memory_before = {}
+        self.backend = get_backend(backend)
+        # Fájlonként: meddig dolgoztuk fel (byte offset) és a prefix ellenőrzőösszege
+        self._ingest_state = {}
+        self.metrics = metrics if metrics is not None else PerfMetrics()
+        self.analysis_cache = analysis_cache if analysis_cache is not None else AnalysisCache()
+        # Az elemzési cache kulcs része: minden adat / mapping változáskor új érték
+        self.data_version = next_data_version()
+        self.index_grid = index_grid if index_grid is not None else IndexGrid.default()
+        self.metric_registry = metric_registry if metric_registry is not None else default_registry()
+        self.deal_sizes = deal_sizes if deal_sizes is not None else DealSizeGrid.default()
+        # Metrika kulcs -> havi kocka (a regisztráció sorrendjében)
+        self.metric_cubes = {}
+        # Deal méret kategória -> havi kocka (érték: a kategória összege, darabszám: a deal-ek száma)
+        self.size_cubes = {}
+        self.hierarchy = hierarchy
+        # Forrás -> lebontási rollup kocka (csak hierarchia megadásakor)
+        self.rollup_cubes = {}
         try:
-            # ACV fájl betöltése
-            if acv_file_path:
-                self.acv_df = pd.read_csv(acv_file_path)
-                self.acv_file_creation_date = datetime.fromtimestamp(os.path.getmtime(acv_file_path)).strftime('%Y-%m-%d')
-                print(f"✅ ACV betöltve fájlból: {acv_file_path}")
-            elif acv_file_obj:
-                # Memóriában lévő fájl esetén nincs mód a creation date lekérésére, 
-                # ezért az aktuális dátumot használjuk fallbackként.
-                self.acv_df = pd.read_csv(acv_file_obj)
-                self.acv_file_creation_date = datetime.now().strftime('%Y-%m-%d') 
-                print("✅ ACV betöltve feltöltött fájlból")
-            else:
-                raise ValueError("❌ Nincs ACV fájl megadva")
-            
-            # TCV fájl betöltése
-            if tcv_file_path:
-                self.tcv_df = pd.read_csv(tcv_file_path)
-                self.tcv_file_creation_date = datetime.fromtimestamp(os.path.getmtime(tcv_file_path)).strftime('%Y-%m-%d')
-                print(f"✅ TCV betöltve fájlból: {tcv_file_path}")
-            elif tcv_file_obj:
-                # Memóriában lévő fájl esetén nincs mód a creation date lekérésére, 
-                # ezért az aktuális dátumot használjuk fallbackként.
-                self.tcv_df = pd.read_csv(tcv_file_obj)
-                self.tcv_file_creation_date = datetime.now().strftime('%Y-%m-%d')
-                print("✅ TCV betöltve feltöltött fájlból")
-            else:
-                raise ValueError("❌ Nincs TCV fájl megadva")
-            
-            # OSZLOPOK DIAGNOSZTIZÁLÁSA
-            print(f"📊 ACV oszlopok: {list(self.acv_df.columns)}")
-            print(f"📊 TCV oszlopok: {list(self.tcv_df.columns)}")
-            
             # ARCHITEKTÚRA MAPPING DEFINIÁLÁSA
-            self.architecture_mapping = {
-                'ENTERPRISE NETWORKING': 'NETWORKING*',
-                'IOT': 'NETWORKING*',
-                'DATA CENTER GROUP': 'CLOUD & AI',
-                'SERVICES': 'SERVICES*',
-                'OTHER': 'SERVICES*',
-            }
-            print(f"🏗️ Architektúra mapping: {self.architecture_mapping}")
+            if architecture_mapping is None:
+                architecture_mapping = self.DEFAULT_ARCHITECTURE_MAPPING
+            self.architecture_mapping = dict(architecture_mapping)
+            logger.info("🏗️ Architektúra mapping: %s", self.architecture_mapping)
             
-            # Adatok feldolgozása
-            self._process_data()
+            # LEMEZES CACHE (csak lokális fájloknál, teljes betöltés esetén)
+            cache_key = None
+            if use_cache and not chunksize and self.backend is None and acv_file_path and tcv_file_path and data_cache.cache_available():
+                with self.metrics.measure('cache_fingerprint'):
+                    cache_key = self._build_cache_key(acv_file_path, tcv_file_path)
+
+            loaded_from_cache = False
+            if cache_key:
+                with self.metrics.measure('cache_load') as phase:
+                    loaded_from_cache = self._load_from_cache(acv_file_path, tcv_file_path, cache_key)
+                    phase['rows'] = self._row_count() if loaded_from_cache else 0
+            
+            if loaded_from_cache:
+                for name, file_path in (('ACV', acv_file_path), ('TCV', tcv_file_path)):
+                    setattr(self, f'{name.lower()}_file_creation_date', self._file_modification_date(file_path))
+            elif chunksize:
+                self._load_aggregated(acv_file_path, tcv_file_path, acv_file_obj, tcv_file_obj,
+                                      lambda name, source: self._stream_source(name, source, chunksize))
+            elif self.backend is not None:
+                self._load_aggregated(acv_file_path, tcv_file_path, acv_file_obj, tcv_file_obj, self._backend_source)
+            else:
+                self._load_csv_files(acv_file_path, tcv_file_path, acv_file_obj, tcv_file_obj)
+                
+                # Adatok feldolgozása
+                self._process_data()
+                
+                if cache_key:
+                    with self.metrics.measure('cache_save', rows=self._row_count()):
+                        self._save_to_cache(acv_file_path, tcv_file_path, cache_key)
             
             # Aktuális dátum meghatározása a legutóbbi adatok alapján
             # Módosítás: _determine_current_period-ot hívjuk, de már nem az üzenethez
             self._determine_current_period()
             
         except Exception as e:
-            print(f"❌ Hiba az inicializáláskor: {e}")
+            logger.error("❌ Hiba az inicializáláskor: %s", e)
             raise
 
+    def _row_count(self):
+        """A betöltött nyers keretek összes sorszáma (streaming módban 0)"""
+        return sum(len(df) for _, df in self._source_frames() if df is not None)
+
+    def _source_frames(self):
+        """(forrás név, nyers keret) párok - streaming módban a keret None"""
+        return [(name, getattr(self, f'{name.lower()}_df', None)) for name in self.SOURCES]
+
+    @staticmethod
+    def _file_modification_date(file_path):
+        """Fájl utolsó módosításának dátuma (YYYY-MM-DD)"""
+        return datetime.fromtimestamp(os.path.getmtime(file_path)).strftime('%Y-%m-%d')
+
+    def _load_csv_files(self, acv_file_path, tcv_file_path, acv_file_obj, tcv_file_obj):
+        """ACV és TCV CSV fájlok beolvasása útvonalból vagy feltöltött fájlból"""
+        try:
+            for name, file_path, file_obj in (('ACV', acv_file_path, acv_file_obj), ('TCV', tcv_file_path, tcv_file_obj)):
+                prefix = name.lower()
+                source, creation_date = self._resolve_source(name, file_path, file_obj)
+                setattr(self, f'{prefix}_file_creation_date', creation_date)
+                size = os.path.getsize(file_path) if file_path else None
+                with self.metrics.measure(f'read_csv:{name}') as phase:
+                    df = self._read_csv(source, engine=multithreaded_engine())
+                    phase['rows'] = len(df)
+                setattr(self, f'{prefix}_df', df)
+                if file_path:
+                    self._record_ingest_state(name, file_path, size, self._csv_header(file_path))
+                logger.info("✅ %s betöltve: %s", name, file_path or 'feltöltött fájl')
+                
+                # OSZLOPOK DIAGNOSZTIZÁLÁSA
+                logger.debug("📊 %s oszlopok: %s", name, list(df.columns))
+        except Exception as e:
+            logger.error("❌ CSV betöltési hiba: %s", e)
+            raise
+
+    def _read_csv(self, source, engine=None, **kwargs):
+        """CSV beolvasása - séma esetén csak a szükséges oszlopok, rögzített dtype-okkal.
+
+        Séma nélkül az eddigi (típus-kikövetkeztető) beolvasás marad; az engine csak
+        sémával érvényes, mert a többszálú motor típuskövetkeztetése eltérhet.
+        """
+        engine = engine if self.schema is not None else None
+        if self.memory_map and isinstance(source, str) and engine != 'pyarrow':
+            # A pyarrow motor nem fogad memory_map-et (az saját, többszálú olvasóval dolgozik)
+            kwargs['memory_map'] = True
+        if self.schema is None:
+            return pd.read_csv(source, **kwargs)
+        result = pd.read_csv(source, **self._schema_read_options(source, engine, kwargs.get('names')), **kwargs)
+        if kwargs.get('chunksize'):
+            return (self.schema.rename_columns(chunk) for chunk in result)
+        return self.schema.rename_columns(result)
+
+    def _schema_read_options(self, source, engine=None, names=None):
+        """A séma read_csv paraméterei; opcionális (metrika, hierarchia) oszlopoknál a fejléc ismeretében"""
+        extra_columns = self.hierarchy.levels if self.hierarchy is not None else []
+        header = None
+        if self.schema.metric_columns or extra_columns:
+            # Hozzáfűzött sorok olvasásakor a fejlécet a names adja meg
+            header = names or self._source_header(source)
+        return self.schema.read_options(engine, header, extra_columns)
+
+    @staticmethod
+    def _csv_header(file_path):
+        """A CSV teljes fejléce (oszlopszűkítésnél is kell a hozzáfűzött sorok olvasásához)"""
+        return list(pd.read_csv(file_path, nrows=0).columns)
+
+    def _source_header(self, source):
+        """Fejléc útvonalból vagy fájl objektumból (az objektum pozíciója visszaáll)"""
+        if isinstance(source, str):
+            return self._csv_header(source)
+        position = source.tell()
+        header = list(pd.read_csv(source, nrows=0).columns)
+        source.seek(position)
+        return header
+
+    def _resolve_source(self, name, file_path, file_obj):
+        """Beolvasandó forrás (útvonal vagy fájl objektum) és a fájl dátuma"""
+        if file_path:
+            return file_path, self._file_modification_date(file_path)
+        if file_obj:
+            # Memóriában lévő fájl esetén nincs mód a creation date lekérésére,
+            # ezért az aktuális dátumot használjuk fallbackként.
+            return file_obj, datetime.now().strftime('%Y-%m-%d')
+        raise ValueError(f"❌ Nincs {name} fájl megadva")
+
+    def _load_aggregated(self, acv_file_path, tcv_file_path, acv_file_obj, tcv_file_obj, load_source):
+        """Aggregált betöltés (streaming vagy backend): a nyers sorok nem maradnak meg, csak a havi aggregátumok.
+
+        load_source(név, forrás) -> ({metrika kulcs: kocka}, érték oszlop)
+        """
+        try:
+            sources = {}
+            for name, file_path, file_obj in (('ACV', acv_file_path, acv_file_obj), ('TCV', tcv_file_path, tcv_file_obj)):
+                sources[name], creation_date = self._resolve_source(name, file_path, file_obj)
+                setattr(self, f'{name.lower()}_file_creation_date', creation_date)
+
+            cubes = {}
+            for name, source in sources.items():
+                prefix = name.lower()
+                source_cubes, value_column = load_source(name, source)
+                cubes.update(source_cubes)
+                setattr(self, f'{prefix}_value_column', value_column)
+                setattr(self, f'{prefix}_df', None)
+            self._set_cubes(cubes)
+        except Exception as e:
+            logger.error("❌ Aggregált betöltési hiba: %s", e)
+            raise
+
+    def _backend_source(self, name, source):
+        """Egy forrás feldolgozása a betöltési backenddel: ({metrika kulcs: kocka}, érték oszlop)"""
+        size = os.path.getsize(source) if isinstance(source, str) else None
+        with self.metrics.measure(f'{self.backend.name}:{name}') as phase:
+            aggregates, value_column, last_date, n_rows = self.backend.load_source(self, name, source)
+            phase['rows'] = n_rows
+        if size is not None:
+            self._record_ingest_state(name, source, size, self._csv_header(source))
+        if aggregates is None:
+            return self._source_cubes(name, None, None), value_column
+        logger.info("🏹 %s betöltve (%s backend): %s sor -> %s havi aggregátum sor",
+                    name, self.backend.name, n_rows, len(aggregates))
+        return self._source_cubes(name, aggregates, last_date), value_column
+
+    def _stream_source(self, name, source, chunksize, combine_every=32):
+        """Egy CSV darabonkénti feldolgozása és a forrás metrikáinak havi kockáiba hajtása.
+
+        A csúcs memória a darabmérettel és az aggregátum méretével arányos: a
+        részaggregátumokat combine_every darabonként összevonjuk.
+        Visszatérés: ({metrika kulcs: kocka}, érték oszlop).
+        """
+        size = os.path.getsize(source) if isinstance(source, str) else None
+
+        with self.metrics.measure(f'stream:{name}') as phase:
+            partials, value_column, last_date, n_rows = self._fold_chunks(name, source, chunksize, size, combine_every)
+            phase['rows'] = n_rows
+
+        if not partials:
+            return self._source_cubes(name, None, None), value_column
+
+        aggregates = MonthlyCube.combine_aggregates(partials, self._hierarchy_levels(partials[0].columns))
+        logger.info("🌊 %s streaming betöltve: %s sor -> %s havi aggregátum sor", name, n_rows, len(aggregates))
+        return self._source_cubes(name, aggregates, last_date), value_column
+
+    def _fold_chunks(self, name, source, chunksize, size, combine_every):
+        """A darabok feldolgozása részaggregátumokká: (részaggregátumok, érték oszlop, utolsó dátum, sorszám)"""
+        partials = []
+        value_column = None
+        extra_columns = []
+        levels = []
+        last_date = None
+        n_rows = 0
+
+        for chunk in self._read_csv(source, chunksize=chunksize):
+            if n_rows == 0 and size is not None:
+                self._record_ingest_state(name, source, size, self._csv_header(source))
+            n_rows += len(chunk)
+            self._process_date_column(chunk, name)
+            self._process_architecture_column(chunk, name)
+            # Az érték oszlopot (és a további metrika oszlopokat) az első darab alapján azonosítjuk
+            if value_column is None:
+                value_column = self._find_value_column(chunk, name)
+                if value_column is None:
+                    break
+                extra_columns = self._metric_columns(name, chunk.columns, value_column)
+                levels = self._hierarchy_levels(chunk.columns)
+
+            self._prepare_rows(chunk, value_column, extra_columns)
+            partials.append(MonthlyCube.aggregate_frame(chunk, value_column, extra_columns, self._size_grid_for(name),
+                                                        levels))
+
+            chunk_last_date = chunk['Date'].max()
+            if pd.notna(chunk_last_date) and (last_date is None or chunk_last_date > last_date):
+                last_date = chunk_last_date
+
+            if len(partials) >= combine_every:
+                partials = [MonthlyCube.combine_aggregates(partials, levels)]
+
+        return partials, value_column, last_date, n_rows
+
+    # Előkészített sorok (nyers architektúra, period) szerinti aggregálása - a backendek is ezt használják
+    aggregate_rows = staticmethod(MonthlyCube.aggregate_frame)
+
+    def _prepare_rows(self, df, value_column, extra_columns):
+        """Dátum / architektúra feldolgozás utáni sorok aggregálásra előkészítése (helyben):
+        numerikus érték és metrika oszlopok, ArchitectureRaw, hierarchia szint címkék"""
+        for column in [value_column] + extra_columns:
+            df[column] = self._clean_value_column(df[column]).astype(np.float64)
+        df['ArchitectureRaw'] = df['Architecture']
+        self._process_hierarchy_column(df)
+
+    def _hierarchy_levels(self, columns):
+        """A lebontási hierarchia keretben / aggregátumban meglévő szintjei (hierarchia nélkül üres)"""
+        return self.hierarchy.present_levels(columns) if self.hierarchy is not None else []
+
+    def _process_hierarchy_column(self, df):
+        """Hierarchia szint oszlopok categorical string címkékre, hiányzó érték helyett címkével (helyben)"""
+        for level in self._hierarchy_levels(df.columns):
+            df[level] = normalize_level_column(df[level])
+
+    def _metric_columns(self, name, columns, value_column):
+        """A forrás 'column' mértékű metrikáinak oszlopai, amelyek a keretben ténylegesen megvannak"""
+        return [metric.column for metric in self.metric_registry.for_source(name)
+                if metric.measure == 'column' and metric.column in columns and metric.column != value_column]
+
+    def _metric_table(self, name, aggregates):
+        """Egy forrás (nyers architektúra, period) aggregátumaiból a forrás összes metrikájának hosszú (long) táblája.
+
+        Oszlopok: Metric, ArchitectureRaw, FiscalPeriod, Value, Count - a Count a booking sorok száma
+        (a deal méret kategóriáknál a kategóriába eső sorok száma, a Metric a kategória kocka kulcsa).
+        """
+        measures = [(metric.key, {'value': 'Value', 'count': 'Count'}.get(metric.measure, metric.column), 'Count')
+                    for metric in self.metric_registry.for_source(name)]
+        if self._size_grid_for(name) is not None:
+            measures += [(self.deal_sizes.cube_key(label), value_column, count_column)
+                         for label, (value_column, count_column) in zip(self.deal_sizes.labels, self.deal_sizes.columns)]
+        frames = []
+        for key, measure_column, count_column in measures:
+            if measure_column not in aggregates.columns:
+                continue
+            frames.append(pd.DataFrame({
+                'Metric': key,
+                'ArchitectureRaw': aggregates['ArchitectureRaw'],
+                'FiscalPeriod': aggregates['FiscalPeriod'],
+                'Value': aggregates[measure_column].astype(np.float64),
+                'Count': aggregates[count_column],
+            }))
+        if not frames:
+            return pd.DataFrame(columns=['Metric', 'ArchitectureRaw', 'FiscalPeriod', 'Value', 'Count'])
+        return pd.concat(frames, ignore_index=True)
+
+    def _source_cubes(self, name, aggregates, last_date):
+        """A forrás metrikáinak havi kockái: {metrika kulcs: kocka}.
+
+        Az érték és darabszám metrikák mindig kapnak kockát (érték oszlop nélkül üreset),
+        a 'column' metrikák és a deal méret kategóriák csak akkor, ha az oszlopuk szerepel az aggregátumokban.
+        Levél szintű (hierarchia szintekkel csoportosított) aggregátumokból a forrás rollup kockája is elkészül.
+        """
+        groups = {}
+        cubes = {}
+        if aggregates is not None:
+            rollup, aggregates = self._split_rollup(name, aggregates)
+            if rollup is not None:
+                cubes[self.hierarchy.cube_key(name)] = rollup
+            groups = dict(list(self._metric_table(name, aggregates).groupby('Metric', sort=False)))
+        for metric in self.metric_registry.for_source(name):
+            if metric.key in groups:
+                cubes[metric.key] = MonthlyCube.from_aggregates(
+                    groups[metric.key].drop(columns='Metric'), self.architecture_mapping, last_date)
+            elif metric.measure != 'column':
+                cubes[metric.key] = MonthlyCube(pd.DataFrame(), None, self.architecture_mapping)
+        if self._size_grid_for(name) is not None:
+            for label in self.deal_sizes.labels:
+                key = self.deal_sizes.cube_key(label)
+                if key in groups:
+                    cubes[key] = MonthlyCube.from_aggregates(groups[key].drop(columns='Metric'),
+                                                             self.architecture_mapping, last_date)
+        return cubes
+
+    def _split_rollup(self, name, aggregates):
+        """Levél szintű aggregátumokból (rollup kocka, (nyers architektúra, period) aggregátumok);
+        hierarchia szintek nélkül (None, aggregates)"""
+        levels = self._hierarchy_levels(aggregates.columns)
+        if not levels:
+            return None, aggregates
+        measure_columns = {metric.key: {'value': 'Value', 'count': 'Count'}.get(metric.measure, metric.column)
+                           for metric in self.metric_registry.for_source(name)}
+        measure_columns = {key: column for key, column in measure_columns.items() if column in aggregates.columns}
+        rollup = RollupCube.from_aggregates(aggregates, levels, measure_columns, self.architecture_mapping)
+        return rollup, MonthlyCube.combine_aggregates([aggregates.drop(columns=levels)])
+
+    def _size_grid_for(self, name):
+        """A deal méret rács, ha a forrás sorait méret szerint is összesítjük (egyébként None)"""
+        return self.deal_sizes if self.deal_sizes.source == name else None
+
+    def _set_cubes(self, cubes):
+        """Kockák szétosztása: metrika kockák a regisztráció sorrendjében (ez a megjelenítési sorrend is),
+        deal méret kockák a kategóriák sorrendjében"""
+        self.metric_cubes = {metric.key: cubes[metric.key] for metric in self.metric_registry if metric.key in cubes}
+        self.size_cubes = {label: cubes[self.deal_sizes.cube_key(label)] for label in self.deal_sizes.labels
+                           if self.deal_sizes.cube_key(label) in cubes}
+        self.rollup_cubes = {}
+        if self.hierarchy is not None:
+            self.rollup_cubes = {name: cubes[self.hierarchy.cube_key(name)] for name in self.SOURCES
+                                 if self.hierarchy.cube_key(name) in cubes}
+
+    def _all_cubes(self):
+        """Az összes kocka kulcs szerint (metrikák, deal méret kategóriák és lebontási rollup-ok)"""
+        cubes = {**self.metric_cubes,
+                 **{self.deal_sizes.cube_key(label): cube for label, cube in self.size_cubes.items()}}
+        if self.hierarchy is not None:
+            cubes.update({self.hierarchy.cube_key(name): cube for name, cube in self.rollup_cubes.items()})
+        return cubes
+
+    def _source_cube_keys(self, name):
+        """Egy forrásból épülő kockák kulcsai"""
+        keys = [metric.key for metric in self.metric_registry.for_source(name)]
+        if self._size_grid_for(name) is not None:
+            keys += [self.deal_sizes.cube_key(label) for label in self.deal_sizes.labels]
+        if self.hierarchy is not None:
+            keys.append(self.hierarchy.cube_key(name))
+        return keys
+
+    def active_metrics(self):
+        """A betöltött adatokban elérhető (kockával rendelkező) metrikák, regisztrációs sorrendben"""
+        return [metric for metric in self.metric_registry if metric.key in self.metric_cubes]
+
+    def monthly_table(self):
+        """Az összes metrika havi aggregátumai egyetlen hosszú (long) táblában:
+        Metric, ArchitectureRaw, FiscalPeriod, Value, Count"""
+        frames = [cube.to_aggregates().assign(Metric=key) for key, cube in self.metric_cubes.items()]
+        columns = ['Metric', 'ArchitectureRaw', 'FiscalPeriod', 'Value', 'Count']
+        if not frames:
+            return pd.DataFrame(columns=columns)
+        return pd.concat(frames, ignore_index=True)[columns]
+
+    def processing_signature(self):
+        """A feldolgozás eredményét befolyásoló beállítások (verzió, séma, metrikák, deal méretek, hierarchia) - cache-ek érvényességéhez"""
+        return {
+            'version': self.PROCESSING_VERSION,
+            'schema': self.schema.to_dict() if self.schema is not None else None,
+            'metrics': self.metric_registry.to_dict(),
+            'deal_sizes': self.deal_sizes.to_dict(),
+            'hierarchy': self.hierarchy.to_dict() if self.hierarchy is not None else None,
+        }
+
+    def _build_cache_key(self, acv_file_path, tcv_file_path):
+        """Cache kulcs: feldolgozási verzió, kompakt mód + mindkét CSV tartalom ujjlenyomata"""
+        return {
+            **self.processing_signature(),
+            'compact': self.compact_value_dtype,
+            'acv': data_cache.file_content_fingerprint(acv_file_path),
+            'tcv': data_cache.file_content_fingerprint(tcv_file_path),
+        }
+
+    @staticmethod
+    def _fingerprint_size(fingerprint):
+        """A content fingerprint-ben rögzített fájlméret"""
+        return int(fingerprint.split(':', 1)[0])
+
+    @staticmethod
+    def _fingerprint_digest(fingerprint):
+        """A content fingerprint-ben rögzített (teljes fájl) SHA-1 hash"""
+        return fingerprint.split(':', 1)[1]
+
+    def _load_from_cache(self, acv_file_path, tcv_file_path, cache_key):
+        """Feldolgozott keretek és havi aggregátumok betöltése a lemezes cache-ből"""
+        try:
+            cached = {}
+            for name, file_path in (('ACV', acv_file_path), ('TCV', tcv_file_path)):
+                loaded = data_cache.load_processed_frame(data_cache.cache_path_for(file_path), cache_key)
+                if loaded is None:
+                    logger.info("💾 Nincs érvényes cache, feldolgozás CSV-ből")
+                    return False
+                cached[name] = (file_path, *loaded)
+
+            cubes = {}
+            for name, (file_path, df, metadata) in cached.items():
+                prefix = name.lower()
+                setattr(self, f'{prefix}_value_column', metadata['value_column'])
+                # A mapping nem része a cache-nek: a nyers architektúrákból újracímkézünk
+                df['Architecture'] = self._map_architecture_categories(df['ArchitectureRaw'])
+                setattr(self, f'{prefix}_df', df)
+                cubes.update({key: self._cube_from_state(name, key, state) for key, state in metadata['cubes'].items()})
+                # A cache a teljes (ujjlenyomattal ellenőrzött) fájltartalmat fedi le
+                self._record_ingest_state(name, file_path, self._fingerprint_size(cache_key[prefix]), metadata['csv_columns'],
+                                          self._fingerprint_digest(cache_key[prefix]))
+            self._set_cubes(cubes)
+            logger.info("⚡ Adatok betöltve a cache-ből: %s ACV, %s TCV sor", len(self.acv_df), len(self.tcv_df))
+            return True
+        except Exception as e:
+            logger.warning("⚠️ Cache betöltési hiba, feldolgozás CSV-ből: %s", e)
+            return False
+
+    def _cube_from_state(self, name, key, state):
+        """Kocka visszaállítása a cache állapotból (a forrás rollup kulcsánál RollupCube, egyébként MonthlyCube)"""
+        if self.hierarchy is not None and key == self.hierarchy.cube_key(name):
+            return RollupCube.from_state(state, self.architecture_mapping)
+        return MonthlyCube.from_state(state, self.architecture_mapping)
+
+    def _save_to_cache(self, acv_file_path, tcv_file_path, cache_key):
+        """Feldolgozott keretek mentése a CSV-k mellé (hiba esetén csak figyelmeztet)"""
+        try:
+            for name, file_path in (('ACV', acv_file_path), ('TCV', tcv_file_path)):
+                prefix = name.lower()
+                metadata = {
+                    'cache_key': cache_key, 'value_column': getattr(self, f'{prefix}_value_column'),
+                    'cubes': {key: cube.to_state() for key, cube in self._all_cubes().items()
+                              if key in self._source_cube_keys(name)},
+                    'csv_columns': self._ingest_state[name]['columns'],
+                }
+                frame = getattr(self, f'{prefix}_df').drop(columns=['Architecture']).reset_index(drop=True)
+                data_cache.save_processed_frame(data_cache.cache_path_for(file_path), frame, metadata)
+            logger.info("💾 Feldolgozott adatok elmentve a cache-be")
+        except Exception as e:
+            logger.warning("⚠️ Cache mentési hiba: %s", e)
+
+    def _record_ingest_state(self, name, file_path, offset, columns, checksum=None):
+        """Feldolgozott fájl állapotának rögzítése: byte offset, a teljes prefix ellenőrzőösszege, CSV fejléc
+        (checksum: a már ismert prefix hash, pl. a cache kulcs ujjlenyomatából - enélkül újraszámoljuk)"""
+        self._ingest_state = {**self._ingest_state, name: {
+            'path': file_path,
+            'offset': offset,
+            'checksum': checksum or data_cache.prefix_checksum(file_path, offset),
+            'columns': columns,
+        }}
+
+    def _check_source(self, state):
+        """Fájl állapota a legutóbbi feldolgozáshoz képest: ('unchanged' | 'appended' | 'changed', prefix hash).
+
+        A feldolgozott prefixet teljes egészében hash-eljük (mintavételes hash nem fogná meg a
+        fájl közepén történt azonos méretű átírást), így az 'unchanged' ellenőrzött tartalom egyezés.
+        A prefix hash objektuma hozzáfűzésnél az új ellenőrzőösszeg számolásához kell.
+        """
+        size = os.path.getsize(state['path'])
+        offset = state['offset']
+        if size < offset:
+            return 'changed', None
+        digest = data_cache.prefix_hash(state['path'], offset)
+        if digest.hexdigest() != state['checksum']:
+            return 'changed', None
+        if size == offset:
+            return 'unchanged', digest
+        # Csak teljes sorok hozzáfűzése támogatott: a prefixnek sorvéggel kell zárulnia
+        with open(state['path'], 'rb') as f:
+            f.seek(offset - 1)
+            if offset > 0 and f.read(1) != b'\n':
+                return 'changed', None
+        return 'appended', digest
+
+    @measured('refresh', 'refresh')
+    def refresh(self, rebuild=False):
+        """Fájlváltozások átvétele: hozzáfűzött sorok inkrementális feldolgozása, egyébként teljes újraépítés.
+
+        Visszatérési érték: 'unchanged' (a feldolgozott rész teljes hash-sel ellenőrizve), 'appended',
+        'rebuilt' vagy 'unsupported' (feltöltött fájl). rebuild=True: ellenőrzés nélküli teljes újraépítés.
+        Az objektumokat nem módosítja helyben, csak újrakötöz, így egy copy.copy-val
+        készült másolat frissítése nem érinti az eredeti (megosztott) példányt.
+        """
+        try:
+            if set(self._ingest_state) != {'ACV', 'TCV'}:
+                logger.warning("⚠️ Inkrementális frissítés csak lokális fájloknál támogatott")
+                return 'unsupported'
+
+            if rebuild:
+                checks = {name: ('changed', None) for name in self._ingest_state}
+            else:
+                checks = {name: self._check_source(state) for name, state in self._ingest_state.items()}
+            statuses = {name: status for name, (status, _) in checks.items()}
+            if 'changed' in statuses.values():
+                logger.info("🔁 A már feldolgozott rész megváltozott (%s), teljes újraépítés", statuses)
+                rebuilt = BookingAnalyzer(architecture_mapping=self.architecture_mapping, metrics=self.metrics,
+                                          analysis_cache=self.analysis_cache, index_grid=self.index_grid,
+                                          metric_registry=self.metric_registry, deal_sizes=self.deal_sizes,
+                                          hierarchy=self.hierarchy, **self._load_options)
+                self.__dict__.update(rebuilt.__dict__)
+                return 'rebuilt'
+
+            appended = [name for name, status in statuses.items() if status == 'appended']
+            if not appended:
+                return 'unchanged'
+
+            for name in appended:
+                self._append_new_rows(name, checks[name][1])
+                setattr(self, f'{name.lower()}_file_creation_date',
+                        self._file_modification_date(self._ingest_state[name]['path']))
+            self._determine_current_period()
+            self.data_version = next_data_version()
+            return 'appended'
+        except Exception as e:
+            logger.error("❌ Frissítési hiba: %s", e)
+            raise
+
+    def ingested_offsets(self):
+        """Forrásonként a feldolgozott (ellenőrzőösszeggel rögzített) bájtok száma - lokális fájloknál"""
+        return {name: state['offset'] for name, state in self._ingest_state.items()}
+
+    def _append_new_rows(self, name, digest=None):
+        """Csak az offset utáni új sorok beolvasása és a keretbe / havi kockába hajtása
+        (digest: az ellenőrzött prefix hash objektuma, ezt bővítjük az új sorokkal)"""
+        state = self._ingest_state[name]
+        with open(state['path'], 'rb') as f:
+            f.seek(state['offset'])
+            segment = f.read()
+
+        # A félig kiírt utolsó sort a következő frissítésre hagyjuk
+        end = segment.rfind(b'\n') + 1
+        if end == 0:
+            return
+        with self.metrics.measure(f'append:{name}') as phase:
+            new_rows = self._read_csv(io.BytesIO(segment[:end]), header=None, names=state['columns'])
+            phase['rows'] = len(new_rows)
+            self._fold_new_rows(name, new_rows)
+
+        checksum = None
+        if digest is not None:
+            digest.update(segment[:end])
+            checksum = digest.hexdigest()
+        self._record_ingest_state(name, state['path'], state['offset'] + end, state['columns'], checksum)
+        logger.info("➕ %s: %s új sor hozzáfűzve", name, len(new_rows))
+
+    def _fold_new_rows(self, name, new_rows):
+        """Új nyers sorok feldolgozása és hozzáadása a forrás havi kockáihoz (és teljes módban a kerethez)"""
+        prefix = name.lower()
+        value_column = getattr(self, f'{prefix}_value_column')
+        if value_column is not None and len(new_rows) > 0:
+            self._process_date_column(new_rows, name)
+            self._process_architecture_column(new_rows, name)
+            extra_columns = self._metric_columns(name, new_rows.columns, value_column)
+            self._prepare_rows(new_rows, value_column, extra_columns)
+
+            # Havi kockák: régi aggregátumok + új sorok aggregátuma (egy groupby a forrás minden metrikájára)
+            new_aggregates = MonthlyCube.aggregate_frame(new_rows, value_column, extra_columns, self._size_grid_for(name),
+                                                         self._hierarchy_levels(new_rows.columns))
+            new_rollup, new_aggregates = self._split_rollup(name, new_aggregates)
+            new_table = self._metric_table(name, new_aggregates)
+            new_last_date = new_rows['Date'].max()
+            cubes = self._all_cubes()
+            if new_rollup is not None:
+                rollup_key = self.hierarchy.cube_key(name)
+                cubes[rollup_key] = cubes[rollup_key].merge(new_rollup) if rollup_key in cubes else new_rollup
+            for key, new_aggregates in new_table.groupby('Metric', sort=False):
+                cube = cubes.get(key) or MonthlyCube(pd.DataFrame(), None, self.architecture_mapping)
+                aggregates = MonthlyCube.combine_aggregates([cube.to_aggregates(), new_aggregates.drop(columns='Metric')])
+                last_date = cube.last_date
+                if pd.notna(new_last_date) and (last_date is None or new_last_date > last_date):
+                    last_date = new_last_date
+                cubes[key] = MonthlyCube.from_aggregates(aggregates, self.architecture_mapping, last_date)
+            self._set_cubes(cubes)
+
+            # Teljes módban a nyers keretet is bővítjük (streaming módban nincs keret)
+            df = getattr(self, f'{prefix}_df')
+            if df is not None:
+                setattr(self, f'{prefix}_df', self._append_to_frame(name, df, new_rows))
+
+    def _append_to_frame(self, name, df, new_rows):
+        """Új (már feldolgozott) sorok hozzáfűzése a kerethez, a categorical oszlopok egyesítésével
+        (kompakt módban az új sorok is kompaktálva kerülnek be)"""
+        if 'FiscalMonth' not in new_rows.columns:
+            if 'FISCAL_MONTH_NAME' in new_rows.columns:
+                new_rows['FiscalMonth'] = new_rows['FISCAL_MONTH_NAME']
+            else:
+                new_rows['FiscalMonth'] = period_labels(new_rows['FiscalPeriod'])
+        if self.compact_value_dtype is not None:
+            new_rows = self._compact_frame(name, new_rows)
+
+        # A nyers architektúra (és kompakt módban a FiscalMonth) kategóriáinak egyesítése
+        categorical = [column for column in df.columns if column != 'Architecture' and column in new_rows.columns
+                       and isinstance(df[column].dtype, pd.CategoricalDtype)]
+        combined = pd.concat([df.drop(columns=[*categorical, 'Architecture']),
+                              new_rows.drop(columns=[*categorical, 'Architecture'])], ignore_index=True)
+        for column in categorical:
+            combined[column] = union_categoricals([df[column].array, pd.Categorical(new_rows[column])],
+                                                  sort_categories=True)
+        combined['Architecture'] = self._map_architecture_categories(combined['ArchitectureRaw'])
+        return combined
+
     def _determine_current_period(self):
         """Aktuális időszak meghatározása az adatok alapján"""
         try:
-            # A legutóbbi dátumok keresése
-            acv_latest = self.acv_df['Date'].max()
-            tcv_latest = self.tcv_df['Date'].max()
+            # A legutóbbi dátumok a havi kockákból (streaming módban nincs nyers keret)
+            latest_dates = [cube.last_date for cube in self.metric_cubes.values() if cube.last_date is not None]
             
             # A legfrissebb dátum használata
-            latest_date = max(acv_latest, tcv_latest)
-            self.current_fiscal_month = self._to_fiscal_month(latest_date)
+            latest_date = max(latest_dates)
+            self.current_period = FiscalPeriod.from_date(latest_date)
+            self.current_fiscal_month = self.current_period.label
             # A legutolsó nap, amire van adat
             self.last_data_point_date = latest_date
-            print(f"📅 Aktuális fiscal month: {self.current_fiscal_month} (utolsó adatpont: {self.last_data_point_date.strftime('%Y-%m-%d')})")
+            logger.info("📅 Aktuális fiscal month: %s (utolsó adatpont: %s)", self.current_fiscal_month, self.last_data_point_date.strftime('%Y-%m-%d'))
         except Exception as e:
-            print(f"❌ Aktuális időszak meghatározási hiba: {e}")
-            self.current_fiscal_month = "Jul FY2025"
+            logger.error("❌ Aktuális időszak meghatározási hiba: %s", e)
+            self.current_period = FiscalPeriod.from_label("Jul FY2025")
+            self.current_fiscal_month = self.current_period.label
             self.last_data_point_date = datetime.now() # Fallback
 
     def _process_data(self):
         """Adatok feldolgozása és előkészítése"""
-        print("Adatok feldolgozása...")
+        logger.info("Adatok feldolgozása...")
         try:
             # Dátum oszlop keresése és egységesítése
-            self._process_date_columns()
+            self._measure_step('process_date_columns', self._process_date_columns)
             
             # Architektúra oszlop egységesítése
-            self._process_architecture_columns()
+            self._measure_step('process_architecture_columns', self._process_architecture_columns)
             
             # ARCHITEKTÚRA MAPPING ALKALMAZÁSA
-            self._apply_architecture_mapping()
+            self._measure_step('apply_architecture_mapping', self._apply_architecture_mapping)
+            
+            # LEBONTÁSI HIERARCHIA SZINTEK (csak megadott hierarchiánál)
+            if self.hierarchy is not None:
+                self._measure_step('process_hierarchy_columns', self._process_hierarchy_columns)
             
             # VALUE OSZLOPOK AZONOSÍTÁSA
-            self._identify_value_columns()
+            self._measure_step('identify_value_columns', self._identify_value_columns)
+            
+            # VALUE OSZLOPOK NUMERIKUSSÁ ALAKÍTÁSA (egyszer, betöltéskor)
+            self._measure_step('normalize_value_columns', self._normalize_value_columns)
             
             # FiscalMonth generálása (ha szükséges)
-            if 'FiscalMonth' not in self.acv_df.columns:
-                if 'FISCAL_MONTH_NAME' in self.acv_df.columns:
-                    self.acv_df['FiscalMonth'] = self.acv_df['FISCAL_MONTH_NAME']
-                else:
-                    self.acv_df['FiscalMonth'] = self.acv_df['Date'].apply(self._to_fiscal_month)
+            self._measure_step('fiscal_month_columns', self._add_fiscal_month_columns)
             
-            if 'FiscalMonth' not in self.tcv_df.columns:
-                if 'FISCAL_MONTH_NAME' in self.tcv_df.columns:
-                    self.tcv_df['FiscalMonth'] = self.tcv_df['FISCAL_MONTH_NAME']
-                else:
-                    self.tcv_df['FiscalMonth'] = self.tcv_df['Date'].apply(self._to_fiscal_month)
+            # HAVI KOCKA ÉPÍTÉSE (architektúra × hónap, prefix összegekkel)
+            self._measure_step('build_monthly_cubes', self._build_monthly_cubes)
             
-            print("✅ Adatok feldolgozva")
+            # KOMPAKT KERETEK (csak kompakt módban; a kockák már a teljes pontosságú értékekből épültek)
+            if self.compact_value_dtype is not None:
+                self._measure_step('compact_frames', self._compact_frames)
+            
+            logger.info("✅ Adatok feldolgozva")
+        except Exception as e:
+            logger.error("❌ Adatfeldolgozási hiba: %s", e)
+            raise
+
+    def _measure_step(self, phase, step):
+        """Egy feldolgozási lépés futtatása időméréssel"""
+        with self.metrics.measure(phase, rows=self._row_count()):
+            step()
+
+    def _add_fiscal_month_columns(self):
+        """FiscalMonth címke oszlop a keretekhez (ha még nincs)"""
+        for _, df in self._source_frames():
+            if 'FiscalMonth' not in df.columns:
+                if 'FISCAL_MONTH_NAME' in df.columns:
+                    df['FiscalMonth'] = df['FISCAL_MONTH_NAME']
+                else:
+                    df['FiscalMonth'] = period_labels(df['FiscalPeriod'])
+
+    def _build_monthly_cubes(self):
+        """Havi kockák felépítése: forrásonként egyetlen groupby adja a forrás összes metrikáját, deal méret
+        eloszlását és (hierarchiánál) a levél szintű aggregátumokat, amelyekből a rollup kocka is épül"""
+        try:
+            cubes = {}
+            for name, df in self._source_frames():
+                value_column = getattr(self, f'{name.lower()}_value_column')
+                if df.empty or value_column is None or value_column not in df.columns:
+                    cubes.update(self._source_cubes(name, None, None))
+                    continue
+                last_date = df['Date'].max() if df['Date'].notna().any() else None
+                extra_columns = self._metric_columns(name, df.columns, value_column)
+                aggregates = MonthlyCube.aggregate_frame(df, value_column, extra_columns, self._size_grid_for(name),
+                                                         self._hierarchy_levels(df.columns))
+                cubes.update(self._source_cubes(name, aggregates, last_date))
+            self._set_cubes(cubes)
+            logger.info("🧊 Havi kockák: %s", ", ".join(
+                f"{key} {len(cube.architectures)}×{cube.n_months}" for key, cube in self.metric_cubes.items()))
+            for name, rollup in self.rollup_cubes.items():
+                logger.info("🌳 %s rollup: %s szint, %s levél cella", name, " > ".join(rollup.levels), len(rollup.cells))
+        except Exception as e:
+            logger.error("❌ Havi kocka építési hiba: %s", e)
+            raise
+
+    @staticmethod
+    def _compact_value_dtype(compact):
+        """A compact paraméterből az érték oszlopok dtype neve ('float64' / 'float32'), kikapcsolva None"""
+        if not compact:
+            return None
+        dtype = 'float64' if compact is True else str(compact).lower()
+        if dtype not in COMPACT_VALUE_DTYPES:
+            raise ValueError(f"❌ Ismeretlen kompakt érték dtype: {compact} (választható: {', '.join(COMPACT_VALUE_DTYPES)})")
+        return dtype
+
+    def _compact_frames(self):
+        """Nyers keretek kompaktálása, az oszloponkénti memória előtte / utána rögzítésével"""
+        try:
+            for name, df in self._source_frames():
+                self._memory_before[name] = self._column_memory(df)
+                compacted = self._compact_frame(name, df)
+                setattr(self, f'{name.lower()}_df', compacted)
+                logger.info("🗜️ %s keret kompaktálva: %.1f MB -> %.1f MB", name,
+                            sum(size for _, size in self._memory_before[name].values()) / 1e6,
+                            sum(size for _, size in self._column_memory(compacted).values()) / 1e6)
         except Exception as e:
-            print(f"❌ Adatfeldolgozási hiba: {e}")
+            logger.error("❌ Keret kompaktálási hiba: %s", e)
             raise
 
+    def _compact_columns(self, name, df):
+        """A kompakt keretben megmaradó oszlopok: architektúra, period, hónap címke, hierarchia szintek, érték és metrika oszlopok"""
+        value_column = getattr(self, f'{name.lower()}_value_column', None)
+        columns = ['ArchitectureRaw', 'Architecture', 'FiscalPeriod', 'FiscalMonth', *self._hierarchy_levels(df.columns)]
+        if value_column is not None:
+            columns += [value_column] + self._metric_columns(name, df.columns, value_column)
+        return [column for column in dict.fromkeys(columns) if column in df.columns]
+
+    def _compact_frame(self, name, df):
+        """Kompakt keret: felesleges oszlopok (nyers dátum, FISCAL_MONTH_NAME, egyéb CSV oszlopok) nélkül,
+        categorical címkékkel, kis egész period kóddal és a választott dtype-ú értékekkel"""
+        compacted = df[self._compact_columns(name, df)].reset_index(drop=True)
+        if 'FiscalMonth' in compacted.columns and not isinstance(compacted['FiscalMonth'].dtype, pd.CategoricalDtype):
+            compacted['FiscalMonth'] = compacted['FiscalMonth'].astype('category')
+        if 'FiscalPeriod' in compacted.columns and len(compacted) > 0:
+            # Az ordinális (év * 12 + hónap - 1) a 2730. évig int16-ban is elfér
+            limits = np.iinfo(np.int16)
+            periods = compacted['FiscalPeriod']
+            if periods.min() >= limits.min and periods.max() <= limits.max:
+                compacted['FiscalPeriod'] = periods.astype(np.int16)
+        value_dtype = COMPACT_VALUE_DTYPES[self.compact_value_dtype]
+        labels = ['ArchitectureRaw', 'Architecture', 'FiscalPeriod', 'FiscalMonth', *self._hierarchy_levels(compacted.columns)]
+        for column in compacted.columns:
+            if column not in labels:
+                compacted[column] = compacted[column].astype(value_dtype)
+        return compacted
+
+    @staticmethod
+    def _column_memory(df):
+        """Oszloponként (dtype, byte) - object oszlopoknál a tényleges tartalommal, az indexet is beleértve"""
+        dtypes = {'Index': str(df.index.dtype), **df.dtypes.astype(str).to_dict()}
+        return {column: (dtypes.get(column), int(size))
+                for column, size in df.memory_usage(index=True, deep=True).items()}
+
+    def memory_report(self):
+        """Oszloponkénti memória forrásonként: dtype és byte a kompaktálás előtt és után.
+
+        Kompaktálás nélkül (vagy cache-ből betöltve) az előtte oszlopok üresek;
+        streaming / backend módban nincsenek nyers keretek, a riport üres.
+        """
+        rows = []
+        for name, df in self._source_frames():
+            if df is None:
+                continue
+            before = self._memory_before.get(name, {})
+            after = self._column_memory(df)
+            for column in dict.fromkeys([*before, *after]):
+                dtype_before, bytes_before = before.get(column, (None, None))
+                dtype_after, bytes_after = after.get(column, (None, 0))
+                rows.append({'source': name, 'column': column, 'dtype_before': dtype_before, 'bytes_before': bytes_before,
+                             'dtype_after': dtype_after, 'bytes_after': bytes_after})
+        return pd.DataFrame(rows, columns=['source', 'column', 'dtype_before', 'bytes_before', 'dtype_after', 'bytes_after'])
+
     def _apply_architecture_mapping(self):
-        """Architektúra mapping alkalmazása"""
+        """Architektúra mapping alkalmazása.
+
+        A nyers értékek categorical oszlopként (ArchitectureRaw) maradnak meg, az
+        Architecture oszlop ebből kategória-átcímkézéssel készül (nincs soronkénti lambda).
+        """
         try:
-            print("🔄 Architektúra mapping alkalmazása...")
+            logger.info("🔄 Architektúra mapping alkalmazása...")
             
-            # ACV architektúra mapping
-            original_acv_arch = self.acv_df['Architecture'].value_counts()
-            print(f"📊 Eredeti ACV architektúrák: {dict(original_acv_arch)}")
-            self.acv_df['Architecture'] = self.acv_df['Architecture'].map(lambda x: self.architecture_mapping.get(x, x))
-            
-            # TCV architektúra mapping
-            original_tcv_arch = self.tcv_df['Architecture'].value_counts()
-            print(f"📊 Eredeti TCV architektúrák: {dict(original_tcv_arch)}")
-            self.tcv_df['Architecture'] = self.tcv_df['Architecture'].map(lambda x: self.architecture_mapping.get(x, x))
+            for _, df in self._source_frames():
+                if not isinstance(df['Architecture'].dtype, pd.CategoricalDtype):
+                    df['ArchitectureRaw'] = df['Architecture'].astype('category')
+                else:
+                    df['ArchitectureRaw'] = df['Architecture']
+                df['Architecture'] = self._map_architecture_categories(df['ArchitectureRaw'])
             
-            # Mapping utáni állapot
-            mapped_acv_arch = self.acv_df['Architecture'].value_counts()
-            mapped_tcv_arch = self.tcv_df['Architecture'].value_counts()
-            print(f"✅ Mapped ACV architektúrák: {dict(mapped_acv_arch)}")
-            print(f"✅ Mapped TCV architektúrák: {dict(mapped_tcv_arch)}")
+            # Eredeti és mapping utáni állapot - a value_counts csak debug szinten fut le
+            if logger.isEnabledFor(logging.DEBUG):
+                for name, df in self._source_frames():
+                    logger.debug("📊 Eredeti %s architektúrák: %s", name, dict(df['ArchitectureRaw'].value_counts()))
+                    logger.debug("✅ Mapped %s architektúrák: %s", name, dict(df['Architecture'].value_counts()))
+        except Exception as e:
+            logger.error("❌ Architektúra mapping hiba: %s", e)
+            raise
+
+    def _map_architecture_categories(self, raw):
+        """Nyers categorical architektúra oszlop mapping szerinti átcímkézése (csak a kategóriákon dolgozik)"""
+        mapped_labels = [self.architecture_mapping.get(arch, arch) for arch in raw.cat.categories]
+        mapped_categories = sorted(set(mapped_labels), key=str)
+        lookup = pd.Index(mapped_categories).get_indexer(mapped_labels)
+        codes = raw.cat.codes.to_numpy()
+        mapped_codes = np.where(codes < 0, -1, lookup[codes])
+        return pd.Series(pd.Categorical.from_codes(mapped_codes, categories=mapped_categories), index=raw.index)
+
+    @measured('set_architecture_mapping', 'mapping')
+    def set_architecture_mapping(self, architecture_mapping):
+        """Architektúra mapping módosítása futásidőben - CSV újratöltés nélkül.
+
+        Csak az Architecture kategóriákat címkézi át és a havi kockák nyers
+        architektúra sorait összegzi újra.
+        """
+        try:
+            self.architecture_mapping = dict(architecture_mapping)
+            # Sekély másolat: a megosztott (cache-elt) példány kereteit nem módosítjuk helyben
+            # (streaming módban nincsenek nyers keretek)
+            for name, df in self._source_frames():
+                if df is not None:
+                    df = df.copy(deep=False)
+                    df['Architecture'] = self._map_architecture_categories(df['ArchitectureRaw'])
+                    setattr(self, f'{name.lower()}_df', df)
+            for cube in self._all_cubes().values():
+                cube.apply_mapping(self.architecture_mapping)
+            self.data_version = next_data_version()
+            logger.info("🏗️ Architektúra mapping frissítve: %s", self.architecture_mapping)
+            return self
         except Exception as e:
-            print(f"❌ Architektúra mapping hiba: {e}")
+            logger.error("❌ Architektúra mapping frissítési hiba: %s", e)
             raise
 
+    def with_architecture_mapping(self, architecture_mapping):
+        """Új analyzer példány a megadott mappinggel; az eredeti (pl. megosztott) példány változatlan marad"""
+        remapped = copy.copy(self)
+        remapped._set_cubes({key: copy.copy(cube) for key, cube in self._all_cubes().items()})
+        return remapped.set_architecture_mapping(architecture_mapping)
+
+    def set_index_grid(self, index_grid):
+        """Index rács cseréje (az elemzési cache kulcsa is változik)"""
+        self.index_grid = index_grid
+        self.data_version = next_data_version()
+        logger.info("📐 Index rács: %s szint (%s - %s)", len(index_grid.levels), index_grid.labels[0], index_grid.labels[-1])
+        return self
+
+    def with_index_grid(self, index_grid):
+        """Új analyzer példány a megadott index ráccsal; az eredeti (pl. megosztott) példány változatlan marad"""
+        return copy.copy(self).set_index_grid(index_grid)
+
+    def get_raw_architectures(self):
+        """Nyers (mapping előtti) architektúra nevek a mapping szerkesztőhöz"""
+        return sorted(set().union(*(cube.raw_architectures for cube in self.metric_cubes.values())), key=str)
+
     def _identify_value_columns(self):
         """Érték oszlopok azonosítása"""
         try:
-            # ACV érték oszlop keresése
-            acv_value_candidates = []
-            for col in self.acv_df.columns:
-                # Numerikus oszlopokat keresünk (kivéve year, quarter stb.)
-                if (self.acv_df[col].dtype in ['int64', 'float64'] or
-                    (self.acv_df[col].dtype == 'object' and
-                     self.acv_df[col].astype(str).str.contains(r'^[\d\.,\-\$\s]*$', na=False).any())):
-                    if col.lower() not in ['fiscal year', 'year', 'quarter', 'month']:
-                        acv_value_candidates.append(col)
-            
-            # A legvalószínűbb érték oszlop kiválasztása ACV-hez
-            if acv_value_candidates:
-                # Próbáljuk az 'A' oszlopot először (a minta alapján)
-                if 'A' in acv_value_candidates:
-                    self.acv_value_column = 'A'
-                else:
-                    self.acv_value_column = acv_value_candidates[0]
-                print(f"💰 ACV érték oszlop: {self.acv_value_column}")
-            else:
-                self.acv_value_column = None
-                print("❌ ACV érték oszlop nem található!")
-            
-            # TCV érték oszlop keresése
-            tcv_value_candidates = []
-            for col in self.tcv_df.columns:
-                if (self.tcv_df[col].dtype in ['int64', 'float64'] or
-                    (self.tcv_df[col].dtype == 'object' and
-                     self.tcv_df[col].astype(str).str.contains(r'^[\d\.,\-\$\s]*$', na=False).any())):
-                    if col.lower() not in ['fiscal year', 'year', 'quarter', 'month']:
-                        tcv_value_candidates.append(col)
-            
-            # A legvalószínűbb érték oszlop kiválasztása TCV-hez
-            if tcv_value_candidates:
-                # Próbáljuk az 'A' oszlopot először (a minta alapján)
-                if 'A' in tcv_value_candidates:
-                    self.tcv_value_column = 'A'
-                else:
-                    self.tcv_value_column = tcv_value_candidates[0]
-                print(f"💰 TCV érték oszlop: {self.tcv_value_column}")
-            else:
-                self.tcv_value_column = None
-                print("❌ TCV érték oszlop nem található!")
+            for name, df in self._source_frames():
+                setattr(self, f'{name.lower()}_value_column', self._find_value_column(df, name))
         except Exception as e:
-            print(f"❌ Érték oszlop azonosítási hiba: {e}")
-            self.acv_value_column = None
-            self.tcv_value_column = None
+            logger.error("❌ Érték oszlop azonosítási hiba: %s", e)
+            for name in self.SOURCES:
+                setattr(self, f'{name.lower()}_value_column', None)
+
+    def _find_value_column(self, df, name):
+        """A legvalószínűbb érték oszlop keresése egy keretben (séma esetén a sémából)"""
+        if self.schema is not None:
+            logger.info("💰 %s érték oszlop (séma): %s", name, self.schema.value_column)
+            return self.schema.value_column
+
+        # A string oszlopok mintázat-ellenőrzése csak egy egyenletes mintán fut, nem a teljes oszlopon
+        if len(df) > self.VALUE_DETECTION_SAMPLE_ROWS:
+            df = df.iloc[np.linspace(0, len(df) - 1, self.VALUE_DETECTION_SAMPLE_ROWS).astype(np.int64)]
+        value_candidates = []
+        for col in df.columns:
+            # Numerikus oszlopokat keresünk (kivéve year, quarter stb.)
+            if (df[col].dtype in ['int64', 'float64'] or
+                (df[col].dtype == 'object' and
+                 df[col].astype(str).str.contains(r'^[\d\.,\-\$\s]*$', na=False).any())):
+                if col.lower() not in ['fiscal year', 'year', 'quarter', 'month']:
+                    value_candidates.append(col)
+        
+        if not value_candidates:
+            logger.warning("❌ %s érték oszlop nem található!", name)
+            return None
+        
+        # Próbáljuk az 'A' oszlopot először (a minta alapján)
+        value_column = 'A' if 'A' in value_candidates else value_candidates[0]
+        logger.info("💰 %s érték oszlop: %s", name, value_column)
+        return value_column
+
+    def _normalize_value_columns(self):
+        """Az azonosított érték oszlopok (és a további metrika oszlopok) tisztítása float64-re, egyszer a betöltéskor"""
+        try:
+            for name, df in self._source_frames():
+                value_column = getattr(self, f'{name.lower()}_value_column')
+                if value_column is not None:
+                    for column in [value_column] + self._metric_columns(name, df.columns, value_column):
+                        df[column] = self._clean_value_column(df[column]).astype(np.float64)
+            logger.info("🔢 Érték oszlopok numerikussá alakítva")
+        except Exception as e:
+            logger.error("❌ Érték oszlop tisztítási hiba: %s", e)
+            raise
 
     def _process_date_columns(self):
         """Dátum oszlopok feldolgozása"""
         try:
-            # ACV dátum kezelés
-            if 'FISCAL_MONTH_NAME' in self.acv_df.columns:
-                self.acv_df['Date'] = self.acv_df['FISCAL_MONTH_NAME'].apply(self._convert_fiscal_month)
-            elif 'Date' in self.acv_df.columns:
-                self.acv_df['Date'] = pd.to_datetime(self.acv_df['Date'])
-            else:
-                date_candidates = [col for col in self.acv_df.columns if
-                                 'date' in col.lower() or 'datum' in col.lower() or 'time' in col.lower()]
-                if date_candidates:
-                    self.acv_df['Date'] = pd.to_datetime(self.acv_df[date_candidates[0]])
-                    print(f"🗓️ ACV dátum oszlop: {date_candidates[0]}")
-                else:
-                    print("⚠️ ACV dátum oszlop nem található!")
-            
-            # TCV dátum kezelés
-            if 'FISCAL_MONTH_NAME' in self.tcv_df.columns:
-                self.tcv_df['Date'] = self.tcv_df['FISCAL_MONTH_NAME'].apply(self._convert_fiscal_month)
-            elif 'Date' in self.tcv_df.columns:
-                self.tcv_df['Date'] = pd.to_datetime(self.tcv_df['Date'])
-            else:
-                date_candidates = [col for col in self.tcv_df.columns if
-                                 'date' in col.lower() or 'datum' in col.lower() or 'time' in col.lower()]
-                if date_candidates:
-                    self.tcv_df['Date'] = pd.to_datetime(self.tcv_df[date_candidates[0]])
-                    print(f"🗓️ TCV dátum oszlop: {date_candidates[0]}")
-                else:
-                    print("⚠️ TCV dátum oszlop nem található!")
-            
-            # Rendezés dátum szerint
-            self.acv_df = self.acv_df.sort_values('Date')
-            self.tcv_df = self.tcv_df.sort_values('Date')
+            for name, df in self._source_frames():
+                self._process_date_column(df, name)
+                
+                # Rendezés dátum szerint
+                setattr(self, f'{name.lower()}_df', df.sort_values('Date'))
             
         except Exception as e:
-            print(f"❌ Dátum feldolgozási hiba: {e}")
+            logger.error("❌ Dátum feldolgozási hiba: %s", e)
             raise
 
+    def _process_date_column(self, df, name):
+        """Date és FiscalPeriod oszlop előállítása egy keretben (helyben)"""
+        if 'FISCAL_MONTH_NAME' in df.columns:
+            df['FiscalPeriod'] = periods_from_labels(df['FISCAL_MONTH_NAME'])
+            df['Date'] = period_dates(df['FiscalPeriod'])
+        elif 'Date' in df.columns:
+            df['Date'] = pd.to_datetime(df['Date'])
+        else:
+            date_candidates = [col for col in df.columns if
+                             'date' in col.lower() or 'datum' in col.lower() or 'time' in col.lower()]
+            if date_candidates:
+                df['Date'] = pd.to_datetime(df[date_candidates[0]])
+                logger.info("🗓️ %s dátum oszlop: %s", name, date_candidates[0])
+            else:
+                logger.warning("⚠️ %s dátum oszlop nem található!", name)
+        if 'FiscalPeriod' not in df.columns and 'Date' in df.columns:
+            df['FiscalPeriod'] = periods_from_dates(df['Date'])
+
     def _process_architecture_columns(self):
         """Architektúra oszlopok feldolgozása"""
         try:
-            # ACV architektúra oszlop keresése
-            if 'Architecture' not in self.acv_df.columns:
-                arch_candidates = [col for col in self.acv_df.columns if 'arch' in col.lower()]
-                if arch_candidates:
-                    self.acv_df['Architecture'] = self.acv_df[arch_candidates[0]]
-                    print(f"🏗️ ACV architektúra oszlop: {arch_candidates[0]} -> Architecture")
-                else:
-                    self.acv_df['Architecture'] = 'Unknown'
-                    print("⚠️ ACV architektúra oszlop nem található, 'Unknown' használata")
-            
-            # TCV architektúra oszlop keresése
-            if 'Architecture' not in self.tcv_df.columns:
-                arch_candidates = [col for col in self.tcv_df.columns if 'arch' in col.lower()]
-                if arch_candidates:
-                    self.tcv_df['Architecture'] = self.tcv_df[arch_candidates[0]]
-                    print(f"🏗️ TCV architektúra oszlop: {arch_candidates[0]} -> Architecture")
-                else:
-                    self.tcv_df['Architecture'] = 'Unknown'
-                    print("⚠️ TCV architektúra oszlop nem található, 'Unknown' használata")
+            for name, df in self._source_frames():
+                self._process_architecture_column(df, name)
         except Exception as e:
-            print(f"❌ Architektúra feldolgozási hiba: {e}")
+            logger.error("❌ Architektúra feldolgozási hiba: %s", e)
             raise
 
-    def _to_fiscal_month(self, date):
-        """Dátum konvertálása fiscal month formátumra"""
+    def _process_hierarchy_columns(self):
+        """Hierarchia szint oszlopok feldolgozása"""
         try:
-            if pd.isna(date):
-                return None
-            
-            if date.month >= 8:  # Aug - Dec
-                fiscal_year = date.year + 1
-            else:  # Jan - Jul
-                fiscal_year = date.year
-                
-            month_name = date.strftime('%b')
-            return f"{month_name} FY{fiscal_year}"
+            for _, df in self._source_frames():
+                self._process_hierarchy_column(df)
         except Exception as e:
-            print(f"Fiscal month konverziós hiba: {e}")
-            return None
+            logger.error("❌ Hierarchia szint feldolgozási hiba: %s", e)
+            raise
 
-    def _convert_fiscal_month(self, fiscal_month):
-        """Fiscal month konvertálása dátummá"""
-        try:
-            if pd.isna(fiscal_month):
-                # Visszatérhet valamilyen alapértelmezett dátummal, vagy hibát dobhat
-                # Most az aktuális dátummal térünk vissza, hogy ne törjön el a kód
-                return datetime(datetime.now().year, datetime.now().month, 1)
-                
-            parts = str(fiscal_month).strip().split(' ')
-            if len(parts) != 2:
-                raise ValueError(f"Hibás formátum: {fiscal_month}")
-                
-            month_name = parts[0]
-            fiscal_year_str = parts[1]
-            
-            if not fiscal_year_str.startswith('FY'):
-                raise ValueError(f"Hibás fiscal year formátum: {fiscal_year_str}")
-                
-            fiscal_year = int(fiscal_year_str[2:])
-            
-            month_mapping = {
-                'Jan': 1, 'Feb': 2, 'Mar': 3, 'Apr': 4,
-                'May': 5, 'Jun': 6, 'Jul': 7, 'Aug': 8,
-                'Sep': 9, 'Oct': 10, 'Nov': 11, 'Dec': 12
-            }
-            
-            month_num = month_mapping.get(month_name)
-            if month_num is None:
-                raise ValueError(f"Ismeretlen hónap: {month_name}")
-            
-            # JAVÍTOTT FISCAL YEAR SZÁMÍTÁS
-            # Ha a hónap augusztus vagy később van, akkor az előző naptári évhez tartozik
-            # Ha a hónap július vagy korábban van, akkor az adott fiscal year-hez tartozik
-            if month_num >= 8:  # Aug - Dec
-                calendar_year = fiscal_year - 1
-            else:  # Jan - Jul
-                calendar_year = fiscal_year
-                
-            result = datetime(calendar_year, month_num, 1)
-            return result
-        except Exception as e:
-            print(f"Dátum konverziós hiba: {fiscal_month} -> {e}")
-            # Visszatérhet valamilyen alapértelmezett dátummal, vagy hibát dobhat
-            return datetime(datetime.now().year, datetime.now().month, 1)
+    def _process_architecture_column(self, df, name):
+        """Architecture oszlop keresése / egységesítése egy keretben (helyben)"""
+        if 'Architecture' not in df.columns:
+            arch_candidates = [col for col in df.columns if 'arch' in col.lower()]
+            if arch_candidates:
+                df['Architecture'] = df[arch_candidates[0]]
+                logger.info("🏗️ %s architektúra oszlop: %s -> Architecture", name, arch_candidates[0])
+            else:
+                df['Architecture'] = 'Unknown'
+                logger.warning("⚠️ %s architektúra oszlop nem található, 'Unknown' használata", name)
 
+    @measured('get_available_months')
     def get_available_months(self):
         """Elérhető hónapok listája - beleértve a jövőbeli hónapokat is predikciós célokra"""
         try:
-            # Meglévő hónapok az adatokból
-            if 'FISCAL_MONTH_NAME' in self.acv_df.columns:
-                acv_months = set(self.acv_df['FISCAL_MONTH_NAME'].dropna())
-            else:
-                acv_months = set(self.acv_df['FiscalMonth'].dropna())
-
-            if 'FISCAL_MONTH_NAME' in self.tcv_df.columns:
-                tcv_months = set(self.tcv_df['FISCAL_MONTH_NAME'].dropna())
-            else:
-                tcv_months = set(self.tcv_df['FiscalMonth'].dropna())
-
-            existing_months = list(acv_months.union(tcv_months))
+            # Meglévő period-ok a havi kockákból (nincs string parse-olás és sorszkennelés)
+            existing_periods = np.unique(np.concatenate(
+                [cube.active_periods() for cube in self.metric_cubes.values()]))
 
             # Jövőbeli hónapok generálása (következő 4 hónap)
-            future_months = []
-            if hasattr(self, 'current_fiscal_month') and self.current_fiscal_month:
-                current_month = self.current_fiscal_month
+            if hasattr(self, 'current_period') and self.current_period is not None:
+                current_period = self.current_period
             else:
                 # Fallback: legutóbbi hónap az adatokból
-                current_month = max(existing_months, key=lambda x: self._convert_fiscal_month(x))
+                current_period = FiscalPeriod(existing_periods.max())
 
-            print(f"🔍 Current month a future generáláshoz: {current_month}")
-            
             # Következő 4 hónap generálása a current_fiscal_month-tól kezdve
-            for i in range(1, 4 + 1): # current_fiscal_month + 1-től +4-ig
-                future_month = self._add_fiscal_months(current_month, i)
-                future_months.append(future_month)
-                print(f"  + {i} hónap: {future_month}")
+            future_periods = np.arange(current_period + 1, current_period + 4 + 1)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("🔍 Current month a future generáláshoz: %s", current_period)
+                for i, future_period in enumerate(future_periods, start=1):
+                    logger.debug("  + %s hónap: %s", i, FiscalPeriod(future_period))
 
-            # Összes hónap kombinálása
-            all_months = set(existing_months + future_months) # Használunk set-et az ismétlődések elkerülésére
-            
-            # Rendezés dátum szerint (legújabb elől)
-            month_dates = [(month, self._convert_fiscal_month(month)) for month in all_months]
-            month_dates.sort(key=lambda x: x[1], reverse=True)
+            # Összes hónap kombinálása és rendezése (legújabb elől)
+            all_periods = np.union1d(existing_periods, future_periods)[::-1]
 
-            result = [month for month, date in month_dates]
-            print(f"📅 Elérhető hónapok (beleértve jövőbeli): {len(result)} hónap")
+            result = [FiscalPeriod(period).label for period in all_periods]
+            logger.debug("📅 Elérhető hónapok (beleértve jövőbeli): %s hónap", len(result))
             return result
 
         except Exception as e:
-            print(f"Hónapok lekérési hiba: {e}")
+            logger.error("Hónapok lekérési hiba: %s", e)
             return ['Jul FY2025']
 
-    def _add_fiscal_months(self, fiscal_month, months_to_add):
-        """JAVÍTOTT Fiscal month előreszámítás"""
-        try:
-            # Fiscal year kezdés: August
-            fiscal_months_order = ['Aug', 'Sep', 'Oct', 'Nov', 'Dec',
-                                 'Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul']
-            
-            parts = str(fiscal_month).strip().split(' ')
-            month_name = parts[0]
-            fiscal_year = int(parts[1][2:])
-            
-            current_position = fiscal_months_order.index(month_name)
-            
-            # JAVÍTOTT SZÁMÍTÁS
-            total_months = current_position + months_to_add
-            years_forward = total_months // 12
-            target_position = total_months % 12
-            
-            target_fiscal_year = fiscal_year + years_forward
-            target_month_name = fiscal_months_order[target_position]
-            
-            result = f"{target_month_name} FY{target_fiscal_year}"
-            # print(f"    DEBUG: {fiscal_month} + {months_to_add} = {result}") # Túl sok output lehet
-            return result
-            
-        except Exception as e:
-            print(f"Hónap előreszámítási hiba: {e}")
-            return "Jul FY2025"
-
-    def _subtract_fiscal_months(self, fiscal_month, months_to_subtract):
-        """Fiscal month visszaszámítás"""
-        try:
-            fiscal_months_order = ['Aug', 'Sep', 'Oct', 'Nov', 'Dec',
-                                 'Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul']
-            
-            parts = str(fiscal_month).strip().split(' ')
-            month_name = parts[0]
-            fiscal_year = int(parts[1][2:])
-            
-            current_position = fiscal_months_order.index(month_name)
-            target_position = current_position - months_to_subtract
-            
-            years_back = 0
-            while target_position < 0:
-                target_position += 12
-                years_back += 1
-                
-            target_fiscal_year = fiscal_year - years_back
-            target_month_name = fiscal_months_order[target_position]
-            
-            return f"{target_month_name} FY{target_fiscal_year}"
-            
-        except Exception as e:
-            print(f"Hónap visszaszámítási hiba: {e}")
-            return "Jul FY2024"
-
     def get_architectures(self):
-        """Elérhető architektúrák - MAPPED VERZIÓ"""
+        """Elérhető architektúrák - MAPPED VERZIÓ (a havi kockákból, sorszkennelés nélkül)"""
         try:
-            acv_arch = set(self.acv_df['Architecture'].dropna())
-            tcv_arch = set(self.tcv_df['Architecture'].dropna())
-            return sorted(list(acv_arch.union(tcv_arch)))
+            return sorted(set().union(*(cube.architectures for cube in self.metric_cubes.values())))
         except Exception as e:
-            print(f"Architektúrák lekérési hiba: {e}")
+            logger.error("Architektúrák lekérési hiba: %s", e)
             return ['Unknown']
 
     def get_analysis_type(self, end_month):
         """Meghatározza az elemzés típusát: 'historical', 'current_month_prediction', 'future_prediction'."""
-        end_date = self._convert_fiscal_month(end_month)
-        current_fiscal_month_date = self._convert_fiscal_month(self.current_fiscal_month)
+        end_period = FiscalPeriod.from_label(end_month)
 
-        if end_date > current_fiscal_month_date:
+        if end_period > self.current_period:
             return 'future_prediction'
-        elif end_date == current_fiscal_month_date:
+        elif end_period == self.current_period:
             return 'current_month_prediction'
         else:
             return 'historical'
 
+    @measured('get_rolling_analysis')
     def get_rolling_analysis(self, end_month, architecture=None):
-        """12+12 hónapos gördülő elemzés - normál, aktuális és predikciós módban"""
+        """12+12 hónapos gördülő elemzés - normál, aktuális és predikciós módban.
+
+        Az eredmények memoizáltak (end_month, architektúra halmaz, adatverzió) kulcson;
+        a visszaadott szótárak megosztottak, csak olvasásra.
+        """
+        key = (end_month, normalize_architectures(architecture), self.data_version)
+        cached = self.analysis_cache.get(key)
+        if cached is not None:
+            if not cached.get('period_info'):
+                return cached
+            # A szűrő kijelzése a hívó formájában (pl. 'X' vs ['X'] ugyanazt a halmazt adja)
+            result = dict(cached)
+            result['period_info'] = {**cached['period_info'],
+                                     'selected_architectures': architecture if architecture else 'Összes'}
+            return result
+
         try:
+            result = self._compute_rolling_analysis(end_month, architecture)
+        except Exception as e:
+            # Hibás eredményt nem cache-elünk
+            logger.error("Elemzési hiba: %s", e)
+            return self._empty_result('current', 'reference')
+        self.analysis_cache.put(key, result)
+        return result
+
+    def _compute_rolling_analysis(self, end_month, architecture=None):
+        analysis_type = self.get_analysis_type(end_month)
+
+        if analysis_type == 'future_prediction':
+            return self._get_prediction_analysis(end_month, architecture)
+        elif analysis_type == 'current_month_prediction':
+            return self._get_current_month_analysis(end_month, architecture)
+        else: # historical
+            return self._get_historical_analysis(end_month, architecture)
+
+    @measured('get_rolling_analysis_many', count_result=True)
+    def get_rolling_analysis_many(self, end_months, architecture_filters=None):
+        """Gördülő elemzés sok végpont hónapra és architektúra szűrőre, egyetlen vektorizált menetben.
+
+        Az összes szükséges ablak egy-egy indexeléssel kerül kiolvasásra a havi kockákból.
+        Visszatérés: {(end_month, szűrő kulcs): eredmény}, ahol az eredmény ugyanaz a dict,
+        mint a get_rolling_analysis-é; a szűrő kulcs None, az architektúra neve, vagy listánál tuple.
+        """
+        filters = [None] if architecture_filters is None else list(architecture_filters)
+
+        # Ablakok összegyűjtése: hónaponként két ablak (aktuális / referencia vagy meglévő / baseline)
+        plans = []
+        for end_month in end_months:
+            try:
+                end_period = FiscalPeriod.from_label(end_month)
+            except ValueError as e:
+                logger.error("Elemzési hiba: %s", e)
+                plans.append((end_month, None, None))
+                continue
             analysis_type = self.get_analysis_type(end_month)
-            
-            if analysis_type == 'future_prediction':
-                return self._get_prediction_analysis(end_month, architecture)
-            elif analysis_type == 'current_month_prediction':
-                return self._get_current_month_analysis(end_month, architecture)
-            else: # historical
-                return self._get_historical_analysis(end_month, architecture)
+            plans.append((end_month, end_period, analysis_type))
+
+        valid_plans = [plan for plan in plans if plan[1] is not None]
+        windows = [self._analysis_windows(analysis_type, end_period) for _, end_period, analysis_type in valid_plans]
+        starts = [start for first, second in windows for start in (first[0], second[0])]
+        ends = [end for first, second in windows for end in (first[1], second[1])]
+        # Metrikánként (és deal méret kategóriánként) egyetlen indexelés az összes ablakra
+        cube_windows = {key: cube.windows(starts, ends) for key, cube in self.metric_cubes.items()}
+        size_windows = self._deal_size_matrices(starts, ends)
+
+        def window_dict(cube, rows, values, counts, column):
+            if len(rows) == 0:
+                return {}
+            return cube.window_dict(rows, values[rows, column], counts[rows, column])
+
+        results = {}
+        for architecture in filters:
+            filter_key = tuple(architecture) if isinstance(architecture, list) else architecture
+            rows = {key: cube._rows_for(architecture) for key, cube in self.metric_cubes.items()}
+
+            for i, (end_month, end_period, analysis_type) in enumerate(valid_plans):
+                first, second = 2 * i, 2 * i + 1
+                windows = {
+                    key: tuple(window_dict(cube, rows[key], *cube_windows[key], column) for column in (first, second))
+                    for key, cube in self.metric_cubes.items()
+                }
+                deal_sizes = tuple(self._deal_size_distribution(size_windows, architecture, column)
+                                   for column in (first, second))
+                results[(end_month, filter_key)] = self._build_analysis_result(
+                    analysis_type, end_month, end_period, architecture, windows, deal_sizes)
+            for end_month, end_period, _ in plans:
+                if end_period is None:
+                    results[(end_month, filter_key)] = self._empty_result('current', 'reference')
+        return results
+
+    @measured('get_drilldown')
+    def get_drilldown(self, end_month, path):
+        """Egy tábla sor kibontása: a path (architektúra, szint 1 címke, ...) gyerekei ugyanarra az elemzésre.
+
+        Az eredmény szerkezete a get_rolling_analysis-é, a metrikák dict-jeinek kulcsai itt a gyerek
+        címkék (plusz 'Összes'); a 'drilldown' mező: út, a gyerekek szintje és a tovább bontható
+        metrikák. Az összegek a betöltéskor épült rollup kockákból jönnek (nincs nyers keret szkennelés),
+        az eredmény memoizált (end_month, út, adatverzió) kulcson.
+        """
+        path = tuple(path)
+        key = ('drilldown', end_month, path, self.data_version)
+        cached = self.analysis_cache.get(key)
+        if cached is not None:
+            return cached
+
+        try:
+            result = self._compute_drilldown(end_month, path)
         except Exception as e:
-            print(f"Elemzési hiba: {e}")
-            return {
-                'acv_current': {}, 'acv_reference': {},
-                'tcv_current': {}, 'tcv_reference': {}, 
-                'period_info': {}
-            }
+            logger.error("Lebontási hiba: %s", e)
+            return self._empty_result('current', 'reference')
+        self.analysis_cache.put(key, result)
+        return result
+
+    def _compute_drilldown(self, end_month, path):
+        if self.hierarchy is None or not 1 <= len(path) <= len(self.hierarchy.levels):
+            raise ValueError(f"❌ Nem bontható sor: {' > '.join(map(str, path))}")
+        analysis_type = self.get_analysis_type(end_month)
+        end_period = FiscalPeriod.from_label(end_month)
+        analysis_windows = self._analysis_windows(analysis_type, end_period)
+        starts = [start for start, _ in analysis_windows]
+        ends = [end for _, end in analysis_windows]
+
+        # Metrikánként a két ablak gyerekenkénti összege (a hierarchia nélküli forrás metrikái üresek)
+        windows = {metric.key: ({}, {}) for metric in self.active_metrics()}
+        expandable = []
+        for rollup in self.rollup_cubes.values():
+            for key, (first, second) in rollup.children_windows(path, starts, ends).items():
+                if key in windows:
+                    windows[key] = (first, second)
+                    if len(path) < len(rollup.levels):
+                        expandable.append(key)
+
+        result = self._build_analysis_result(analysis_type, end_month, end_period, path[0], windows, ({}, {}))
+        result['drilldown'] = {
+            'path': list(path),
+            'level': self.hierarchy.levels[len(path) - 1],
+            'expandable_metrics': expandable,
+        }
+        return result
+
+    def _empty_result(self, *suffixes):
+        """Üres eredmény hiba esetére: minden metrikához (és a deal méret eloszláshoz) üres ablakok
+        (pl. acv_current, acv_reference, deal_sizes_current)"""
+        result = {f'{key}_{suffix}': {} for key in [*self.metric_cubes, 'deal_sizes'] for suffix in suffixes}
+        result['period_info'] = {}
+        return result
+
+    def _metric_windows(self, windows, architecture=None):
+        """Metrikánként a két ablak összesítése a havi kockákból: {metrika kulcs: (első, második)}"""
+        return {
+            key: tuple(self._aggregate_window(cube, start, end, architecture) for start, end in windows)
+            for key, cube in self.metric_cubes.items()
+        }
+
+    def _deal_size_matrices(self, starts, ends):
+        """Deal méret kategóriánként az összes ablak (érték, darabszám) mátrixa, kockánként egy indexeléssel"""
+        return {label: cube.windows(starts, ends) for label, cube in self.size_cubes.items()}
+
+    def _deal_size_distribution(self, size_windows, architecture, column):
+        """Egy ablak (a mátrixok column oszlopa) deal méret eloszlása:
+        {architektúra: {méret: {'count': deal-ek száma, 'value': összeg}}}, plusz 'Összes'.
+
+        Minden architektúránál az összes kategória szerepel (üres kategória 0-val).
+        """
+        distribution = {}
+        totals = {}
+        for label, cube in self.size_cubes.items():
+            values, counts = size_windows[label]
+            rows = cube._rows_for(architecture)
+            for row in rows:
+                if row < len(cube.architectures) and counts[row, column] > 0:
+                    distribution.setdefault(cube.architectures[row], {})[label] = {
+                        'count': int(counts[row, column]), 'value': float(values[row, column])}
+            totals[label] = {'count': int(counts[rows, column].sum()), 'value': float(values[rows, column].sum())}
+        if not any(total['count'] for total in totals.values()):
+            return {}
+        distribution['Összes'] = totals
+        empty = {'count': 0, 'value': 0.0}
+        return {arch: {label: sizes.get(label, empty) for label in self.deal_sizes.labels}
+                for arch, sizes in distribution.items()}
+
+    def _deal_size_windows(self, windows, architecture=None):
+        """A két ablak deal méret eloszlása: (első, második)"""
+        size_windows = self._deal_size_matrices([start for start, _ in windows], [end for _, end in windows])
+        return tuple(self._deal_size_distribution(size_windows, architecture, column) for column in range(len(windows)))
+
+    def _analysis_windows(self, analysis_type, end_period):
+        """Az elemzés két ablaka (start, end) period párként.
+
+        Történeti: aktuális 12 hónap és az azt megelőző 12 hónap (referencia).
+        Predikció: a 12 hónapos időszak az utolsó adatpontig (meglévő) és egy évvel korábbi időszak (baseline).
+        """
+        current_start = end_period - 11
+        # A referencia / baseline időszak: 12 hónappal korábbi, az aktuális időszak előtt záruló 12 hónap
+        reference_window = (end_period - 23, end_period - 12)
+        if analysis_type == 'historical':
+            return (current_start, end_period), reference_window
+        last_data_period = FiscalPeriod.from_date(self.last_data_point_date)
+        return (current_start, last_data_period), reference_window
+
+    def _build_analysis_result(self, analysis_type, end_month, end_period, architecture, windows, deal_sizes):
+        """Eredmény dict összeállítása a metrikánkénti két ablak összesítéseiből ({kulcs: (első, második)})
+        és a két ablak deal méret eloszlásából"""
+        if analysis_type == 'historical':
+            return self._historical_result(end_month, end_period, architecture, windows, deal_sizes)
+        return self._prediction_result(analysis_type, end_month, end_period, architecture, windows, deal_sizes)
 
     def _get_historical_analysis(self, end_month, architecture=None):
         """Történeti elemzés (eredeti logika)"""
         try:
-            end_date = self._convert_fiscal_month(end_month)
-            current_start_month = self._subtract_fiscal_months(end_month, 11)
-            reference_start_month = self._subtract_fiscal_months(end_month, 23)
-            
-            current_start_date = self._convert_fiscal_month(current_start_month)
-            reference_start_date = self._convert_fiscal_month(reference_start_month)
-            # A referencia időszak záró hónapja 1 hónappal korábbi, mint az aktuális időszak kezdő hónapja
-            reference_end_month_str = self._subtract_fiscal_months(current_start_month, 1)
-
-
-            # Szűrési feltételek
-            acv_current_mask = (self.acv_df['Date'] >= current_start_date) & (self.acv_df['Date'] <= end_date)
-            acv_reference_mask = (self.acv_df['Date'] >= reference_start_date) & (self.acv_df['Date'] < current_start_date)
-            tcv_current_mask = (self.tcv_df['Date'] >= current_start_date) & (self.tcv_df['Date'] <= end_date)
-            tcv_reference_mask = (self.tcv_df['Date'] >= reference_start_date) & (self.tcv_df['Date'] < current_start_date)
-
-            # Architektúra szűrés
-            if architecture:
-                if isinstance(architecture, list):
-                    acv_current_mask &= (self.acv_df['Architecture'].isin(architecture))
-                    acv_reference_mask &= (self.acv_df['Architecture'].isin(architecture))
-                    tcv_current_mask &= (self.tcv_df['Architecture'].isin(architecture))
-                    tcv_reference_mask &= (self.tcv_df['Architecture'].isin(architecture))
-                else:
-                    acv_current_mask &= (self.acv_df['Architecture'] == architecture)
-                    acv_reference_mask &= (self.acv_df['Architecture'] == architecture)
-                    tcv_current_mask &= (self.tcv_df['Architecture'] == architecture)
-                    tcv_reference_mask &= (self.tcv_df['Architecture'] == architecture)
-
-            # Összesítések az azonosított érték oszlopokkal
-            acv_current = self._aggregate_data(self.acv_df[acv_current_mask], self.acv_value_column)
-            acv_reference = self._aggregate_data(self.acv_df[acv_reference_mask], self.acv_value_column)
-            tcv_current = self._aggregate_data(self.tcv_df[tcv_current_mask], self.tcv_value_column)
-            tcv_reference = self._aggregate_data(self.tcv_df[tcv_reference_mask], self.tcv_value_column)
-
-            return {
-                'acv_current': acv_current,
-                'acv_reference': acv_reference,
-                'tcv_current': tcv_current,
-                'tcv_reference': tcv_reference,
-                'analysis_type': 'historical', # Új mező
-                'period_info': {
-                    'current_start': current_start_date.strftime('%Y-%m'),
-                    'current_end': end_date.strftime('%Y-%m'),
-                    'reference_start': reference_start_date.strftime('%Y-%m'),
-                    'reference_end': self._convert_fiscal_month(reference_end_month_str).strftime('%Y-%m'), # Itt is dátum formátum
-                    'current_start_fiscal': current_start_month,
-                    'current_end_fiscal': end_month,
-                    'reference_start_fiscal': reference_start_month, # Fiscal month string
-                    'reference_end_fiscal': reference_end_month_str, # Fiscal month string
-                    'selected_architectures': architecture if architecture else 'Összes'
-                }
-            }
+            end_period = FiscalPeriod.from_label(end_month)
+
+            # Összesítések a havi kockákból (nincs teljes DataFrame szkennelés)
+            analysis_windows = self._analysis_windows('historical', end_period)
+            windows = self._metric_windows(analysis_windows, architecture)
+            deal_sizes = self._deal_size_windows(analysis_windows, architecture)
+            return self._historical_result(end_month, end_period, architecture, windows, deal_sizes)
         except Exception as e:
-            print(f"Történeti elemzési hiba: {e}")
-            return {
-                'acv_current': {}, 'acv_reference': {},
-                'tcv_current': {}, 'tcv_reference': {}, 
-                'period_info': {}
+            logger.error("Történeti elemzési hiba: %s", e)
+            return self._empty_result('current', 'reference')
+
+    def _historical_result(self, end_month, end_period, architecture, windows, deal_sizes):
+        current_start = end_period - 11
+        reference_start = end_period - 23
+        # A referencia időszak záró hónapja 1 hónappal korábbi, mint az aktuális időszak kezdő hónapja
+        reference_end = current_start - 1
+        result = {}
+        for key, (current, reference) in windows.items():
+            result[f'{key}_current'] = current
+            result[f'{key}_reference'] = reference
+        return {
+            **result,
+            'metrics': [metric.describe() for metric in self.active_metrics()],
+            'deal_sizes_current': deal_sizes[0],
+            'deal_sizes_reference': deal_sizes[1],
+            'deal_size_grid': self.deal_sizes.describe(),
+            'analysis_type': 'historical', # Új mező
+            'period_info': {
+                'current_start': current_start.iso_month,
+                'current_end': end_period.iso_month,
+                'reference_start': reference_start.iso_month,
+                'reference_end': reference_end.iso_month, # Itt is dátum formátum
+                'current_start_fiscal': current_start.label,
+                'current_end_fiscal': end_month,
+                'reference_start_fiscal': reference_start.label, # Fiscal month string
+                'reference_end_fiscal': reference_end.label, # Fiscal month string
+                'selected_architectures': architecture if architecture else 'Összes'
             }
+        }
 
     def _get_current_month_analysis(self, end_month, architecture=None):
         """AKTUÁLIS HÓNAP elemzése: kombinálja a már meglévő (történeti) adatokat a predikciós logikával"""
         try:
-            print(f"✨ AKTUÁLIS STÁTUSZ - predikcióval: {end_month}")
+            logger.debug("✨ AKTUÁLIS STÁTUSZ - predikcióval: %s", end_month)
             
             # Az `end_month` az a hónap, amit a felhasználó kiválasztott, azaz a `current_fiscal_month`
-            end_date_full_month = self._convert_fiscal_month(end_month) 
-            
-            # A 12 hónapos periódus `current_period_start_month`-tól `end_month`-ig tart
-            current_period_start_month = self._subtract_fiscal_months(end_month, 11) 
-            current_period_start_date = self._convert_fiscal_month(current_period_start_month)
-
-            # A Baseline időszak ugyanaz, mint a jövőbeli predikció esetén: 12 hónappal korábbi
-            baseline_start_month = self._subtract_fiscal_months(current_period_start_month, 12)
-            baseline_end_month = self._subtract_fiscal_months(end_month, 12)
-            
-            baseline_start_date = self._convert_fiscal_month(baseline_start_month)
-            baseline_end_date = self._convert_fiscal_month(baseline_end_month)
-            
-            # --- Adatok szűrése és aggregálása ---
-
-            # ACV/TCV EXISTING: már meglévő booking-ok az aktuális 12 hónapos periódusban,
-            # DE CSAK az utolsó adatpont dátumáig bezárólag!
-            # Azaz a már lekönyvelt adatok az aktuális hónapban (is).
-            acv_existing_mask = (self.acv_df['Date'] >= current_period_start_date) & (self.acv_df['Date'] <= self.last_data_point_date)
-            tcv_existing_mask = (self.tcv_df['Date'] >= current_period_start_date) & (self.tcv_df['Date'] <= self.last_data_point_date)
-            
-            # ACV/TCV BASELINE: egy évvel korábbi, teljes 12 hónapos időszak
-            acv_baseline_mask = (self.acv_df['Date'] >= baseline_start_date) & (self.acv_df['Date'] <= baseline_end_date)
-            tcv_baseline_mask = (self.tcv_df['Date'] >= baseline_start_date) & (self.tcv_df['Date'] <= baseline_end_date)
-            
-            # Architektúra szűrés
-            if architecture:
-                if isinstance(architecture, list):
-                    acv_existing_mask &= (self.acv_df['Architecture'].isin(architecture))
-                    acv_baseline_mask &= (self.acv_df['Architecture'].isin(architecture))
-                    tcv_existing_mask &= (self.tcv_df['Architecture'].isin(architecture))
-                    tcv_baseline_mask &= (self.tcv_df['Architecture'].isin(architecture))
-                else:
-                    acv_existing_mask &= (self.acv_df['Architecture'] == architecture)
-                    acv_baseline_mask &= (self.acv_df['Architecture'] == architecture)
-                    tcv_existing_mask &= (self.tcv_df['Architecture'] == architecture)
-                    tcv_baseline_mask &= (self.tcv_df['Architecture'] == architecture)
-
-            # Aggregálás
-            acv_existing = self._aggregate_data(self.acv_df[acv_existing_mask], self.acv_value_column)
-            acv_baseline = self._aggregate_data(self.acv_df[acv_baseline_mask], self.acv_value_column)
-            tcv_existing = self._aggregate_data(self.tcv_df[tcv_existing_mask], self.tcv_value_column)
-            tcv_baseline = self._aggregate_data(self.tcv_df[tcv_baseline_mask], self.tcv_value_column)
-
-            # Index-alapú target-ek számítása
-            acv_index_targets = self._calculate_index_targets(acv_baseline)
-            tcv_index_targets = self._calculate_index_targets(tcv_baseline)
-
-            # Szükséges booking-ok számítása minden index szinthez (a meglévő adatok és a targetek alapján)
-            acv_needed_by_index = self._calculate_needed_by_index(acv_existing, acv_index_targets)
-            tcv_needed_by_index = self._calculate_needed_by_index(tcv_existing, tcv_index_targets)
-
-            return {
-                'acv_current': acv_existing,  # Már meglévő booking az aktuális hónapig
-                'acv_baseline': acv_baseline,  # Baseline (egy évvel korábbi)
-                'acv_index_targets': acv_index_targets,  # Target-ek index szintenként
-                'acv_needed_by_index': acv_needed_by_index,  # Szükséges booking index-enként
-                'tcv_current': tcv_existing,
-                'tcv_baseline': tcv_baseline,
-                'tcv_index_targets': tcv_index_targets,
-                'tcv_needed_by_index': tcv_needed_by_index,
-                'analysis_type': 'current_month_prediction', # Új mező
-                'period_info': {
-                    'future_start': current_period_start_date.strftime('%Y-%m'),
-                    'future_end': end_date_full_month.strftime('%Y-%m') + " (aktuális hónap vége)", # pontosabb leírás
-                    'baseline_start': baseline_start_date.strftime('%Y-%m'),
-                    'baseline_end': baseline_end_date.strftime('%Y-%m'),
-                    'future_start_fiscal': current_period_start_month,
-                    'future_end_fiscal': end_month,
-                    'baseline_start_fiscal': baseline_start_month,
-                    'baseline_end_fiscal': baseline_end_month,
-                    'selected_architectures': architecture if architecture else 'Összes',
-                    'last_data_point': self.last_data_point_date.strftime('%Y-%m-%d') # Fontos infó
-                }
-            }
+            end_period = FiscalPeriod.from_label(end_month)
+            return self._get_windowed_prediction('current_month_prediction', end_month, end_period, architecture)
 
         except Exception as e:
-            print(f"Aktuális hónap elemzési hiba: {e}")
-            return {'acv_current': {}, 'acv_baseline': {}, 'tcv_current': {}, 'tcv_baseline': {}, 'period_info': {}}
+            logger.error("Aktuális hónap elemzési hiba: %s", e)
+            return self._empty_result('current', 'baseline')
 
     def _get_prediction_analysis(self, end_month, architecture=None):
         """Predikciós elemzés INDEX-ALAPÚ TARGET-EKKEL"""
         try:
-            print(f"🔮 Predikciós elemzés index-alapú target-ekkel: {end_month}")
-            end_date = self._convert_fiscal_month(end_month)
-            future_start_month = self._subtract_fiscal_months(end_month, 11)
-            future_start_date = self._convert_fiscal_month(future_start_month)
+            logger.debug("🔮 Predikciós elemzés index-alapú target-ekkel: %s", end_month)
+            end_period = FiscalPeriod.from_label(end_month)
+            return self._get_windowed_prediction('future_prediction', end_month, end_period, architecture)
 
-            # Az aktuális időszakban már meglévő booking-ok (a current_fiscal_month-ig)
-            current_date = self._convert_fiscal_month(self.current_fiscal_month)
-            
-            # Baseline időszak (egy évvel korábbi ugyanezen időszak)
-            baseline_start_month = self._subtract_fiscal_months(future_start_month, 12)
-            baseline_end_month = self._subtract_fiscal_months(end_month, 12)
-            baseline_start_date = self._convert_fiscal_month(baseline_start_month)
-            baseline_end_date = self._convert_fiscal_month(baseline_end_month)
-
-            # Jövőbeli időszakban már meglévő booking-ok (a kiválasztott jövőbeli időszakban, de csak a mai napig)
-            acv_future_mask = (self.acv_df['Date'] >= future_start_date) & (self.acv_df['Date'] <= self.last_data_point_date)
-            tcv_future_mask = (self.tcv_df['Date'] >= future_start_date) & (self.tcv_df['Date'] <= self.last_data_point_date)
-
-            # Baseline időszak (referencia)
-            acv_baseline_mask = (self.acv_df['Date'] >= baseline_start_date) & (self.acv_df['Date'] <= baseline_end_date)
-            tcv_baseline_mask = (self.tcv_df['Date'] >= baseline_start_date) & (self.tcv_df['Date'] <= baseline_end_date)
-
-            # Architektúra szűrés
-            if architecture:
-                if isinstance(architecture, list):
-                    acv_future_mask &= (self.acv_df['Architecture'].isin(architecture))
-                    acv_baseline_mask &= (self.acv_df['Architecture'].isin(architecture))
-                    tcv_future_mask &= (self.tcv_df['Architecture'].isin(architecture))
-                    tcv_baseline_mask &= (self.tcv_df['Architecture'].isin(architecture))
-                else:
-                    acv_future_mask &= (self.acv_df['Architecture'] == architecture)
-                    acv_baseline_mask &= (self.acv_df['Architecture'] == architecture)
-                    tcv_future_mask &= (self.tcv_df['Architecture'] == architecture)
-                    tcv_baseline_mask &= (self.tcv_df['Architecture'] == architecture)
-
-            # Aggregálás
-            acv_existing = self._aggregate_data(self.acv_df[acv_future_mask], self.acv_value_column)
-            acv_baseline = self._aggregate_data(self.acv_df[acv_baseline_mask], self.acv_value_column)
-            tcv_existing = self._aggregate_data(self.tcv_df[tcv_future_mask], self.tcv_value_column)
-            tcv_baseline = self._aggregate_data(self.tcv_df[tcv_baseline_mask], self.tcv_value_column)
-
-            # Index-alapú target-ek számítása
-            acv_index_targets = self._calculate_index_targets(acv_baseline)
-            tcv_index_targets = self._calculate_index_targets(tcv_baseline)
-
-            # Szükséges booking-ok számítása minden index szinthez
-            acv_needed_by_index = self._calculate_needed_by_index(acv_existing, acv_index_targets)
-            tcv_needed_by_index = self._calculate_needed_by_index(tcv_existing, tcv_index_targets)
-
-            return {
-                'acv_current': acv_existing,  # Már meglévő booking
-                'acv_baseline': acv_baseline,  # Baseline (egy évvel korábbi)
-                'acv_index_targets': acv_index_targets,  # Target-ek index szintenként
-                'acv_needed_by_index': acv_needed_by_index,  # Szükséges booking index-enként
-                'tcv_current': tcv_existing,
-                'tcv_baseline': tcv_baseline,
-                'tcv_index_targets': tcv_index_targets,
-                'tcv_needed_by_index': tcv_needed_by_index,
-                'analysis_type': 'future_prediction', # Új mező
-                'period_info': {
-                    'future_start': future_start_date.strftime('%Y-%m'),
-                    'future_end': end_date.strftime('%Y-%m'),
-                    'baseline_start': baseline_start_date.strftime('%Y-%m'),
-                    'baseline_end': baseline_end_date.strftime('%Y-%m'),
-                    'future_start_fiscal': future_start_month,
-                    'future_end_fiscal': end_month,
-                    'baseline_start_fiscal': baseline_start_month,
-                    'baseline_end_fiscal': baseline_end_month,
-                    'selected_architectures': architecture if architecture else 'Összes',
-                    'last_data_point': self.last_data_point_date.strftime('%Y-%m-%d') # Fontos infó
-                }
+        except Exception as e:
+            logger.error("Predikciós elemzési hiba: %s", e)
+            return self._empty_result('current', 'baseline')
+
+    def _get_windowed_prediction(self, analysis_type, end_month, end_period, architecture=None):
+        """Aktuális hónap / jövőbeli predikció ablakainak összesítése a havi kockákból.
+
+        EXISTING: már meglévő booking-ok az aktuális 12 hónapos periódusban, DE CSAK az utolsó
+        adatpont dátumáig bezárólag; BASELINE: egy évvel korábbi, teljes 12 hónapos időszak.
+        """
+        analysis_windows = self._analysis_windows(analysis_type, end_period)
+        windows = self._metric_windows(analysis_windows, architecture)
+        deal_sizes = self._deal_size_windows(analysis_windows, architecture)
+        return self._prediction_result(analysis_type, end_month, end_period, architecture, windows, deal_sizes)
+
+    def _prediction_result(self, analysis_type, end_month, end_period, architecture, windows, deal_sizes):
+        future_start = end_period - 11
+        # Baseline időszak (egy évvel korábbi ugyanezen időszak)
+        baseline_start = future_start - 12
+        baseline_end = end_period - 12
+        grid = self.index_grid
+
+        result = {}
+        for key, (existing, baseline) in windows.items():
+            # Index-alapú target-ek (architektúra × szint mátrix) és a szükséges booking-ok minden index szinthez
+            architectures, targets = self._calculate_index_targets(baseline)
+            needed = self._calculate_needed_by_index(existing, architectures, targets)
+            result[f'{key}_current'] = existing  # Már meglévő booking
+            result[f'{key}_baseline'] = baseline  # Baseline (egy évvel korábbi)
+            result[f'{key}_index_targets'] = grid.to_dict(architectures, targets)  # Target-ek index szintenként
+            result[f'{key}_needed_by_index'] = grid.to_dict(architectures, needed)  # Szükséges booking index-enként
+            result[f'{key}_current_index'] = self._calculate_current_index(existing, baseline)
+
+        future_end = end_period.iso_month
+        if analysis_type == 'current_month_prediction':
+            future_end += " (aktuális hónap vége)" # pontosabb leírás
+
+        return {
+            **result,
+            'metrics': [metric.describe() for metric in self.active_metrics()],
+            'deal_sizes_current': deal_sizes[0],  # Már meglévő deal-ek méret eloszlása
+            'deal_sizes_baseline': deal_sizes[1],
+            'deal_size_grid': self.deal_sizes.describe(),
+            'index_grid': {
+                'labels': dict(zip(grid.levels, grid.labels)),
+                'highlight_levels': grid.highlight_levels,
+            },
+            'analysis_type': analysis_type, # Új mező
+            'period_info': {
+                'future_start': future_start.iso_month,
+                'future_end': future_end,
+                'baseline_start': baseline_start.iso_month,
+                'baseline_end': baseline_end.iso_month,
+                'future_start_fiscal': future_start.label,
+                'future_end_fiscal': end_month,
+                'baseline_start_fiscal': baseline_start.label,
+                'baseline_end_fiscal': baseline_end.label,
+                'selected_architectures': architecture if architecture else 'Összes',
+                'last_data_point': self.last_data_point_date.strftime('%Y-%m-%d') # Fontos infó
             }
+        }
 
+    def _calculate_index_targets(self, baseline_data):
+        """Index-alapú target mátrix (architektúra × szint) az index rács szerint: (architektúrák, mátrix)"""
+        try:
+            architectures = list(baseline_data)
+            baselines = [float(value) if value is not None else 0 for value in baseline_data.values()]
+            return architectures, self.index_grid.targets(architectures, baselines)
         except Exception as e:
-            print(f"Predikciós elemzési hiba: {e}")
-            return {'acv_current': {}, 'acv_baseline': {}, 'tcv_current': {}, 'tcv_baseline': {}, 'period_info': {}}
+            logger.error("Index target számítási hiba: %s", e)
+            return [], np.empty((0, len(self.index_grid.levels)))
 
-    def _calculate_index_targets(self, baseline_data):
-        """Index-alapú target-ek számítása minden architektúrához - JAVÍTOTT SZÁZALÉKOS NÖVEKEDÉS"""
+    def _calculate_needed_by_index(self, existing_data, architectures, targets):
+        """Szükséges booking mátrix minden index szinthez (a target mátrix soraival azonos sorrendben)"""
         try:
-            index_targets = {}
-            for arch, baseline_value in baseline_data.items():
-                baseline_value = float(baseline_value) if baseline_value is not None else 0
-                arch_targets = {}
-                
-                # Index 0-10 target-ek számítása
-                for index in range(11):  # 0-10
-                    if baseline_value != 0:
-                        if index == 10:
-                            # Index 10: >9% növekedés, vegyük 10%-nak
-                            growth_rate = 0.10
-                        else:
-                            # Index 0-9: pontosan az index százaléka
-                            growth_rate = index / 100
-                        
-                        target_value = baseline_value * (1 + growth_rate)
-                    else:
-                        # Ha a baseline 0, a target is 0, kivéve ha az index 0.
-                        # De egy 0 baseline esetén a 0-nál nagyobb target irreális.
-                        # Most maradunk a 0-nál.
-                        target_value = 0 
-                    
-                    arch_targets[index] = target_value
-                
-                index_targets[arch] = arch_targets
-                
-            return index_targets
-            
+            existing = [float(existing_data.get(arch, 0)) for arch in architectures]
+            return self.index_grid.needed(existing, targets)
         except Exception as e:
-            print(f"Index target számítási hiba: {e}")
-            return {}
+            logger.error("Szükséges booking index számítási hiba: %s", e)
+            return np.zeros_like(targets)
 
-    def _calculate_needed_by_index(self, existing_data, index_targets):
-        """Szükséges booking számítása minden index szinthez"""
+    def _calculate_current_index(self, existing_data, baseline_data):
+        """Jelenlegi index szint architektúránként (a meglévő és a baseline érték alapján)"""
         try:
-            needed_by_index = {}
-            
-            for arch in index_targets.keys():
-                existing_value = float(existing_data.get(arch, 0))
-                arch_needed = {}
-                
-                for index, target_value in index_targets[arch].items():
-                    needed = max(0, target_value - existing_value)
-                    arch_needed[index] = needed
-                
-                needed_by_index[arch] = arch_needed
-                
-            return needed_by_index
-        
+            architectures = sorted(set(existing_data).union(baseline_data))
+            existing = [float(existing_data.get(arch) or 0) for arch in architectures]
+            baselines = [float(baseline_data.get(arch) or 0) for arch in architectures]
+            levels = self.index_grid.current_levels(architectures, existing, baselines)
+            return dict(zip(architectures, levels.tolist()))
         except Exception as e:
-            print(f"Szükséges booking index számítási hiba: {e}")
+            logger.error("Jelenlegi index számítási hiba: %s", e)
             return {}
 
-    def _aggregate_data(self, df, value_column):
-        """Adatok összesítése architektúra szerint - ÖSSZEVONT ARCHITEKTÚRÁKKAL"""
+    @staticmethod
+    def _clean_value_column(series):
+        """String érték oszlop ($, vessző, szóköz) tisztítása numerikussá"""
+        if not pd.api.types.is_numeric_dtype(series):
+            series = series.astype(str).str.replace('$', '', regex=False)
+            series = series.str.replace(',', '', regex=False)
+            series = series.str.replace(' ', '', regex=False)
+            series = series.replace('', '0')
+            series = pd.to_numeric(series, errors='coerce').fillna(0)
+        return series
+
+    def _aggregate_window(self, cube, start_period, end_period, architecture=None):
+        """Időablak [start_period, end_period] összesítése architektúra szerint a havi kockából"""
         try:
-            if df.empty or value_column is None:
-                print("❌ Üres DataFrame vagy hiányzó érték oszlop")
-                return {}
-            
-            df = df.copy()
-            
-            # Ha az érték oszlop nem létezik
-            if value_column not in df.columns:
-                print(f"❌ Érték oszlop nem található: {value_column}")
+            aggregated = cube.window(start_period, end_period, architecture)
+            if not aggregated:
+                logger.debug("❌ Nincs adat a megadott időablakban")
                 return {}
-            
-            # STRING ÉRTÉKEK TISZTÍTÁSA
-            if df[value_column].dtype == 'object':
-                df[value_column] = df[value_column].astype(str).str.replace('$', '', regex=False)
-                df[value_column] = df[value_column].str.replace(',', '', regex=False)
-                df[value_column] = df[value_column].str.replace(' ', '', regex=False)
-                df[value_column] = df[value_column].replace('', '0')
-                df[value_column] = pd.to_numeric(df[value_column], errors='coerce').fillna(0)
-            
-            # Összesítés architektúra szerint (NETWORKING* és SERVICES már összevonva a mappingben)
-            aggregated = df.groupby('Architecture')[value_column].sum().to_dict()
-            aggregated['Összes'] = df[value_column].sum()
-            
-            print(f"✅ Aggregálva: {len(aggregated)} architektúra")
-            for arch, value in aggregated.items():
-                print(f"   📊 {arch}: {value:,.0f}")
-            
+
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("✅ Aggregálva: %s architektúra", len(aggregated))
+                for arch, value in aggregated.items():
+                    logger.debug("   📊 %s: %s", arch, f"{value:,.0f}")
+
             return aggregated
         except Exception as e:
-            print(f"Aggregálási hiba: {e}")
+            logger.error("Aggregálási hiba: %s", e)
             return {}
 
+
+def compact_from_env():
+    """A BOOKING_ANALYZER_COMPACT-ban megadott kompakt mód ('1' / 'true' / 'yes' -> True, 'float32'), egyébként None"""
+    value = os.environ.get(COMPACT_ENV, '').lower()
+    if value in COMPACT_VALUE_DTYPES:
+        return value
+    return True if value in ('1', 'true', 'yes') else None
+
 if __name__ == "__main__":
     print("✅ data_processor.py sikeresen betöltve!")
     print("✅ BookingAnalyzer osztály elérhető predikciós funkcionalitással!")
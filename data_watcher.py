@@ -0,0 +1,103 @@
+import copy
+import os
+import threading
+from collections import namedtuple
+from datetime import datetime
+
+from data_processor import BookingAnalyzer
+from log_config import get_logger
+
+logger = get_logger(__name__)
+
+# Egy betöltött állapot: a renderelés végig ugyanazt a példányt használja
+AnalyzerSnapshot = namedtuple('AnalyzerSnapshot', ['version', 'analyzer', 'loaded_at', 'fingerprints'])
+
+
+def file_fingerprint(path):
+    """Lokális fájl ujjlenyomata: (abszolút útvonal, méret, módosítási idő ns)"""
+    stat = os.stat(path)
+    return (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+
+
+class DataWatcher:
+    """ACV/TCV fájlok figyelése háttérszálon, az analyzer állapot atomikus cseréjével.
+
+    Változáskor a jelenlegi snapshot másolatán fut a refresh (hozzáfűzésnél inkrementális,
+    egyébként teljes újraépítés), majd egyetlen referencia-cserével kerül élesbe.
+    A futó renderelések a korábban lekért snapshotot használják tovább.
+    """
+
+    def __init__(self, acv_file_path, tcv_file_path, interval=5.0, schema=None, backend=None, compact=None,
+                 hierarchy=None):
+        self.acv_file_path = acv_file_path
+        self.tcv_file_path = tcv_file_path
+        self.interval = interval
+        self.last_error = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        # Első betöltés szinkron: enélkül nincs mit megjeleníteni
+        fingerprints = self._fingerprints()
+        analyzer = BookingAnalyzer(acv_file_path=acv_file_path, tcv_file_path=tcv_file_path, schema=schema,
+                                   backend=backend, compact=compact, hierarchy=hierarchy)
+        self._snapshot = AnalyzerSnapshot(1, analyzer, datetime.now(), fingerprints)
+
+    def _fingerprints(self):
+        return (file_fingerprint(self.acv_file_path), file_fingerprint(self.tcv_file_path))
+
+    @staticmethod
+    def _verified(analyzer, fingerprints):
+        """A refresh hash ellenőrzése pontosan az ujjlenyomatban látott fájlméreteket fedte-e le"""
+        offsets = analyzer.ingested_offsets()
+        return [offsets.get(name) for name in BookingAnalyzer.SOURCES] == [size for _, size, _ in fingerprints]
+
+    def snapshot(self):
+        """Az aktuális snapshot - egy renderelésen belül egyszer kérjük le"""
+        return self._snapshot
+
+    def start(self):
+        """Háttérszál indítása (daemon, többszöri hívás esetén csak egyszer indul)"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="booking-data-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            self.check_now()
+
+    def check_now(self):
+        """Egy ellenőrzési kör: változás esetén új snapshot építése és cseréje. Visszaadja, történt-e csere."""
+        current = self._snapshot
+        try:
+            fingerprints = self._fingerprints()
+            if fingerprints == current.fingerprints:
+                return False
+
+            logger.info("🔄 Fájlváltozás észlelve, újratöltés (snapshot v%s)...", current.version)
+            analyzer = copy.copy(current.analyzer)
+            status = analyzer.refresh()
+            if status == 'unchanged':
+                if self._verified(analyzer, fingerprints):
+                    # Csak az mtime változott (pl. touch), a tartalom teljes hash-sel egyezik: verzióváltás nélkül
+                    self._snapshot = current._replace(fingerprints=fingerprints)
+                    return False
+                # Az ellenőrzés nem a most látott fájlméretekre vonatkozott: az ujjlenyomatot nem
+                # vesszük át ellenőrizetlenül (különben a változás sosem kerülne újra sorra), újraépítünk
+                logger.info("🔁 Nem ellenőrzött egyezés, teljes újraépítés")
+                status = analyzer.refresh(rebuild=True)
+            self._snapshot = AnalyzerSnapshot(current.version + 1, analyzer, datetime.now(), fingerprints)
+            self.last_error = None
+            logger.info("✅ Snapshot v%s élesítve (%s)", current.version + 1, status)
+            return True
+        except Exception as e:
+            # Hibás / félkész fájlnál a régi snapshot marad érvényben
+            self.last_error = str(e)
+            logger.error("❌ Újratöltési hiba, a v%s snapshot marad: %s", current.version, e)
+            return False
@@ -0,0 +1,69 @@
+import numpy as np
+
+
+class DealSizeGrid:
+    """T-shirt méret kategóriák az egyes deal-ek (booking sorok) értékére.
+
+    A határok felső korlátok (<=): az első kategória a legelső határig tart, az utolsó
+    a legfelső határ feletti értékeké. A besorolás a teljes érték oszlopra egyetlen
+    np.searchsorted; a hiányzó érték 0-ként (a legalsó kategóriában) számít.
+    """
+
+    def __init__(self, bounds, labels, icons=None, source='TCV', metric='tcv'):
+        self.bounds = np.asarray(bounds, dtype=np.float64)
+        if self.bounds.ndim != 1 or np.any(np.diff(self.bounds) <= 0):
+            raise ValueError("❌ A méret határoknak szigorúan növekvő sorrendben kell lenniük")
+        if len(labels) != len(self.bounds) + 1:
+            raise ValueError(f"❌ {len(self.bounds)} határhoz {len(self.bounds) + 1} méret címke kell")
+        self.labels = list(labels)
+        self.icons = list(icons) if icons is not None else [''] * len(self.labels)
+        # A besorolt forrás fájl és a megjelenítésnél hozzá tartozó metrika
+        self.source = source
+        self.metric = metric
+
+    @classmethod
+    def default(cls):
+        """XS: <=2M, S: 2-10M, M: 10-25M, L: 25-100M, XL: >100M (TCV, USD)"""
+        return cls([2_000_000, 10_000_000, 25_000_000, 100_000_000], ['XS', 'S', 'M', 'L', 'XL'],
+                   icons=['🔴', '🟠', '🟡', '🟢', '🔵'])
+
+    def classify(self, values):
+        """Kategória kódok (0 .. len(labels) - 1) egy érték tömbre"""
+        values = np.nan_to_num(np.asarray(values, dtype=np.float64), nan=0.0)
+        return np.searchsorted(self.bounds, values, side='left')
+
+    def label_for(self, value):
+        """Egyetlen érték kategóriája"""
+        return self.labels[int(self.classify([value])[0])]
+
+    @property
+    def columns(self):
+        """Az aggregátumok kategóriánkénti (összeg, darabszám) oszlopai"""
+        return [(f'Size {label}', f'Size {label} count') for label in self.labels]
+
+    @staticmethod
+    def cube_key(label):
+        """A kategória havi kockájának kulcsa (a metrika kulcsoktól elkülönítve)"""
+        return f'size:{label}'
+
+    def indicator_columns(self, values):
+        """Soronkénti kategória oszlopok: az érték a saját kategóriája összeg oszlopában, 1 a darabszám oszlopában.
+
+        Ezek (nyers architektúra, period) szerinti összegei adják a havi méret eloszlást.
+        """
+        values = np.nan_to_num(np.asarray(values, dtype=np.float64), nan=0.0)
+        codes = self.classify(values)
+        columns = {}
+        for level, (value_column, count_column) in enumerate(self.columns):
+            hit = codes == level
+            columns[value_column] = np.where(hit, values, 0.0)
+            columns[count_column] = hit.astype(np.int64)
+        return columns
+
+    def to_dict(self):
+        """A feldolgozást befolyásoló leírás (a lemezes cache kulcs része)"""
+        return {'bounds': self.bounds.tolist(), 'labels': self.labels, 'source': self.source}
+
+    def describe(self):
+        """Megjelenítési leírás az eredmény dict-be"""
+        return {**self.to_dict(), 'icons': self.icons, 'metric': self.metric}
@@ -0,0 +1,234 @@
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+# A lebontási szintek (CSV oszlopnevek, pl. 'Sub-architecture > Region > Customer') az apphoz és a parancssori eszközökhöz
+HIERARCHY_ENV = 'BOOKING_ANALYZER_HIERARCHY'
+
+# A hierarchia gyökere mindig a (mapping utáni) architektúra
+ROOT_LEVEL = 'Architecture'
+
+# Hiányzó szint érték címkéje (a lebontásban külön sorként jelenik meg)
+MISSING_LABEL = '(nincs megadva)'
+
+
+class DrillHierarchy:
+    """Lebontási hierarchia az Architecture alatt (pl. Sub-architecture → Region → Customer).
+
+    A szintek a CSV oszlopnevei, a gyökér mindig a mapping utáni Architecture. Egy forrásban
+    a szintek folytonosan meglévő előtagja használható: ha egy szint oszlopa hiányzik
+    (pl. a TCV fájlban nincs Customer), a forrás lebontása az előző szintnél véget ér.
+    """
+
+    def __init__(self, levels):
+        levels = [level for level in levels if level != ROOT_LEVEL]
+        if not levels:
+            raise ValueError("❌ A hierarchiához legalább egy szint kell az Architecture alatt")
+        if len(set(levels)) != len(levels):
+            raise ValueError(f"❌ Ismétlődő hierarchia szint: {levels}")
+        self.levels = list(levels)
+
+    @classmethod
+    def parse(cls, text):
+        """Szintek szövegből: vesszővel, '>' vagy '→' jellel elválasztva (az 'Architecture' gyökér elhagyható)"""
+        return cls([level.strip() for level in re.split(r'[,>→]', text) if level.strip()])
+
+    @staticmethod
+    def cube_key(source):
+        """A forrás rollup kockájának kulcsa (a metrika és deal méret kulcsoktól elkülönítve)"""
+        return f'rollup:{source}'
+
+    def present_levels(self, columns):
+        """A szintek folytonos előtagja, amelynek oszlopai szerepelnek (az első hiányzó szintnél megáll)"""
+        present = []
+        for level in self.levels:
+            if level not in columns:
+                break
+            present.append(level)
+        return present
+
+    def to_dict(self):
+        """A feldolgozást befolyásoló leírás (a lemezes cache kulcs része)"""
+        return {'levels': self.levels}
+
+
+def normalize_level_column(series):
+    """Szint oszlop categorical string címkékre, a hiányzó érték MISSING_LABEL.
+
+    A kategóriákon dolgozik (nem soronként); az egész értékű float oszlop (pl. hiányzó
+    értékes ügyfél azonosító) egész címkéket kap, mint az Arrow backendnél.
+    """
+    if pd.api.types.is_float_dtype(series.dtype):
+        values = series.dropna()
+        if np.array_equal(values, np.round(values)):
+            series = series.astype('Int64')
+    categorical = series.astype('category')
+    labels = [str(category) for category in categorical.cat.categories]
+    if len(set(labels)) == len(labels):
+        categorical = categorical.cat.rename_categories(labels)
+    else:
+        categorical = categorical.astype(str).where(series.notna()).astype('category')
+    if categorical.isna().any():
+        if MISSING_LABEL not in categorical.cat.categories:
+            categorical = categorical.cat.add_categories([MISSING_LABEL])
+        categorical = categorical.fillna(MISSING_LABEL)
+    return categorical
+
+
+class RollupCube:
+    """Egy forrás lebontási rollup-jai: szintenként (mapped architektúra, szint címkék) csomópont × fiscal period,
+    metrikánként prefix összegekkel.
+
+    A levél cellák a (nyers architektúra, szintek, period) szerinti aggregátumok; a mapping
+    változásakor csak ezek összegződnek újra (mint a MonthlyCube.apply_mapping). Egy csomópont
+    (pl. egy ügyfél) csak néhány hónapban foglal, ezért a cellák nem sűrű mátrixban, hanem
+    (csomópont, period) szerint rendezve állnak egy kumulált tömbbel: egy ablak összege
+    csomópontonként két searchsorted pozíció különbsége, egy sor kibontása pedig a szülő
+    gyerekeinek előre összegyűjtött csomópontjain fut.
+    """
+
+    def __init__(self, levels, cells, measures, architecture_mapping=None):
+        self.levels = list(levels)
+        # Metrika kulcsok; a cellákban ilyen nevű érték oszlopok és a közös Count (booking sorok) áll
+        self.measures = list(measures)
+        # Levél cellák: ArchitectureRaw, szintek, FiscalPeriod, mértékek, Count
+        self.cells = cells
+        self.apply_mapping(architecture_mapping or {})
+
+    @classmethod
+    def from_aggregates(cls, aggregates, levels, measure_columns, architecture_mapping=None):
+        """Kocka a (nyers architektúra, szintek, period) aggregátumokból; measure_columns: {metrika kulcs: oszlop}.
+
+        A hiányzó architektúrájú sorok kimaradnak (nincs olyan tábla sor, amit kibontanánk).
+        """
+        aggregates = aggregates[aggregates['ArchitectureRaw'].notna()]
+        cells = pd.DataFrame({
+            'ArchitectureRaw': aggregates['ArchitectureRaw'].astype(object).astype('category'),
+            **{level: aggregates[level].astype('category') for level in levels},
+            'FiscalPeriod': aggregates['FiscalPeriod'].to_numpy(dtype=np.int64),
+            **{key: aggregates[column].to_numpy(dtype=np.float64) for key, column in measure_columns.items()},
+            'Count': aggregates['Count'].to_numpy(dtype=np.int64),
+        }).reset_index(drop=True)
+        return cls(levels, cells, list(measure_columns), architecture_mapping)
+
+    def merge(self, other):
+        """Új kocka a két kocka levél celláinak összegével (hozzáfűzött sorok inkrementális feldolgozásához)"""
+        keys = ['ArchitectureRaw', *self.levels, 'FiscalPeriod']
+        combined = pd.concat([self.cells.astype({column: object for column in keys[:-1]}),
+                              other.cells.astype({column: object for column in keys[:-1]})], ignore_index=True)
+        cells = combined.groupby(keys, observed=True)[[*self.measures, 'Count']].sum().reset_index()
+        cells = cells.astype({column: 'category' for column in keys[:-1]})
+        return RollupCube(self.levels, cells, self.measures, self.architecture_mapping)
+
+    def to_state(self):
+        """A levél cellák JSON-kompatibilis állapota (lemezes cache-hez)"""
+        return {
+            'levels': self.levels,
+            'measures': self.measures,
+            'cells': {column: self.cells[column].tolist() for column in self.cells.columns},
+        }
+
+    @classmethod
+    def from_state(cls, state, architecture_mapping=None):
+        """Kocka visszaállítása a to_state() kimenetéből"""
+        cells = pd.DataFrame(state['cells'], columns=['ArchitectureRaw', *state['levels'], 'FiscalPeriod',
+                                                      *state['measures'], 'Count'])
+        cells = cells.astype({'ArchitectureRaw': 'category', **{level: 'category' for level in state['levels']},
+                              'FiscalPeriod': np.int64, 'Count': np.int64,
+                              **{key: np.float64 for key in state['measures']}})
+        return cls(state['levels'], cells, state['measures'], architecture_mapping)
+
+    def apply_mapping(self, architecture_mapping):
+        """Csomópontok és prefix összegek újraépítése minden szintre a mapping szerinti architektúrákkal"""
+        self.architecture_mapping = dict(architecture_mapping)
+        # Átcímkézés csak a kategóriákon (mint a BookingAnalyzer._map_architecture_categories)
+        raw = self.cells['ArchitectureRaw']
+        mapped_labels = [self.architecture_mapping.get(arch, arch) for arch in raw.cat.categories]
+        mapped_categories = sorted(set(mapped_labels), key=str)
+        lookup = pd.Index(mapped_categories).get_indexer(mapped_labels)
+        mapped = pd.Categorical.from_codes(lookup[raw.cat.codes.to_numpy()], categories=mapped_categories)
+        self._rollups = [self._rollup(mapped, depth) for depth in range(1, len(self.levels) + 1)]
+
+    def _rollup(self, mapped, depth):
+        """Egy szint (depth: 1 = az Architecture alatti első szint) csomópontjai, rendezett cellái és prefix összegei"""
+        keys = [ROOT_LEVEL, *self.levels[:depth]]
+        measures = [*self.measures, 'Count']
+        frame = self.cells[[*self.levels[:depth], 'FiscalPeriod', *measures]].assign(**{ROOT_LEVEL: mapped})
+        grouped = frame.groupby([*keys, 'FiscalPeriod'], observed=True, sort=True)[measures].sum()
+
+        # A rendezés miatt egy csomópont cellái egymás után, period szerint növekvő sorrendben állnak
+        paths = grouped.index.droplevel('FiscalPeriod')
+        node_codes, nodes = pd.factorize(paths)
+        periods = grouped.index.get_level_values('FiscalPeriod').to_numpy(dtype=np.int64)
+        start = int(periods.min()) if len(periods) else 0
+        span = int(periods.max()) - start + 1 if len(periods) else 1
+
+        # Prefix összegek egy vezető nulla sorral: ablak = cum[hi] - cum[lo]
+        cum_values = np.zeros((len(grouped) + 1, len(self.measures)))
+        cum_values[1:] = np.cumsum(grouped[self.measures].to_numpy(dtype=np.float64), axis=0)
+        cum_counts = np.zeros(len(grouped) + 1, dtype=np.int64)
+        cum_counts[1:] = np.cumsum(grouped['Count'].to_numpy(dtype=np.int64))
+
+        # Szülő út (architektúra, ..., előző szint) -> a gyerek csomópontok
+        node_frame = pd.DataFrame(list(nodes), columns=keys) if len(nodes) else pd.DataFrame(columns=keys)
+        children = {}
+        for parent, positions in node_frame.groupby(keys[:-1], sort=False).indices.items():
+            children[parent if isinstance(parent, tuple) else (parent,)] = positions.astype(np.int64)
+        return {
+            'labels': node_frame[keys[-1]].to_numpy(dtype=object),
+            'keys': node_codes.astype(np.int64) * span + (periods - start),
+            'start': start,
+            'span': span,
+            'cum_values': cum_values,
+            'cum_counts': cum_counts,
+            'children': children,
+        }
+
+    def children_windows(self, path, start_ordinals, end_ordinals):
+        """Egy csomópont (architektúra, szint 1 címke, ...) gyerekeinek összegei több [start, end] ablakra.
+
+        Visszatérés: {metrika kulcs: [gyerek címke -> érték, plusz 'Összes'] ablakonként};
+        az ablakban foglalás nélküli gyerek kimarad, üres ablak {}. Ismeretlen útnál,
+        vagy ha a path már a legalsó szint, minden ablak üres.
+        """
+        empty = {key: [{} for _ in start_ordinals] for key in self.measures}
+        path = tuple(path)
+        if not 1 <= len(path) <= len(self.levels):
+            return empty
+        rollup = self._rollups[len(path) - 1]
+        nodes = rollup['children'].get(path)
+        if nodes is None:
+            return empty
+
+        # Csomópontonként a [lo, hi) period eltolások cella pozíciói (a hi = span a következő csomópont eleje)
+        start, span = rollup['start'], rollup['span']
+        lo = np.clip(np.asarray(start_ordinals, dtype=np.int64) - start, 0, span)
+        hi = np.maximum(np.clip(np.asarray(end_ordinals, dtype=np.int64) - start + 1, 0, span), lo)
+        base = nodes[:, None] * span
+        lo_positions = np.searchsorted(rollup['keys'], base + lo, side='left')
+        hi_positions = np.searchsorted(rollup['keys'], base + hi, side='left')
+        values = rollup['cum_values'][hi_positions] - rollup['cum_values'][lo_positions]
+        counts = rollup['cum_counts'][hi_positions] - rollup['cum_counts'][lo_positions]
+        labels = rollup['labels'][nodes]
+
+        windows = {}
+        for m, key in enumerate(self.measures):
+            windows[key] = []
+            for column in range(len(lo)):
+                column_counts = counts[:, column]
+                if column_counts.sum() == 0:
+                    windows[key].append({})
+                    continue
+                column_values = values[:, column, m]
+                window = {label: value for label, value, count in zip(labels, column_values, column_counts) if count > 0}
+                window['Összes'] = column_values.sum()
+                windows[key].append(window)
+        return windows
+
+
+def hierarchy_from_env():
+    """A BOOKING_ANALYZER_HIERARCHY-ben megadott lebontási hierarchia (None, ha nincs beállítva)"""
+    value = os.environ.get(HIERARCHY_ENV)
+    return DrillHierarchy.parse(value) if value else None
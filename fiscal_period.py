@@ -0,0 +1,164 @@
+import pandas as pd
+import numpy as np
+from datetime import datetime
+from functools import lru_cache
+
+from log_config import get_logger
+
+logger = get_logger(__name__)
+
+# Fiscal year kezdés: August (Aug FY2025 = 2024. augusztus)
+FISCAL_YEAR_START_MONTH = 8
+
+MONTH_NAMES = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
+               'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+MONTH_NUMBERS = {name: number for number, name in enumerate(MONTH_NAMES, start=1)}
+
+# Érvénytelen / hiányzó dátumú sorok jelölése az int oszlopban
+INVALID_PERIOD = -1
+
+
+class FiscalPeriod(int):
+    """Fiscal hónap egész sorszámként: naptári év * 12 + (hónap - 1).
+
+    Az ablakhatárok, összehasonlítások és léptetések egész aritmetikák;
+    a címke ("Jul FY2025") és a dátum konverziója cache-elt.
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def from_year_month(cls, year, month):
+        """Naptári év és hónap alapján"""
+        return cls(year * 12 + month - 1)
+
+    @classmethod
+    def from_date(cls, date):
+        """Dátum (datetime / Timestamp) alapján"""
+        return cls(date.year * 12 + date.month - 1)
+
+    @classmethod
+    def from_label(cls, label):
+        """Fiscal month címke ("Jul FY2025") alapján - ValueError hibás formátumnál"""
+        return cls(_parse_label(str(label).strip()))
+
+    @property
+    def year(self):
+        return int(self) // 12
+
+    @property
+    def month(self):
+        return int(self) % 12 + 1
+
+    @property
+    def fiscal_year(self):
+        return self.year + 1 if self.month >= FISCAL_YEAR_START_MONTH else self.year
+
+    @property
+    def label(self):
+        return _format_label(int(self))
+
+    @property
+    def iso_month(self):
+        """'YYYY-MM' formátum a period_info mezőkhöz"""
+        return f"{self.year:04d}-{self.month:02d}"
+
+    def to_date(self):
+        """A hónap első napja"""
+        return _to_date(int(self))
+
+    def __add__(self, months):
+        return FiscalPeriod(int(self) + int(months))
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        # Két period különbsége hónapokban (int), egyébként visszaléptetés
+        if isinstance(other, FiscalPeriod):
+            return int(self) - int(other)
+        return FiscalPeriod(int(self) - int(other))
+
+    def __str__(self):
+        return self.label
+
+    def __repr__(self):
+        return f"FiscalPeriod('{self.label}')"
+
+
+@lru_cache(maxsize=4096)
+def _parse_label(label):
+    parts = label.split(' ')
+    if len(parts) != 2:
+        raise ValueError(f"Hibás formátum: {label}")
+
+    month_name, fiscal_year_str = parts
+    if not fiscal_year_str.startswith('FY'):
+        raise ValueError(f"Hibás fiscal year formátum: {fiscal_year_str}")
+    fiscal_year = int(fiscal_year_str[2:])
+
+    month = MONTH_NUMBERS.get(month_name)
+    if month is None:
+        raise ValueError(f"Ismeretlen hónap: {month_name}")
+
+    # Aug - Dec az előző naptári évhez tartozik
+    calendar_year = fiscal_year - 1 if month >= FISCAL_YEAR_START_MONTH else fiscal_year
+    return calendar_year * 12 + month - 1
+
+
+@lru_cache(maxsize=4096)
+def _format_label(ordinal):
+    year, month = ordinal // 12, ordinal % 12 + 1
+    fiscal_year = year + 1 if month >= FISCAL_YEAR_START_MONTH else year
+    return f"{MONTH_NAMES[month - 1]} FY{fiscal_year}"
+
+
+@lru_cache(maxsize=4096)
+def _to_date(ordinal):
+    return datetime(ordinal // 12, ordinal % 12 + 1, 1)
+
+
+def current_period():
+    """A mai nap fiscal hónapja"""
+    return FiscalPeriod.from_date(datetime.now())
+
+
+def periods_from_labels(labels, fallback=None):
+    """Fiscal month címke oszlop vektorizált konvertálása int32 period oszloppá.
+
+    Csak a különböző címkéket parse-olja, majd a factorize kódokkal szórja vissza.
+    Hiányzó vagy hibás címke esetén a fallback period (alapból az aktuális hónap).
+    """
+    fallback = current_period() if fallback is None else fallback
+    codes, uniques = pd.factorize(labels)
+    lookup = np.empty(len(uniques) + 1, dtype=np.int32)
+    for i, label in enumerate(uniques):
+        try:
+            lookup[i] = FiscalPeriod.from_label(label)
+        except ValueError as e:
+            logger.error("Dátum konverziós hiba: %s -> %s", label, e)
+            lookup[i] = fallback
+    # Az utolsó elem a hiányzó értékek (kód: -1) fallback-je
+    lookup[-1] = fallback
+    return pd.Series(lookup[codes], index=labels.index)
+
+
+def periods_from_dates(dates):
+    """Dátum oszlop vektorizált konvertálása int32 period oszloppá (NaT -> INVALID_PERIOD)"""
+    dates = pd.to_datetime(dates)
+    periods = (dates.dt.year * 12 + dates.dt.month - 1).fillna(INVALID_PERIOD)
+    return periods.astype(np.int32)
+
+
+def period_labels(periods):
+    """Period oszlop címkékké alakítása - különböző értékenként egyszer formáz"""
+    codes, uniques = pd.factorize(periods)
+    labels = np.array([_format_label(int(p)) if p != INVALID_PERIOD else None for p in uniques] + [None], dtype=object)
+    return pd.Series(labels[codes], index=periods.index)
+
+
+def period_dates(periods):
+    """Period oszlop dátum oszloppá alakítása (a hónap első napja)"""
+    values = periods.to_numpy(dtype=np.int64)
+    dates = pd.to_datetime(pd.DataFrame({'year': values // 12, 'month': values % 12 + 1, 'day': 1}))
+    dates[values == INVALID_PERIOD] = pd.NaT
+    return pd.Series(dates.to_numpy(), index=periods.index)
@@ -0,0 +1,83 @@
+import numpy as np
+
+
+class IndexGrid:
+    """Index szintek és a hozzájuk tartozó növekedési ráták a baseline-hoz képest.
+
+    A target és a szükséges booking számítása architektúra × szint NumPy mátrixokon,
+    broadcasttal történik; az eredmény a megjelenítéshez {arch: {szint: érték}} szótárrá alakítható.
+    Architektúránként eltérő ráták (egyedi növekedési célok) is megadhatók, azonos szintszámmal.
+    """
+
+    def __init__(self, growth_rates, labels=None, architecture_rates=None, highlight_levels=None):
+        self.growth_rates = np.asarray(growth_rates, dtype=np.float64)
+        if self.growth_rates.ndim != 1 or len(self.growth_rates) == 0:
+            raise ValueError("❌ Az index rácshoz legalább egy növekedési ráta kell")
+        if np.any(np.diff(self.growth_rates) < 0):
+            raise ValueError("❌ Az index rács rátáinak növekvő sorrendben kell lenniük")
+        self.levels = list(range(len(self.growth_rates)))
+        self.labels = list(labels) if labels is not None else [f"{rate:.1%}".replace('.0%', '%')
+                                                               for rate in self.growth_rates]
+        self.architecture_rates = {}
+        for arch, rates in (architecture_rates or {}).items():
+            rates = np.asarray(rates, dtype=np.float64)
+            if rates.shape != self.growth_rates.shape:
+                raise ValueError(f"❌ {arch}: a rátáknak {len(self.levels)} szintet kell lefedniük")
+            self.architecture_rates[arch] = rates
+        # A főképernyő összefoglalójában kiemelt szintek (alapból a középső és a legfelső)
+        self.highlight_levels = list(highlight_levels) if highlight_levels is not None else \
+            sorted({self.levels[len(self.levels) // 2], self.levels[-1]})
+
+    @classmethod
+    def default(cls):
+        """Index 0-9: pontosan az index százaléka, Index 10: >9% növekedés (10%-ként számítva)"""
+        rates = [index / 100 for index in range(11)]
+        labels = [f"{index}%" for index in range(10)] + [">9%"]
+        return cls(rates, labels)
+
+    @classmethod
+    def linear(cls, max_rate, step):
+        """Egyenletes rács 0-tól max_rate-ig (pl. linear(0.25, 0.005): 0-25% fél százalékos lépésekben)"""
+        n_levels = int(round(max_rate / step)) + 1
+        return cls(np.arange(n_levels) * step)
+
+    def label(self, level):
+        return self.labels[level]
+
+    def rates_for(self, architectures):
+        """Ráta mátrix (architektúra × szint): az alapértelmezett sor broadcast-olva, egyedi célok felülírva"""
+        rates = np.broadcast_to(self.growth_rates, (len(architectures), len(self.levels)))
+        if not self.architecture_rates:
+            return rates
+        rates = rates.copy()
+        for row, arch in enumerate(architectures):
+            if arch in self.architecture_rates:
+                rates[row] = self.architecture_rates[arch]
+        return rates
+
+    def targets(self, architectures, baselines):
+        """Target mátrix: baseline × (1 + ráta); 0 baseline esetén a target is 0"""
+        baselines = np.asarray(baselines, dtype=np.float64)
+        return baselines[:, None] * (1 + self.rates_for(architectures))
+
+    @staticmethod
+    def needed(existing, targets):
+        """Szükséges további booking mátrix: max(0, target - meglévő)"""
+        existing = np.asarray(existing, dtype=np.float64)
+        return np.maximum(0, targets - existing[:, None])
+
+    def current_levels(self, architectures, existing, baselines):
+        """Jelenlegi index architektúránként: a legmagasabb szint, amelynek rátáját a növekedés eléri.
+
+        0 (vagy hiányzó) baseline, illetve a legalsó ráta alatti növekedés esetén a legalsó szint.
+        """
+        existing = np.asarray(existing, dtype=np.float64)
+        baselines = np.asarray(baselines, dtype=np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            growth = np.where(baselines != 0, (existing - baselines) / np.abs(baselines), -np.inf)
+        reached = (growth[:, None] >= self.rates_for(architectures)).sum(axis=1)
+        return np.maximum(reached - 1, 0)
+
+    def to_dict(self, architectures, matrix):
+        """Mátrix visszaalakítása a megjelenítés által várt {arch: {szint: érték}} szerkezetre"""
+        return {arch: dict(zip(self.levels, row)) for arch, row in zip(architectures, matrix.tolist())}
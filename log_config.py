@@ -0,0 +1,41 @@
+import logging
+import os
+
+# Közös szülő logger: a modulok ez alatt loggolnak (booking_analyzer.<modul>)
+LOGGER_NAME = 'booking_analyzer'
+
+# Környezeti változók: szint (DEBUG / INFO / WARNING / ...) és csendes (production) mód
+LOG_LEVEL_ENV = 'BOOKING_ANALYZER_LOG_LEVEL'
+QUIET_ENV = 'BOOKING_ANALYZER_QUIET'
+
+
+def get_logger(module_name):
+    """Modul logger a közös booking_analyzer logger alatt"""
+    return logging.getLogger(f"{LOGGER_NAME}.{module_name}")
+
+
+def configure_logging(level=None, quiet=None):
+    """A booking_analyzer loggerek szintjének és kimenetének beállítása.
+
+    level: logging szint (név vagy szám), alapból a BOOKING_ANALYZER_LOG_LEVEL vagy INFO.
+    quiet: csendes mód - csak figyelmeztetések és hibák (alapból a BOOKING_ANALYZER_QUIET alapján).
+    A DEBUG szint alatt kimaradnak a csak diagnosztikai számítások (pl. value_counts kiírások).
+    """
+    if quiet is None:
+        quiet = os.environ.get(QUIET_ENV, '').lower() in ('1', 'true', 'yes')
+    if quiet:
+        level = logging.WARNING
+    elif level is None:
+        level = os.environ.get(LOG_LEVEL_ENV, 'INFO')
+    if isinstance(level, str):
+        level = logging.getLevelName(level.upper())
+
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.setLevel(level)
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+        # Ne duplikálódjon a root logger (pl. Streamlit) kimenetében
+        logger.propagate = False
+    return logger
@@ -0,0 +1,192 @@
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:
+    # Windows: nincs resource modul, a csúcs RSS nem mérhető így
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    # Opcionális: /proc nélküli rendszereken ezzel mérjük a jelenlegi RSS-t
+    psutil = None
+
+# Opcionális pontos (fázisonkénti) allokációs csúcs mérés tracemalloc-kal - lassít, csak diagnosztikához
+TRACE_MEMORY_ENV = 'BOOKING_ANALYZER_TRACE_MEMORY'
+
+# A nyitott (tracemalloc-kal mért) fázisok eddigi csúcsa (rekord id -> bájt). A reset_peak globális,
+# ezért egy beágyazott (vagy másik szálon induló) fázis a nullázás előtt ide menti a nyitottak csúcsát.
+_open_peaks = {}
+_open_peaks_lock = threading.Lock()
+
+
+def current_rss_mb():
+    """A folyamat jelenlegi RSS memóriája MB-ban (Linuxon /proc/self/statm, egyébként psutil; None, ha nem mérhető)"""
+    try:
+        with open('/proc/self/statm') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    if psutil is not None:
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    return None
+
+
+def peak_rss_mb():
+    """A folyamat eddigi csúcs RSS memóriája MB-ban (élettartam csúcs, soha nem csökken; None, ha nem mérhető)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linuxon KB, macOS-en bájt
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+class PerfMetrics:
+    """Betöltési fázisok és elemzési hívások mérése: falióra idő, sorszám, memória.
+
+    A fázis memóriája alapból a jelenlegi RSS a fázis elején és végén (és a kettő különbsége);
+    a folyamat élettartam csúcsa külön, folyamat szintű mezőben áll. Fázison belüli
+    allokációs csúcs csak tracemalloc-kal (BOOKING_ANALYZER_TRACE_MEMORY) mérhető.
+
+    A rekordok korlátos sorban tárolódnak (hosszan futó app esetén sem nő korlátlanul),
+    és táblaként (to_frame / summary) vagy JSON-ként (to_json) kérhetők le.
+    """
+
+    def __init__(self, max_records=1000, trace_memory=None):
+        if trace_memory is None:
+            trace_memory = os.environ.get(TRACE_MEMORY_ENV, '').lower() in ('1', 'true', 'yes')
+        self.trace_memory = trace_memory
+        self._records = deque(maxlen=max_records)
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # A lock nem pickle-ölhető (process pool worker-ek)
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def measure(self, phase, category='load', rows=None):
+        """Egy fázis mérése. A visszaadott rekordban a 'rows' a blokkon belül is beállítható."""
+        record = {
+            'phase': phase,
+            'category': category,
+            'started_at': datetime.now().isoformat(timespec='seconds'),
+            'wall_ms': None,
+            'rows': rows,
+            'rss_start_mb': current_rss_mb(),
+            'rss_end_mb': None,
+            'rss_delta_mb': None,
+            'peak_alloc_mb': None,
+            'process_peak_rss_mb': None,
+            'error': None,
+        }
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        if self.trace_memory and not tracing:
+            tracemalloc.start()
+            tracing = True
+        if tracing:
+            with _open_peaks_lock:
+                current_peak = tracemalloc.get_traced_memory()[1]
+                for key in _open_peaks:
+                    _open_peaks[key] = max(_open_peaks[key], current_peak)
+                tracemalloc.reset_peak()
+                _open_peaks[id(record)] = 0
+
+        start = time.perf_counter()
+        try:
+            yield record
+        except Exception as e:
+            record['error'] = str(e)
+            raise
+        finally:
+            record['wall_ms'] = (time.perf_counter() - start) * 1000
+            record['rss_end_mb'] = current_rss_mb()
+            if record['rss_start_mb'] is not None and record['rss_end_mb'] is not None:
+                record['rss_delta_mb'] = record['rss_end_mb'] - record['rss_start_mb']
+            record['process_peak_rss_mb'] = peak_rss_mb()
+            if tracing:
+                # A saját nullázás óta mért csúcs és a beágyazott fázisok előtt mentett csúcs maximuma
+                with _open_peaks_lock:
+                    peak = max(tracemalloc.get_traced_memory()[1], _open_peaks.pop(id(record)))
+                record['peak_alloc_mb'] = peak / (1024 * 1024)
+            with self._lock:
+                self._records.append(record)
+
+    def records(self, category=None):
+        """A rekordok másolata (opcionálisan kategóriára szűrve), időrendben"""
+        with self._lock:
+            records = [dict(record) for record in self._records]
+        if category is not None:
+            records = [record for record in records if record['category'] == category]
+        return records
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+
+    def to_frame(self, category=None):
+        columns = ['phase', 'category', 'started_at', 'wall_ms', 'rows', 'rss_start_mb', 'rss_end_mb', 'rss_delta_mb',
+                   'peak_alloc_mb', 'process_peak_rss_mb', 'error']
+        return pd.DataFrame(self.records(category), columns=columns)
+
+    def summary(self):
+        """Fázisonkénti összesítés: hívásszám, össz / átlag / max idő, utolsó sorszám, a fázis memóriája
+        (legnagyobb RSS változás, utolsó RSS a fázis végén, tracemalloc csúcs)"""
+        frame = self.to_frame()
+        if frame.empty:
+            return pd.DataFrame(columns=['phase', 'category', 'calls', 'total_ms', 'mean_ms', 'max_ms',
+                                         'last_rows', 'max_rss_delta_mb', 'last_rss_end_mb', 'max_peak_alloc_mb'])
+        return (frame
+                .groupby(['phase', 'category'], sort=False)
+                .agg(calls=('wall_ms', 'size'), total_ms=('wall_ms', 'sum'), mean_ms=('wall_ms', 'mean'),
+                     max_ms=('wall_ms', 'max'), last_rows=('rows', 'last'),
+                     max_rss_delta_mb=('rss_delta_mb', 'max'), last_rss_end_mb=('rss_end_mb', 'last'),
+                     max_peak_alloc_mb=('peak_alloc_mb', 'max'))
+                .reset_index())
+
+    def to_json(self):
+        """Gépi feldolgozásra szánt dump: minden rekord, a fázis összesítés és a folyamat szintű memória"""
+        return json.dumps({
+            'generated_at': datetime.now().isoformat(timespec='seconds'),
+            'process': {'rss_mb': current_rss_mb(), 'peak_rss_mb': peak_rss_mb()},
+            'records': self.records(),
+            'summary': self.summary().astype(object).where(lambda frame: frame.notna(), None).to_dict(orient='records'),
+        }, ensure_ascii=False, indent=2, default=str)
+
+
+def measured(phase, category='analysis', count_result=False):
+    """Metódus dekorátor: a hívás mérése a példány metrics attribútumába.
+
+    count_result: a 'rows' mezőbe az eredmény hossza kerül (pl. batch elemzésnél a kiszámított elemzések száma).
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            metrics = getattr(self, 'metrics', None)
+            if metrics is None:
+                return method(self, *args, **kwargs)
+            with metrics.measure(phase, category) as record:
+                result = method(self, *args, **kwargs)
+                if count_result:
+                    record['rows'] = len(result)
+                return result
+        return wrapper
+    return decorator
@@ -0,0 +1,143 @@
+import argparse
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from csv_schema import CsvSchema
+from fiscal_period import FiscalPeriod, FISCAL_YEAR_START_MONTH
+from log_config import configure_logging, get_logger
+
+logger = get_logger(__name__)
+
+# Nyers architektúra nevek (a DEFAULT_ARCHITECTURE_MAPPING kulcsai + a nem csoportosítottak) és gyakoriságuk
+ARCHITECTURE_WEIGHTS = {
+    'ENTERPRISE NETWORKING': 0.30,
+    'SECURITY': 0.18,
+    'COLLABORATION': 0.14,
+    'DATA CENTER GROUP': 0.14,
+    'SERVICES': 0.14,
+    'IOT': 0.05,
+    'OTHER': 0.05,
+}
+
+LAYOUTS = ('fiscal_month', 'date')
+
+# Negyedév végi hónapokban (Oct, Jan, Apr, Jul) több booking érkezik
+QUARTER_END_BOOST = 2.0
+
+
+def parse_size(size):
+    """Sorszám megadása rövidítéssel is: '10k', '1.5M', '50M' -> int"""
+    if isinstance(size, int):
+        return size
+    match = re.fullmatch(r'\s*([\d.]+)\s*([kKmM]?)\s*', str(size))
+    if not match:
+        raise ValueError(f"Hibás méret: {size}")
+    number, suffix = float(match.group(1)), match.group(2).lower()
+    return int(number * {'': 1, 'k': 1_000, 'm': 1_000_000}[suffix])
+
+
+def _month_weights(periods):
+    """Havi súlyok: enyhe növekedési trend és negyedév végi csúcsok"""
+    months = periods % 12 + 1
+    trend = np.linspace(1.0, 1.3, len(periods))
+    quarter_end = np.isin(months, [1, 4, 7, 10])
+    weights = trend * np.where(quarter_end, QUARTER_END_BOOST, 1.0)
+    return weights / weights.sum()
+
+
+def generate_chunk(n_rows, rng, metric='ACV', layout='fiscal_month', end_month='Jun FY2025', n_months=48):
+    """Egy darab szintetikus booking sor a valós CSV exportok oszlopaival.
+
+    Oszlopok: Fiscal Year, Fiscal Quarter, FISCAL_MONTH_NAME vagy Date, Architecture, A ($/vessző formázott string).
+    A TCV értékek az ACV-nél nagyobbak (többéves szerződések), ritkán 100M feletti deal-ekkel.
+    """
+    end_period = FiscalPeriod.from_label(end_month)
+    periods = np.arange(end_period - n_months + 1, end_period + 1)
+    row_periods = rng.choice(periods, size=n_rows, p=_month_weights(periods))
+    years, months = row_periods // 12, row_periods % 12 + 1
+    fiscal_years = np.where(months >= FISCAL_YEAR_START_MONTH, years + 1, years)
+    fiscal_quarters = (months - FISCAL_YEAR_START_MONTH) % 12 // 3 + 1
+
+    names = list(ARCHITECTURE_WEIGHTS)
+    architectures = np.array(names, dtype=object)[
+        rng.choice(len(names), size=n_rows, p=list(ARCHITECTURE_WEIGHTS.values()))]
+    # Kevés hiányzó architektúra (a valós exportokban is előfordul)
+    architectures[rng.random(n_rows) < 0.005] = None
+
+    values = rng.lognormal(mean=10.5, sigma=1.8, size=n_rows)
+    if metric == 'TCV':
+        values *= rng.choice([1, 2, 3, 5], size=n_rows, p=[0.4, 0.25, 0.25, 0.1])
+        big_deals = rng.random(n_rows) < 0.0005
+        values[big_deals] *= rng.uniform(500, 5_000, size=big_deals.sum())
+    amounts = pd.Series(np.round(values, 2)).map('${:,.2f}'.format)
+    # Üres érték cellák (a tisztítás 0-nak veszi)
+    amounts[rng.random(n_rows) < 0.002] = ''
+
+    frame = pd.DataFrame({
+        'Fiscal Year': fiscal_years,
+        'Fiscal Quarter': pd.Series(fiscal_quarters).map('Q{}'.format),
+    })
+    if layout == 'fiscal_month':
+        labels = np.array([FiscalPeriod(period).label for period in periods], dtype=object)
+        frame['FISCAL_MONTH_NAME'] = labels[row_periods - periods[0]]
+    else:
+        days = rng.integers(1, 29, size=n_rows)
+        frame['Date'] = pd.to_datetime({'year': years, 'month': months, 'day': days}).dt.strftime('%Y-%m-%d')
+    frame['Architecture'] = architectures
+    frame['A'] = amounts
+    return frame
+
+
+def dataset_schema(layout):
+    """A generált CSV-k sémája (oszlop szűkítéses, rögzített dtype-os betöltéshez)"""
+    if layout == 'fiscal_month':
+        return CsvSchema('A', fiscal_month_column='FISCAL_MONTH_NAME')
+    return CsvSchema('A', date_column='Date')
+
+
+def write_bookings_csv(path, n_rows, metric='ACV', layout='fiscal_month', seed=0,
+                       chunk_rows=1_000_000, **chunk_options):
+    """Szintetikus CSV írása darabonként (50M sorig is korlátos memóriával)"""
+    if layout not in LAYOUTS:
+        raise ValueError(f"Ismeretlen layout: {layout} (választható: {', '.join(LAYOUTS)})")
+    rng = np.random.default_rng([seed, 0 if metric == 'ACV' else 1])
+    n_rows = parse_size(n_rows)
+
+    tmp_path = f"{path}.tmp"
+    for start in range(0, n_rows, chunk_rows):
+        chunk = generate_chunk(min(chunk_rows, n_rows - start), rng, metric=metric, layout=layout, **chunk_options)
+        chunk.to_csv(tmp_path, mode='w' if start == 0 else 'a', header=start == 0, index=False)
+    os.replace(tmp_path, path)
+    logger.info("🧪 %s: %s sor (%s layout) -> %s", metric, n_rows, layout, path)
+    return path
+
+
+def write_dataset(directory, n_rows, layout='fiscal_month', seed=0, **options):
+    """ACV.csv és TCV.csv generálása egy könyvtárba - visszatérés: (acv_path, tcv_path)"""
+    os.makedirs(directory, exist_ok=True)
+    acv_path = write_bookings_csv(os.path.join(directory, 'ACV.csv'), n_rows, 'ACV', layout, seed, **options)
+    tcv_path = write_bookings_csv(os.path.join(directory, 'TCV.csv'), n_rows, 'TCV', layout, seed, **options)
+    return acv_path, tcv_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Szintetikus ACV/TCV CSV generátor (benchmarkhoz, teszteléshez)")
+    parser.add_argument('--rows', default='100k', help="Sorok száma fájlonként (pl. 10k, 1M, 50M)")
+    parser.add_argument('--layout', choices=LAYOUTS, default='fiscal_month',
+                        help="FISCAL_MONTH_NAME vagy Date oszlopos formátum")
+    parser.add_argument('--output-dir', default='synthetic_data', help="Kimeneti könyvtár")
+    parser.add_argument('--end-month', default='Jun FY2025', help="Utolsó adat hónap")
+    parser.add_argument('--months', type=int, default=48, help="Lefedett hónapok száma")
+    parser.add_argument('--seed', type=int, default=0, help="Véletlen mag (reprodukálható kimenet)")
+    args = parser.parse_args(argv)
+
+    configure_logging()
+    write_dataset(args.output_dir, args.rows, layout=args.layout, seed=args.seed,
+                  end_month=args.end_month, n_months=args.months)
+
+
+if __name__ == "__main__":
+    main()
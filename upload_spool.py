@@ -0,0 +1,97 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import weakref
+from collections import namedtuple
+
+from log_config import get_logger
+
+logger = get_logger(__name__)
+
+# A spool könyvtárak szülő könyvtára (alapból a rendszer temp könyvtára)
+UPLOAD_DIR_ENV = 'BOOKING_ANALYZER_UPLOAD_DIR'
+
+# Egy lemezre írt feltöltés: útvonal, tartalom hash (SHA-256) és méret
+SpooledUpload = namedtuple('SpooledUpload', ['path', 'content_hash', 'size'])
+
+
+def content_hash(file_obj, chunk_size=8 * 1024 * 1024):
+    """Fájl objektum tartalmának SHA-256 hash-e.
+
+    Memóriában lévő (BytesIO alapú, pl. Streamlit UploadedFile) objektumnál a puffert
+    másolat nélkül hash-eli, egyébként darabonként olvas; a pozíció visszaáll.
+    """
+    digest = hashlib.sha256()
+    if hasattr(file_obj, 'getbuffer'):
+        with file_obj.getbuffer() as buffer:
+            digest.update(buffer)
+        return digest.hexdigest()
+    position = file_obj.tell()
+    file_obj.seek(0)
+    for chunk in iter(lambda: file_obj.read(chunk_size), b''):
+        digest.update(chunk)
+    file_obj.seek(position)
+    return digest.hexdigest()
+
+
+class UploadSpool:
+    """Feltöltött CSV-k lemezre írása, hogy útvonalként (a lokális fájlokkal azonos módon) olvashatók legyenek.
+
+    Egy spool egy sessionhöz tartozik, saját ideiglenes könyvtárral. A fájlok tartalom hash
+    szerint kerülnek lemezre, így ugyanaz a tartalom (újrafeltöltésnél is) csak egyszer íródik ki.
+    A könyvtár (a mellé került backend adatbázisokkal együtt) cleanup() hívásra, a spool
+    felszabadulásakor (session vége) vagy legkésőbb a folyamat kilépésekor törlődik.
+    """
+
+    def __init__(self, directory=None, chunk_size=8 * 1024 * 1024):
+        parent = directory or os.environ.get(UPLOAD_DIR_ENV) or None
+        if parent is not None:
+            os.makedirs(parent, exist_ok=True)
+        self.directory = tempfile.mkdtemp(prefix='booking_uploads_', dir=parent)
+        self.chunk_size = chunk_size
+        # Tartalom hash -> lemezre írt feltöltés
+        self._uploads = {}
+        # Feltöltés azonosító (file_id) -> tartalom hash: a Streamlit újrafuttatásai nem hash-elnek újra
+        self._hashes = {}
+        self._finalizer = weakref.finalize(self, shutil.rmtree, self.directory, ignore_errors=True)
+
+    def content_hash(self, file_obj):
+        """A feltöltés tartalom hash-e (azonosítóval rendelkező feltöltésnél csak egyszer számolva)"""
+        file_id = getattr(file_obj, 'file_id', None)
+        if file_id is None:
+            return content_hash(file_obj, self.chunk_size)
+        if file_id not in self._hashes:
+            self._hashes[file_id] = content_hash(file_obj, self.chunk_size)
+        return self._hashes[file_id]
+
+    def spool(self, file_obj, upload_hash=None):
+        """Feltöltés lemezre írása (ha ez a tartalom még nincs kint) - SpooledUpload"""
+        upload_hash = upload_hash or self.content_hash(file_obj)
+        if upload_hash in self._uploads:
+            return self._uploads[upload_hash]
+
+        path = os.path.join(self.directory, f"{upload_hash}.csv")
+        tmp_path = f"{path}.tmp"
+        position = file_obj.tell()
+        file_obj.seek(0)
+        try:
+            with open(tmp_path, 'wb') as f:
+                shutil.copyfileobj(file_obj, f, self.chunk_size)
+            os.replace(tmp_path, path)
+        finally:
+            file_obj.seek(position)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        upload = SpooledUpload(path, upload_hash, os.path.getsize(path))
+        self._uploads[upload_hash] = upload
+        logger.info("📥 Feltöltés lemezre írva: %s (%.1f MB)", path, upload.size / 1e6)
+        return upload
+
+    def cleanup(self):
+        """A spool könyvtár törlése (többszöri hívás esetén csak egyszer fut)"""
+        if self._finalizer.alive:
+            self._finalizer()
+            self._uploads.clear()
+            logger.info("🧹 Feltöltési spool törölve: %s", self.directory)